@@ -2,68 +2,157 @@ import streamlit as st
 import os
 import json
 import time
-from datetime import datetime
+import io
 import logging
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import ChatPromptTemplate
 from langchain.globals import set_verbose
-import tiktoken
-import hashlib
+from streamlit.errors import StreamlitAPIException
 import re
-import docx
-import PyPDF2
-import pickle
-import io
 import sys
 from pathlib import Path
 
 # Adiciona o diretório raiz ao path para importar módulos corretamente
 sys.path.append(str(Path(__file__).parent.parent))
 
-def app(config=None):
-    # Verifica se a página já foi configurada pelo app principal
-    if not config or not config.get("already_configured"):
-        # Configuração da página Streamlit (só será executada se o app for executado sozinho)
-        st.set_page_config(page_title='Consultor I.A. Sucesso em Vendas', layout="wide")
-
-    # Configuração de logging
-    log_dir = Path(__file__).parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    log_file = log_dir / "consultor_ia.log"
-    
+from utils.batch_consult import read_questions, results_to_file, run_batch
+from utils.chat_summary import format_messages, get_chat_summarizer
+from utils.chat_writer import open_write_behind_store
+from utils.context_cache import BACKEND_GEMINI, BACKEND_SIMULATED, get_context_cache, get_static_prefix
+from utils.context_budget import DROP_LAST, DROP_OLDEST, TRUNCATE, ContextBudget, ContextPart, log_budget_report
+from utils.materials_corpus import attach_session, corpus_stats, get_materials_corpus
+from utils.response_cache import get_response_cache, make_cache_key
+from utils.retrieval import format_chunks
+from utils.run_metrics import get_run_metrics
+from utils.semantic_cache import get_semantic_cache
+from utils.tokens import get_token_counter
+from utils.upload_processing import FAILED as UPLOAD_FAILED, READY as UPLOAD_READY, get_upload_processor
+
+# Quantidade máxima de trechos dos materiais fixos enviados por pergunta
+MATERIALS_TOP_K = int(os.getenv('CONSULTOR_MATERIAIS_TOP_K', '8'))
+# Orçamento de tokens reservado aos trechos dos materiais fixos em cada prompt
+MATERIALS_TOKEN_BUDGET = int(os.getenv('CONSULTOR_MATERIAIS_TOKENS', '6000'))
+
+# Modelo usado pelo Consultor (também faz parte da chave do cache de respostas)
+MODEL_NAME = "gemini-1.5-pro"
+MODEL_TEMPERATURE = 0.3
+
+# Cache de respostas compartilhado entre sessões
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('CONSULTOR_CACHE_MAX', '512'))
+RESPONSE_CACHE_TTL = int(os.getenv('CONSULTOR_CACHE_TTL', str(24 * 3600)))
+RESPONSE_CACHE_PERSISTENT = os.getenv('CONSULTOR_CACHE_PERSISTENTE', '0') == '1'
+
+# Cache semântico: reaproveita respostas de perguntas parecidas ("ngramas" funciona offline; "gemini" usa a API)
+# Desligado por padrão: perguntas que diferem só na palavra-chave podem receber a resposta de outra
+SEMANTIC_CACHE_ENABLED = os.getenv('CONSULTOR_CACHE_SEMANTICO', '0') == '1'
+SEMANTIC_CACHE_EMBEDDER = os.getenv('CONSULTOR_CACHE_SEMANTICO_EMBEDDER', 'ngramas')
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('CONSULTOR_CACHE_SEMANTICO_LIMIAR', '0.65'))
+
+# Contagem de tokens: "tiktoken" (exata para GPT) ou "gemini-aprox" (por caracteres, calibrada pela API)
+TOKEN_COUNT_MODE = os.getenv('CONSULTOR_TOKENS_MODO', 'tiktoken')
+TOKEN_CHARS_PER_TOKEN = float(os.getenv('CONSULTOR_TOKENS_CHARS_POR_TOKEN', '4.0'))
+
+# Orçamento total de tokens do contexto (sistema, histórico, materiais do usuário e de referência)
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONSULTOR_ORCAMENTO_CONTEXTO', '24000'))
+
+# Extração dos materiais fixos: processos paralelos e fração mínima pronta antes de aceitar perguntas
+MATERIALS_WORKERS = int(os.getenv('CONSULTOR_MATERIAIS_PROCESSOS', '0')) or None
+MATERIALS_MIN_READY = float(os.getenv('CONSULTOR_MATERIAIS_PRONTOS', '0.5'))
+
+# Turnos (pergunta + resposta) mantidos na íntegra; os anteriores entram no resumo da conversa
+HISTORY_TURNS = int(os.getenv('CONSULTOR_HISTORICO_TURNOS', '3'))
+
+# Materiais fixos no prompt: "trechos" (recuperados por pergunta) ou "completo" (todo o corpus no
+# prefixo fixo, reaproveitado pelo cache de contexto do backend)
+MATERIALS_MODE = os.getenv('CONSULTOR_MATERIAIS_MODO', 'trechos')
+# Backend do modelo: "gemini" ou "simulado" (local, simula preço e latência do cache de prefixo)
+LLM_BACKEND = os.getenv('CONSULTOR_BACKEND', BACKEND_GEMINI)
+
+# Quantidade de chats exibidos por página na barra lateral
+CHATS_PER_PAGE = int(os.getenv('CONSULTOR_CHATS_POR_PAGINA', '20'))
+
+# Janela (ms) em que as alterações dos chats são agrupadas antes de gravar em segundo plano
+CHATS_WRITE_DELAY = int(os.getenv('CONSULTOR_CHATS_GRAVACAO_MS', '250')) / 1000
+
+# Pastas dos dados (chats, cache) e dos logs do Consultor
+DATA_DIR = Path(os.getenv('CONSULTOR_DIRETORIO_DADOS') or Path(__file__).parent.parent / "data")
+LOG_DIR = Path(os.getenv('CONSULTOR_DIRETORIO_LOGS') or Path(__file__).parent.parent / "logs")
+
+# Consulta em lote: respostas simultâneas e limite de chamadas por minuto ao modelo (cota do provedor)
+BATCH_WORKERS = int(os.getenv('CONSULTOR_LOTE_CONCORRENCIA', '4'))
+BATCH_RATE_PER_MINUTE = int(os.getenv('CONSULTOR_LOTE_LIMITE_POR_MINUTO', '60'))
+
+logger = logging.getLogger(__name__)
+
+# CSS básico para estilo consistente
+CSS = """
+<style>
+    .centered-title {
+        text-align: center;
+        padding: 20px 0;
+    }
+</style>
+"""
+
+LOGO_FILE = Path(__file__).parent.parent / "assets" / "LOGO SUCESSO EM VENDAS HORIZONTAL AZUL.png"
+
+# Prompts rápidos: (rótulo, chave do botão, texto); o usuário troca "(...)" pelo produto ou tema
+QUICK_PROMPTS = [
+    ("Vender Produto", "btn_vender_produto",
+     "Me ajude a vender uma (...), preciso de ideias práticas e ações aplicáveis para meu time vender esse "
+     "produto, preciso que enfatize suas qualidades reais e diferenciais e busque argumentos concisos que "
+     "naturalmente me ajudem com possíveis objeções."),
+    ("Criar Treinamento", "btn_criar_treinamento",
+     "Me ajude a criar um treinamento de (...) com ferramentas e uma lógica de apresentação. Destrinche os "
+     "tópicos com conteúdos mais práticos e aplicáveis."),
+    ("Estratégia de Marketing", "btn_estrategia_marketing",
+     "Preciso de uma estratégia de marketing para aumentar a visibilidade e engajamento do nosso produto. "
+     "Inclua ideias inovadoras que possam ser implementadas rapidamente e que aproveitem as tendências atuais "
+     "do mercado."),
+]
+
+
+def is_quick_prompt(text):
+    """Indica se o texto é um prompt rápido, preenchido ou não"""
+    for _, _, template in QUICK_PROMPTS:
+        head, _, tail = template.partition("(...)")
+        if text.startswith(head) and text.endswith(tail):
+            return True
+    return False
+
+
+@st.cache_resource
+def configure_logging(log_file):
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(str(log_file)),
+            logging.FileHandler(log_file),
             logging.StreamHandler()
         ]
     )
-    logger = logging.getLogger(__name__)
-
     # Definir a verbosidade
     set_verbose(True)
 
-    # Caminho para os assets e materiais
-    assets_dir = Path(__file__).parent.parent / "assets"
-    materials_dir = Path(__file__).parent.parent / "materiais"
-    materials_dir.mkdir(exist_ok=True)  # Cria a pasta se não existir
-    data_dir = Path(__file__).parent.parent / "data"
-    data_dir.mkdir(exist_ok=True)
-    chats_file = data_dir / "consultor_chats.pkl"    # Agora carrega o .env
+
+@st.cache_resource(show_spinner=False)
+def init_llm():
+    """Carrega o .env, detecta as credenciais e cria o cliente do Gemini; retorna (llm, avisos para a tela)"""
+    notices = []
+    # Agora carrega o .env
     try:
         from dotenv import load_dotenv
         load_dotenv(override=True)  # Force override existing env variables
         logger.info(f"Novo caminho das credenciais: {os.getenv('GOOGLE_APPLICATION_CREDENTIALS')}")
     except Exception as e:
         logger.error(f"Erro ao carregar .env: {e}")
-        st.warning("Arquivo .env não encontrado. Algumas funcionalidades podem não estar disponíveis.")
-        
+        notices.append(("warning", "Arquivo .env não encontrado. Algumas funcionalidades podem não estar disponíveis."))
+
     # Configuração do Gemini AI
     try:        # Verificar se as credenciais estão configuradas (arquivo local ou JSON na variável de ambiente)
         credenciais_env = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
         credenciais_configuradas = False
-        
+
         if credenciais_env:
             # Verificar se é um JSON direto (Streamlit Cloud)
             if credenciais_env.strip().startswith('{') and credenciais_env.strip().endswith('}'):
@@ -98,169 +187,112 @@ def app(config=None):
                 logger.info(f"Usando arquivo de credenciais padrão: {caminho_padrao}")
             else:
                 logger.info("Nenhuma credencial encontrada em arquivo local ou variável de ambiente")
-        
+
         if not credenciais_configuradas:
             logger.warning("Credenciais do Google Cloud não encontradas")
-            st.warning("⚠️ Credenciais do Google Cloud não configuradas corretamente. Verifique a configuração.")
+            notices.append(("warning", "⚠️ Credenciais do Google Cloud não configuradas corretamente. Verifique a configuração."))
             llm = None
         else:
             # Inicializar o modelo apenas se as credenciais estão configuradas
-            llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.3)
+            llm = ChatGoogleGenerativeAI(model=MODEL_NAME, temperature=MODEL_TEMPERATURE)
             logger.info("Modelo Gemini inicializado com sucesso")
-        
+
     except Exception as e:
         logger.error(f"Erro ao inicializar o modelo Gemini: {e}")
-        st.error(f"Erro ao inicializar o modelo de IA: {str(e)}")
+        notices.append(("error", f"Erro ao inicializar o modelo de IA: {str(e)}"))
         llm = None
 
-    # Função para contar tokens
-    def num_tokens_from_string(string: str, model_name: str = "gpt-3.5-turbo") -> int:
-        try:
-            encoding = tiktoken.encoding_for_model(model_name)
-            num_tokens = len(encoding.encode(string))
-            return num_tokens
-        except:
-            # Fallback simples se tiktoken falhar
-            return len(string.split())
+    return llm, notices
 
-    # Função para contar caracteres
-    def count_characters(text):
-        return len(text)
 
-    # Função para carregar e processar arquivos JSON
-    def load_json(file):
-        try:
-            if isinstance(file, (str, Path)):
-                # Se for um caminho de arquivo
-                with open(file, 'r') as f:
-                    data = json.load(f)
-            else:
-                # Se for um objeto de arquivo (upload)
-                data = json.load(file)
-            return data
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Erro ao decodificar o JSON: {e}")
-        except Exception as e:
-            raise RuntimeError(f"Erro ao carregar o arquivo JSON: {e}")
+@st.cache_resource(show_spinner=False)
+def load_logo(path, width=600):
+    """Logo reduzida uma única vez; o arquivo original (10118 px) era decodificado e redimensionado a cada rerun"""
+    from PIL import Image
+    with Image.open(path) as image:
+        image.thumbnail((width, width))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
 
-    # Função para carregar e processar arquivos DOCX
-    def load_docx(file):
-        try:
-            if isinstance(file, (str, Path)):
-                # Se for um caminho de arquivo
-                doc = docx.Document(file)
-            else:
-                # Se for um objeto de arquivo (upload)
-                doc = docx.Document(io.BytesIO(file.read()))
-                file.seek(0)  # Resetar o ponteiro do arquivo
-            
-            text = "\n".join([p.text for p in doc.paragraphs])
-            return text
-        except Exception as e:
-            raise RuntimeError(f"Erro ao carregar o arquivo DOCX: {e}")
 
-    # Função para carregar e processar arquivos PDF
-    def load_pdf(file):
-        try:
-            if isinstance(file, (str, Path)):
-                # Se for um caminho de arquivo
-                with open(file, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    text = ""
-                    for page in reader.pages:
-                        text += page.extract_text() if page.extract_text() else ""
-            else:
-                # Se for um objeto de arquivo (upload)
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() if page.extract_text() else ""
-                file.seek(0)  # Resetar o ponteiro do arquivo
-                
-            return text
-        except Exception as e:
-            raise RuntimeError(f"Erro ao carregar o arquivo PDF: {e}")
+def rerun_fragment():
+    """Reexecuta só o fragmento atual; se o fragmento rodou dentro de uma execução completa, o app inteiro"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
 
-    # Função para carregar todos os arquivos na pasta materiais
-    def load_fixed_materials():
-        materials = []
-        total_tokens = 0
-        total_chars = 0
-        
-        if not materials_dir.exists():
-            logger.warning(f"Pasta de materiais não encontrada: {materials_dir}")
-            return "", 0, 0
-
-        for filename in os.listdir(materials_dir):
-            filepath = materials_dir / filename
-            try:
-                if filename.endswith('.json'):
-                    content = load_json(filepath)
-                    content_str = str(content)
-                    materials.append(content_str)
-                    total_tokens += num_tokens_from_string(content_str)
-                    total_chars += count_characters(content_str)
-                    logger.info(f"Carregado material JSON: {filename}")
-                elif filename.endswith('.docx'):
-                    content = load_docx(filepath)
-                    materials.append(content)
-                    total_tokens += num_tokens_from_string(content)
-                    total_chars += count_characters(content)
-                    logger.info(f"Carregado material DOCX: {filename}")
-                elif filename.endswith('.pdf'):
-                    content = load_pdf(filepath)
-                    materials.append(content)
-                    total_tokens += num_tokens_from_string(content)
-                    total_chars += count_characters(content)
-                    logger.info(f"Carregado material PDF: {filename}")
-            except Exception as e:
-                logger.error(f"Erro ao carregar arquivo {filename}: {e}")
-        
-        materials_text = "\n\n".join(materials)
-        logger.info(f"Total de tokens nos materiais fixos: {total_tokens}")
-        logger.info(f"Total de caracteres nos materiais fixos: {total_chars}")
-        return materials_text, total_tokens, total_chars
-
-    # Função para processar arquivos carregados pelo usuário
-    def process_uploaded_files(uploaded_files):
-        if not uploaded_files:
-            return "", 0, 0
-            
-        materials = []
-        total_tokens = 0
-        total_chars = 0
-        
-        for file in uploaded_files:
-            try:
-                if file.name.endswith('.json'):
-                    content = load_json(file)
-                    content_str = str(content)
-                    materials.append(content_str)
-                    total_tokens += num_tokens_from_string(content_str)
-                    total_chars += count_characters(content_str)
-                    logger.info(f"Carregado material JSON do usuário: {file.name}")
-                elif file.name.endswith('.docx'):
-                    content = load_docx(file)
-                    materials.append(content)
-                    total_tokens += num_tokens_from_string(content)
-                    total_chars += count_characters(content)
-                    logger.info(f"Carregado material DOCX do usuário: {file.name}")
-                elif file.name.endswith('.pdf'):
-                    content = load_pdf(file)
-                    materials.append(content)
-                    total_tokens += num_tokens_from_string(content)
-                    total_chars += count_characters(content)
-                    logger.info(f"Carregado material PDF do usuário: {file.name}")
-                else:
-                    st.warning(f"Formato de arquivo não suportado: {file.name}")
-            except Exception as e:
-                logger.error(f"Erro ao processar arquivo {file.name}: {e}")
-                st.error(f"Erro ao processar arquivo {file.name}: {str(e)}")
-        
-        materials_text = "\n\n".join(materials)
-        logger.info(f"Total de tokens nos materiais do usuário: {total_tokens}")
-        logger.info(f"Total de caracteres nos materiais do usuário: {total_chars}")
-        return materials_text, total_tokens, total_chars
+
+def app(config=None):
+    # Tempo de cada execução completa do script (também as interrompidas por st.rerun);
+    # os fragmentos medem as próprias
+    start = time.perf_counter()
+    try:
+        render_app(config)
+    finally:
+        get_run_metrics().record("app", time.perf_counter() - start)
+
+
+def render_app(config=None):
+    # Verifica se a página já foi configurada pelo app principal
+    if not config or not config.get("already_configured"):
+        # Configuração da página Streamlit (só será executada se o app for executado sozinho)
+        st.set_page_config(page_title='Consultor I.A. Sucesso em Vendas', layout="wide")
+
+    # Configuração de logging (uma vez por processo)
+    log_dir = LOG_DIR
+    configure_logging(str(log_dir / "consultor_ia.log"))
+
+    # Caminho para os materiais e dados
+    materials_dir = Path(__file__).parent.parent / "materiais"
+    materials_dir.mkdir(exist_ok=True)  # Cria a pasta se não existir
+    data_dir = DATA_DIR
+    data_dir.mkdir(parents=True, exist_ok=True)
+    chats_db = data_dir / "consultor_chats.db"
+    chats_file = data_dir / "consultor_chats.pkl"  # Formato antigo, migrado uma única vez para o SQLite
+    # .env, credenciais e cliente do Gemini preparados uma vez por processo, não a cada rerun
+    llm, llm_notices = init_llm()
+    for level, message in llm_notices:
+        getattr(st, level)(message)
+
+    # Contador de tokens compartilhado (codificador carregado uma vez, contagens em cache por conteúdo)
+    token_counter = get_token_counter(TOKEN_COUNT_MODE, chars_per_token=TOKEN_CHARS_PER_TOKEN)
+
+    # Função para contar caracteres
+    def count_characters(text):
+        return len(text)
+
+    # Extração dos uploads em segundo plano, uma única vez por conteúdo
+    upload_processor = get_upload_processor(token_counter)
+
+    # Função para exibir o andamento dos uploads e aplicar os materiais ao chat quando prontos
+    def render_upload_status(digests):
+        done, total = upload_processor.progress(digests)
+        if done < total:
+            st.progress(done / total, text=f"Processando materiais: {done}/{total} arquivos")
+            return
+
+        jobs = upload_processor.status(digests)
+        for job in jobs:
+            if job['status'] == UPLOAD_FAILED:
+                st.error(f"Erro ao processar arquivo {job['name']}: {job['error']}")
+        ready = [job['entry'] for job in jobs if job['status'] == UPLOAD_READY]
+
+        # Só grava no chat quando o conjunto de arquivos (ou o chat) muda
+        signature = (st.session_state.current_chat_id, tuple(digests))
+        if st.session_state.get('applied_uploads') != signature:
+            # O chat guarda só referências; cada texto é armazenado uma vez por conteúdo
+            chat_store.set_chat_materials(st.session_state.current_chat_id,
+                                          [(entry['name'], entry['text']) for entry in ready])
+            st.session_state.applied_uploads = signature
+            logger.info(f"Total de tokens nos materiais do usuário: {sum(e['tokens'] for e in ready)}")
+            logger.info(f"Total de caracteres nos materiais do usuário: {sum(e['chars'] for e in ready)}")
+            if st.session_state.get('uploads_pending'):
+                # A extração terminou durante o acompanhamento: recarrega para parar o polling
+                st.session_state.uploads_pending = False
+                st.rerun()
+        st.success(f"Materiais carregados: {len(ready)} arquivos")
 
     # Contexto fixo do agente
     agent_context = (
@@ -269,57 +301,122 @@ def app(config=None):
         "Seu papel é fornecer assistência especializada utilizando o método de vendas da Sucesso em Vendas e ajudar com conselhos comerciais para gerentes, coordenadores e vendedores."
     )
 
-    # Função para gerar a resposta
-    def generate_response(user_input, context):
-        if not llm:
-            return "Erro: Modelo de IA não inicializado. Verifique as credenciais."
-            
-        # Gerar uma chave única para o cache
-        cache_key = hashlib.md5((user_input + context[:100]).encode()).hexdigest()
+    # Intervalo mínimo (em segundos) entre atualizações da resposta na tela
+    STREAM_RENDER_INTERVAL = 0.1
+
+    # Cache de respostas compartilhado pelo processo (LRU com expiração)
+    response_cache = get_response_cache(
+        RESPONSE_CACHE_MAX_ENTRIES,
+        RESPONSE_CACHE_TTL,
+        str(data_dir / "consultor_cache.db") if RESPONSE_CACHE_PERSISTENT else None,
+    )
+
+    # Cache semântico compartilhado pelo processo (perguntas com redação diferente e mesma intenção)
+    semantic_cache = get_semantic_cache(SEMANTIC_CACHE_EMBEDDER, SEMANTIC_CACHE_THRESHOLD) \
+        if SEMANTIC_CACHE_ENABLED else None
+
+    # Função para gerar a resposta, entregando os trechos conforme o modelo os produz
+    # Na consulta em lote (raise_errors=True) as falhas são levantadas em vez de virar texto da resposta,
+    # para que fiquem registradas na coluna de erro da planilha
+    def generate_response(user_input, context_segments, corpus, static_prefix, chat=None, raise_errors=False):
+        if not context_cache:
+            if raise_errors:
+                raise RuntimeError("Modelo de IA não inicializado. Verifique as credenciais.")
+            yield "Erro: Modelo de IA não inicializado. Verifique as credenciais."
+            return
+
+        # Só o sufixo muda a cada turno; o prefixo fixo é identificado pela versão
+        suffix_segments = context_segments + [f"\n\nUsuário: {user_input}\nChatbot:"]
+        suffix = "".join(suffix_segments)
+
+        # A chave cobre o prompt efetivo inteiro (prefixo, pergunta, trechos, materiais e histórico) e o modelo
+        cache_key = make_cache_key(prefix=static_prefix.version, suffix=suffix,
+                                   model=MODEL_NAME, temperature=MODEL_TEMPERATURE)
         
         # Verificar se a resposta está no cache
-        if cache_key in st.session_state.response_cache:
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
             logger.info("Resposta encontrada no cache")
-            cached_response = st.session_state.response_cache[cache_key]
-            return cached_response
-
-        prompt = f"{context}\n\nUsuário: {user_input}\nChatbot:"
-        input_tokens = num_tokens_from_string(prompt)
-        input_chars = count_characters(prompt)
-        logger.info(f"Tokens na entrada: {input_tokens}")
+            yield cached_response
+            return
+
+        # Busca por similaridade só vale para a mesma versão dos materiais e do prefixo, e para a primeira
+        # pergunta de um chat sem materiais próprios: com histórico ou resumo a pergunta pode depender da
+        # conversa ("mais exemplos disso"); perguntas em lote não têm chat. Prompts rápidos ficam de fora:
+        # o texto fixo domina a similaridade e só o produto ou tema preenchido muda
+        semantic_scope = f"{static_prefix.version}:{corpus.version if corpus else ''}"
+        use_semantic = semantic_cache is not None and not is_quick_prompt(user_input) and not (
+            chat and (chat['materials'] or chat['messages'] or chat.get('summary')))
+        if use_semantic:
+            hit = semantic_cache.lookup(user_input, semantic_scope)
+            if hit is not None:
+                answer, similarity, original_question = hit
+                logger.info(f"Resposta encontrada no cache semântico (similaridade {similarity:.2f} "
+                            f"com \"{original_question}\")")
+                yield answer
+                return
+
+        input_tokens = static_prefix.tokens + token_counter.count_segments(suffix_segments)
+        input_chars = len(static_prefix.text) + count_characters(suffix)
+        logger.info(f"Tokens na entrada: {input_tokens} ({static_prefix.tokens} no prefixo {static_prefix.version})")
         logger.info(f"Caracteres na entrada: {input_chars}")
-        
-        model = ChatPromptTemplate.from_template(prompt) | llm
+
+        parts = []
         try:
-            response = model.invoke({'input': prompt})
-            response_content = response.content if hasattr(response, 'content') else str(response)
-            
-            response_tokens = num_tokens_from_string(response_content)
-            response_chars = count_characters(response_content)
-            logger.info(f"Tokens na resposta: {response_tokens}")
-            logger.info(f"Caracteres na resposta: {response_chars}")
-            
-            total_tokens = input_tokens + response_tokens
-            total_chars = input_chars + response_chars
-            logger.info(f"Total de tokens nesta interação: {total_tokens}")
-            logger.info(f"Total de caracteres nesta interação: {total_chars}")
-            
-            # Armazenar a resposta no cache
-            st.session_state.response_cache[cache_key] = response_content
-            
-            return response_content
+            call = context_cache.stream(static_prefix, suffix)
+            for text in call:
+                parts.append(text)
+                yield text
         except Exception as e:
             logger.error(f"Erro ao gerar resposta: {str(e)}")
-            return f"Ocorreu um erro ao gerar a resposta: {str(e)}. Por favor, tente novamente."
-
-    # Função para exibir a resposta gradualmente como se estivesse digitando
-    def display_typing_response(response_text, container):
-        typing_speed = 0.01  # Velocidade de digitação (em segundos por caractere)
-        typed_text = ""
-        for char in response_text:
-            typed_text += char
-            container.markdown(typed_text)
-            time.sleep(typing_speed)
+            if raise_errors:
+                raise
+            yield f"Ocorreu um erro ao gerar a resposta: {str(e)}. Por favor, tente novamente."
+            return
+
+        response_content = "".join(parts)
+        usage = call.usage
+        if usage and usage.get('input_tokens'):
+            # Contagem real do Gemini, usada para calibrar o modo aproximado
+            logger.info(f"Tokens na entrada segundo o Gemini: {usage['input_tokens']}")
+            token_counter.observe(input_chars, usage['input_tokens'])
+        response_tokens = token_counter.count(response_content)
+        response_chars = count_characters(response_content)
+        logger.info(f"Tokens na resposta: {response_tokens}")
+        logger.info(f"Caracteres na resposta: {response_chars}")
+        
+        total_tokens = input_tokens + response_tokens
+        total_chars = input_chars + response_chars
+        logger.info(f"Total de tokens nesta interação: {total_tokens}")
+        logger.info(f"Total de caracteres nesta interação: {total_chars}")
+        
+        # Armazenar a resposta no cache
+        response_cache.set(cache_key, response_content)
+        if use_semantic:
+            semantic_cache.add(user_input, response_content, semantic_scope)
+
+    # Função para exibir a resposta à medida que chega do modelo
+    def display_streamed_response(chunks, container):
+        start = time.perf_counter()
+        first_token_time = None
+        last_render = 0.0
+        text = ""
+        for chunk in chunks:
+            now = time.perf_counter()
+            if first_token_time is None:
+                first_token_time = now - start
+            text += chunk
+            # Renderiza por lote de trechos, no máximo a cada STREAM_RENDER_INTERVAL
+            if now - last_render >= STREAM_RENDER_INTERVAL:
+                container.markdown(text + "▌")
+                last_render = now
+        container.markdown(text)
+
+        total_time = time.perf_counter() - start
+        first_token_time = first_token_time or total_time
+        logger.info(f"Tempo até o primeiro token: {first_token_time:.2f}s")
+        logger.info(f"Tempo total da resposta: {total_time:.2f}s")
+        return text, first_token_time, total_time
 
     # Função para extrair título do chat
     def extract_title(message):
@@ -329,136 +426,241 @@ def app(config=None):
             return f"{words[0]} {words[1]}..."
         return "Novo Chat"
 
-    # Função para salvar os chats
-    def save_chats():
-        try:
-            with open(chats_file, 'wb') as f:
-                pickle.dump(st.session_state.chats, f)
-            logger.info("Chats salvos com sucesso.")
-        except Exception as e:
-            logger.error(f"Erro ao salvar chats: {e}")
-            st.error(f"Erro ao salvar chats: {str(e)}")
-
-    # Função para carregar os chats
-    def load_chats():
-        if not chats_file.exists():
-            logger.info("Arquivo de chats não encontrado. Criando novo.")
-            return {'chat_1': {'date': datetime.now().strftime("%d/%m/%Y"), 
-                               'messages': [], 
-                               'title': "Novo Chat",
-                               'user_materials': ""}}
-        
+    # Armazenamento dos chats em SQLite, compartilhado pelo processo; as gravações saem do caminho da resposta
+    chat_store = open_write_behind_store(str(chats_db), str(chats_file), CHATS_WRITE_DELAY)
+    # Resumo incremental das conversas longas, atualizado em segundo plano após cada turno
+    chat_summarizer = get_chat_summarizer(chat_store, HISTORY_TURNS * 2)
+
+    # Função para salvar uma mensagem no chat
+    def save_message(chat_id, role, content):
         try:
-            with open(chats_file, 'rb') as f:
-                chats = pickle.load(f)
-            logger.info(f"Chats carregados com sucesso. Total: {len(chats)}")
-            return chats
+            chat_store.append_message(chat_id, role, content)
+            logger.info(f"Mensagem salva no chat {chat_id}.")
         except Exception as e:
-            logger.error(f"Erro ao carregar chats: {e}")
-            st.error(f"Erro ao carregar chats: {str(e)}")
-            return {'chat_1': {'date': datetime.now().strftime("%d/%m/%Y"), 
-                               'messages': [], 
-                               'title': "Novo Chat",
-                               'user_materials': ""}}
+            logger.error(f"Erro ao salvar mensagem: {e}")
+            st.error(f"Erro ao salvar mensagem: {str(e)}")
+
+    # Função para garantir um chat selecionado válido (só metadados, sem as mensagens)
+    def ensure_current_chat():
+        if chat_store.get_chat_meta(st.session_state.get('current_chat_id')) is not None:
+            return
+        latest = chat_store.list_chats(limit=1)
+        if not latest:
+            logger.info("Nenhum chat encontrado. Criando novo.")
+            st.session_state.current_chat_id = chat_store.create_chat()
+        else:
+            st.session_state.current_chat_id = latest[0]['id']
+        logger.info(f"Chat selecionado: {st.session_state.current_chat_id}")
 
     # Função para criar um novo chat
     def new_chat():
-        current_date = datetime.now().strftime("%d/%m/%Y")
-        chat_id = f"chat_{len(st.session_state.chats) + 1}"
-        st.session_state.chats[chat_id] = {
-            'date': current_date, 
-            'messages': [], 
-            'title': "Novo Chat",
-            'user_materials': ""
-        }
+        chat_id = chat_store.create_chat()
         st.session_state.current_chat_id = chat_id
         st.session_state.uploaded_files = []
         logger.info(f"Novo chat criado: {chat_id}")
-        save_chats()
+
+    # Função para abrir um chat (quem chama faz o rerun do app inteiro, pois o painel principal muda)
+    def select_chat(chat_id):
+        st.session_state.current_chat_id = chat_id
+        logger.info(f"Usuário mudou para o chat: {chat_id}")
 
     # Função para renomear um chat
     def rename_chat(chat_id, new_title):
-        if chat_id in st.session_state.chats:
-            st.session_state.chats[chat_id]['title'] = new_title
-            logger.info(f"Chat {chat_id} renomeado para: {new_title}")
-            save_chats()
+        chat_store.rename_chat(chat_id, new_title)
+        logger.info(f"Chat {chat_id} renomeado para: {new_title}")
 
     # Função para excluir um chat
     def delete_chat(chat_id):
-        if chat_id in st.session_state.chats:
-            del st.session_state.chats[chat_id]
-            # Se o chat atual foi excluído, mudar para outro chat
-            if st.session_state.current_chat_id == chat_id:
-                if st.session_state.chats:
-                    st.session_state.current_chat_id = next(iter(st.session_state.chats))
-                else:
-                    # Se não há mais chats, criar um novo
-                    new_chat()
-            logger.info(f"Chat {chat_id} excluído.")
-            save_chats()
-
-    # CSS básico para estilo consistente
-    css = """
-    <style>
-        .centered-title {
-            text-align: center;
-            padding: 20px 0;
-        }
-    </style>
-    """
-    st.markdown(css, unsafe_allow_html=True)
+        chat_store.delete_chat(chat_id)
+        # Se o chat atual foi excluído, mudar para outro chat
+        if st.session_state.current_chat_id == chat_id:
+            remaining = chat_store.list_chats(limit=1)
+            if remaining:
+                st.session_state.current_chat_id = remaining[0]['id']
+            else:
+                # Se não há mais chats, criar um novo
+                new_chat()
+        logger.info(f"Chat {chat_id} excluído.")
+
+    st.markdown(CSS, unsafe_allow_html=True)
 
     # Inicializar o estado da sessão
-    if 'chats' not in st.session_state:
-        st.session_state.chats = load_chats()
-    if 'current_chat_id' not in st.session_state:
-        st.session_state.current_chat_id = next(iter(st.session_state.chats))
+    ensure_current_chat()
     if 'user_interactions' not in st.session_state:
         st.session_state.user_interactions = 0
     if 'total_tokens' not in st.session_state:
         st.session_state.total_tokens = 0
     if 'total_characters' not in st.session_state:
         st.session_state.total_characters = 0
-    if 'response_cache' not in st.session_state:
-        st.session_state.response_cache = {}
     if 'chat_to_rename' not in st.session_state:
         st.session_state.chat_to_rename = None
     if 'new_chat_title' not in st.session_state:
         st.session_state.new_chat_title = ""
     if 'uploaded_files' not in st.session_state:
         st.session_state.uploaded_files = []
-    if 'fixed_materials' not in st.session_state:
-        # Carregar materiais fixos com indicador de carregamento
-        with st.spinner("Carregando materiais..."):
-            try:
-                materials_text, materials_tokens, materials_chars = load_fixed_materials()
-                st.session_state.fixed_materials = materials_text
-                logger.info(f"Materiais fixos carregados com sucesso. Total de tokens: {materials_tokens}")
-            except Exception as e:
-                st.session_state.fixed_materials = f"Erro ao carregar materiais: {e}"
-                logger.error(f"Erro ao carregar materiais fixos: {e}")
+    if 'chat_page' not in st.session_state:
+        st.session_state.chat_page = 0
+
+    # Corpus de materiais fixos compartilhado pelo processo e prefixo fixo do prompt (idêntico byte a byte
+    # enquanto a versão dos materiais não mudar). Os fragmentos chamam de novo a cada pergunta: num rerun
+    # só do fragmento, a versão da última execução completa ficaria parada no corpus parcial
+    full_materials = MATERIALS_MODE == "completo"
+
+    def load_materials():
+        try:
+            corpus = get_materials_corpus(materials_dir, token_counter, MATERIALS_MIN_READY, MATERIALS_WORKERS)
+        except Exception as e:
+            logger.error(f"Erro ao carregar materiais fixos: {e}")
+            corpus = None
+        full = full_materials and corpus is not None
+        static_prefix = get_static_prefix(agent_context, corpus.version if full else "",
+                                          corpus.documents if full else (), token_counter)
+        return corpus, static_prefix
+
+    # A sessão guarda só a versão do corpus
+    with st.spinner("Carregando materiais..."):
+        corpus, static_prefix = load_materials()
+    if corpus:
+        attach_session(st.session_state, corpus)
+
+    # Aviso dos materiais ainda em extração, atualizado sozinho; ao terminar, recarrega o app inteiro
+    # para o diagnóstico mostrar a versão completa
+    def render_materials_status():
+        current, _ = load_materials()
+        if not (current and current.pending):
+            st.rerun()
+        # Os materiais restantes entram nas próximas perguntas, assim que extraídos
+        st.caption(f"Carregando materiais em segundo plano: {current.pending} restantes")
+
+    # Cache de contexto: registra o prefixo uma vez por versão e envia só o sufixo de cada turno
+    if LLM_BACKEND == BACKEND_SIMULATED:
+        context_cache = get_context_cache(BACKEND_SIMULATED, None, token_counter)
+    elif llm:
+        context_cache = get_context_cache(BACKEND_GEMINI, llm)
+    else:
+        context_cache = None
 
     # Interface do usuário Streamlit
     col1, col2, col3 = st.columns([1,2,1])
 
     with col2:
         try:
-            logo_path = assets_dir / "LOGO SUCESSO EM VENDAS HORIZONTAL AZUL.png"
-            st.image(str(logo_path), width=300, use_container_width=True)
+            st.image(load_logo(str(LOGO_FILE)), width=300, use_container_width=True)
         except FileNotFoundError:
             st.write("Logo não encontrada. Por favor, verifique o caminho da imagem.")
 
     st.markdown("<h1 class='centered-title'>Consultor I.A. Sucesso em Vendas</h1>", unsafe_allow_html=True)
     st.write("")
 
+    # Lista de chats: busca, paginação, menu e renomear rerodam só este fragmento
+    @st.fragment
+    def render_chat_list():
+        with get_run_metrics().measure("fragmento:lista_de_chats"):
+            # Busca no conteúdo de todas as conversas (índice de texto completo)
+            with st.expander("Buscar nas conversas"):
+                message_search = st.text_input("Termos da busca", key="message_search",
+                                               placeholder="Ex.: objeção de preço")
+                if message_search:
+                    results = chat_store.search_messages(message_search, limit=10)
+                    if not results:
+                        st.caption("Nenhuma mensagem encontrada.")
+                    for result in results:
+                        if st.button(f"{result['title']} - {result['date']}", key=f"search_{result['message_id']}",
+                                     use_container_width=True):
+                            # Trocar de chat muda o painel principal: rerun do app inteiro
+                            select_chat(result['chat_id'])
+                            st.rerun()
+                        author = "Você" if result['role'] == 'user' else "Consultor I.A."
+                        st.caption(f"{author}: {result['snippet']}")
+        
+            # Modal para renomear chat
+            if st.session_state.chat_to_rename:
+                with st.form(key="rename_form"):
+                    st.text_input("Novo título:", key="new_chat_title", 
+                                  value=(chat_store.get_chat_meta(st.session_state.chat_to_rename) or {}).get('title', ""))
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.form_submit_button("Salvar"):
+                            rename_chat(st.session_state.chat_to_rename, st.session_state.new_chat_title)
+                            st.session_state.chat_to_rename = None
+                            rerun_fragment()
+                    with col2:
+                        if st.form_submit_button("Cancelar"):
+                            st.session_state.chat_to_rename = None
+                            rerun_fragment()
+        
+            # Busca por título e paginação: só a página visível é consultada e renderizada
+            def change_chat_page(delta=None):
+                # Callbacks rodam antes do script: a troca de página não exige um rerun extra
+                st.session_state.chat_page = st.session_state.chat_page + delta if delta else 0
+
+            chat_search = st.text_input("Buscar chats", key="chat_search", on_change=change_chat_page,
+                                        placeholder="Título do chat")
+            total_chats = chat_store.count_chats(chat_search)
+            total_pages = max(1, -(-total_chats // CHATS_PER_PAGE))
+            st.session_state.chat_page = min(st.session_state.chat_page, total_pages - 1)
+            page_chats = chat_store.list_chats(limit=CHATS_PER_PAGE,
+                                               offset=st.session_state.chat_page * CHATS_PER_PAGE,
+                                               search=chat_search)
+            if not page_chats:
+                st.caption("Nenhum chat encontrado.")
+
+            # Exibir lista de chats com opções
+            for chat_data in page_chats:
+                chat_id = chat_data['id']
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    if st.button(f"{chat_data['title']} - {chat_data['date']}", 
+                                 key=f"chat_btn_{chat_id}",
+                                 use_container_width=True):
+                        select_chat(chat_id)
+                        st.rerun()
+                with col2:
+                    # Menu de opções (...)
+                    if st.button("⋮", key=f"options_{chat_id}"):
+                        st.session_state.chat_options_open = chat_id if not hasattr(st.session_state, 'chat_options_open') or st.session_state.chat_options_open != chat_id else None
+                        rerun_fragment()
+            
+                # Exibir opções se o menu estiver aberto
+                if hasattr(st.session_state, 'chat_options_open') and st.session_state.chat_options_open == chat_id:
+                    option_col1, option_col2 = st.columns(2)
+                    with option_col1:
+                        if st.button("Renomear", key=f"rename_{chat_id}", use_container_width=True):
+                            st.session_state.chat_to_rename = chat_id
+                            st.session_state.chat_options_open = None
+                            rerun_fragment()
+                    with option_col2:
+                        if st.button("Excluir", key=f"delete_{chat_id}", use_container_width=True):
+                            was_current = chat_id == st.session_state.current_chat_id
+                            delete_chat(chat_id)
+                            st.session_state.chat_options_open = None
+                            # O painel principal só muda se o chat aberto foi excluído
+                            if was_current:
+                                st.rerun()
+                            else:
+                                rerun_fragment()
+        
+            if total_pages > 1:
+                prev_col, page_col, next_col = st.columns([1, 2, 1])
+                with prev_col:
+                    st.button("‹", key="chat_page_prev", on_click=change_chat_page, args=(-1,),
+                              disabled=st.session_state.chat_page == 0)
+                with page_col:
+                    st.caption(f"Página {st.session_state.chat_page + 1} de {total_pages} ({total_chats} chats)")
+                with next_col:
+                    st.button("›", key="chat_page_next", on_click=change_chat_page, args=(1,),
+                              disabled=st.session_state.chat_page >= total_pages - 1)
+
     # Barra lateral
     with st.sidebar:
         st.header("Gerenciamento de Chats")
         
-        if st.button("Novo Chat", key="btn_new_chat"):
-            new_chat()
-            st.rerun()
+        # Callback: o chat é criado antes da execução, sem um segundo rerun
+        st.button("Novo Chat", key="btn_new_chat", on_click=new_chat)
         
+        if corpus and corpus.pending:
+            st.fragment(render_materials_status, run_every=2.0)()
+
         # Upload de arquivos
         st.markdown("### Materiais para este Chat")
         uploaded_files = st.file_uploader(
@@ -470,62 +672,54 @@ def app(config=None):
         
         if uploaded_files:
             st.session_state.uploaded_files = uploaded_files
-            # Processar os arquivos carregados
-            user_materials, user_tokens, user_chars = process_uploaded_files(uploaded_files)
-            # Armazenar os materiais do usuário no chat atual
-            st.session_state.chats[st.session_state.current_chat_id]['user_materials'] = user_materials
-            st.success(f"Materiais carregados: {len(uploaded_files)} arquivos")
-            save_chats()
+            # Arquivos já conhecidos (mesmo hash) não são extraídos novamente
+            digests = [upload_processor.submit(file.getvalue(), file.name) for file in uploaded_files]
+            done, total = upload_processor.progress(digests)
+            st.session_state.uploads_pending = done < total
+            # Enquanto houver extração pendente, só este trecho é atualizado periodicamente
+            st.fragment(render_upload_status, run_every=1.0 if done < total else None)(digests)
         
         st.markdown("---")
         st.markdown("### Chats Anteriores")
-        
-        # Modal para renomear chat
-        if st.session_state.chat_to_rename:
-            with st.form(key="rename_form"):
-                st.text_input("Novo título:", key="new_chat_title", 
-                              value=st.session_state.chats[st.session_state.chat_to_rename]['title'])
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Salvar"):
-                        rename_chat(st.session_state.chat_to_rename, st.session_state.new_chat_title)
-                        st.session_state.chat_to_rename = None
-                        st.rerun()
-                with col2:
-                    if st.form_submit_button("Cancelar"):
-                        st.session_state.chat_to_rename = None
-                        st.rerun()
-        
-        # Exibir lista de chats com opções
-        for chat_id, chat_data in st.session_state.chats.items():
-            col1, col2 = st.columns([5, 1])
-            with col1:
-                if st.button(f"{chat_data['title']} - {chat_data['date']}", 
-                             key=f"chat_btn_{chat_id}",
-                             use_container_width=True):
-                    st.session_state.current_chat_id = chat_id
-                    logger.info(f"Usuário mudou para o chat: {chat_id}")
-                    st.rerun()
-            with col2:
-                # Menu de opções (...)
-                if st.button("⋮", key=f"options_{chat_id}"):
-                    st.session_state.chat_options_open = chat_id if not hasattr(st.session_state, 'chat_options_open') or st.session_state.chat_options_open != chat_id else None
-                    st.rerun()
-            
-            # Exibir opções se o menu estiver aberto
-            if hasattr(st.session_state, 'chat_options_open') and st.session_state.chat_options_open == chat_id:
-                option_col1, option_col2 = st.columns(2)
-                with option_col1:
-                    if st.button("Renomear", key=f"rename_{chat_id}", use_container_width=True):
-                        st.session_state.chat_to_rename = chat_id
-                        st.session_state.chat_options_open = None
-                        st.rerun()
-                with option_col2:
-                    if st.button("Excluir", key=f"delete_{chat_id}", use_container_width=True):
-                        delete_chat(chat_id)
-                        st.session_state.chat_options_open = None
-                        st.rerun()
-        
+
+        render_chat_list()
+
+        # Métricas do corpus compartilhado e do cache de respostas
+        with st.expander("Diagnóstico"):
+            cache_stats = response_cache.stats()
+            st.caption(f"Cache de respostas: {cache_stats['entries']} entradas · "
+                       f"{cache_stats['hits']} acertos · {cache_stats['misses']} falhas · "
+                       f"{cache_stats['evictions']} descartes ({cache_stats['hit_rate']:.0%} de acerto)")
+            if context_cache:
+                context_stats = context_cache.stats()
+                st.caption(f"Prefixo fixo {static_prefix.version} ({static_prefix.tokens} tokens) · "
+                           f"backend {context_stats['backend']}: {context_stats['registrations']} registros · "
+                           f"{context_stats['reuses']} reaproveitamentos")
+            if semantic_cache:
+                semantic_stats = semantic_cache.stats()
+                st.caption(f"Cache semântico ({semantic_stats['embedder']}, limiar {semantic_stats['threshold']}): "
+                           f"{semantic_stats['entries']} perguntas · {semantic_stats['hits']} acertos "
+                           f"({semantic_stats['hit_rate']:.0%})")
+            writer_stats = chat_store.stats()
+            st.caption(f"Gravação dos chats: {writer_stats['queue_depth']} pendentes · "
+                       f"{writer_stats['operations']} alterações em {writer_stats['flushes']} transações "
+                       f"({writer_stats['coalesced']} fundidas) · "
+                       f"{writer_stats['avg_flush_ms']:.1f} ms em média (máx. {writer_stats['max_flush_ms']:.1f})")
+            for scope, run_stats in sorted(get_run_metrics().stats().items()):
+                st.caption(f"Execução ({scope}): {run_stats['runs']} vezes · mediana {run_stats['p50_ms']:.0f} ms · "
+                           f"p95 {run_stats['p95_ms']:.0f} ms")
+            token_stats = token_counter.stats()
+            st.caption(f"Contagem de tokens ({token_stats['mode']}): {token_stats['cached']} segmentos em cache · "
+                       f"{token_stats['hits']} reaproveitados")
+            if corpus:
+                stats = corpus_stats(corpus)
+                st.caption(f"Versão dos materiais: {stats['version']}")
+                st.caption(f"Memória do corpus: {stats['resident_mb']:.1f} MB")
+                st.caption(f"Carregamentos: {stats['loads']} · Acessos: {stats['hits']} · "
+                           f"Sessões: {stats['sessions']}")
+                if 'process_peak_rss_mb' in stats:
+                    st.caption(f"Pico de memória do processo: {stats['process_peak_rss_mb']:.0f} MB")
+
         # Botão para voltar à página inicial
         st.markdown("---")
         if st.button("← Voltar para a página inicial", key="btn_voltar_consultor"):
@@ -533,128 +727,189 @@ def app(config=None):
             st.query_params["app"] = "home"
             st.rerun()
 
-    # Adicionando botões de prompt predefinidos
-    st.subheader("Prompts Rápidos")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("Vender Produto", key="btn_vender_produto"):
-            st.session_state.user_input = ("Me ajude a vender uma (...), preciso de ideias práticas e ações "
-                                           "aplicáveis para meu time vender esse produto, preciso que enfatize suas "
-                                           "qualidades reais e diferenciais e busque argumentos concisos que "
-                                           "naturalmente me ajudem com possíveis objeções.")
-    with col2:
-        if st.button("Criar Treinamento", key="btn_criar_treinamento"):
-            st.session_state.user_input = ("Me ajude a criar um treinamento de (...) com ferramentas e uma lógica de "
-                                           "apresentação. Destrinche os tópicos com conteúdos mais práticos e aplicáveis.")
-    with col3:
-        if st.button("Estratégia de Marketing", key="btn_estrategia_marketing"):
-            st.session_state.user_input = ("Preciso de uma estratégia de marketing para aumentar a visibilidade e "
-                                           "engajamento do nosso produto. Inclua ideias inovadoras que possam ser "
-                                           "implementadas rapidamente e que aproveitem as tendências atuais do mercado.")
-
-    # Inicializar o estado da sessão para a entrada do usuário
-    if 'user_input' not in st.session_state:
-        st.session_state['user_input'] = ''
-
-    # Modificação na parte do formulário de entrada
-    st.write("")
-    with st.form(key='input_form', clear_on_submit=True):
-        user_input = st.text_input(label='Digite sua mensagem', key='user_input')
-        submit_button = st.form_submit_button(label="Enviar")
-
-    # Preparar o contexto completo para este chat
-    current_chat = st.session_state.chats[st.session_state.current_chat_id]
-    fixed_materials = st.session_state.fixed_materials
-    user_materials = current_chat.get('user_materials', '')
-    
-    # Combinar contexto do agente com materiais fixos e do usuário
-    context = f"{agent_context}\n\n"
-    
-    # Adicionar materiais fixos se existirem
-    if fixed_materials:
-        context += f"MATERIAIS DE REFERÊNCIA FIXOS:\n{fixed_materials}\n\n"
-    
-    # Adicionar materiais do usuário se existirem
-    if user_materials:
-        context += f"MATERIAIS ADICIONADOS PELO USUÁRIO:\n{user_materials}\n\n"
-    
-    # Adicionar histórico de conversas para contexto
-    if current_chat['messages']:
-        context += "HISTÓRICO DE CONVERSAS:\n"
-        for role, message in current_chat['messages'][-5:]:  # Limitar a 5 mensagens para não sobrecarregar
-            context += f"{'Usuário' if role == 'user' else 'Assistente'}: {message}\n"
-        context += "\n"
-
-    if submit_button and user_input:
-        st.session_state.user_interactions += 1
-        logger.info(f"Total de interações do usuário: {st.session_state.user_interactions}")
-        
-        # Adicionar mensagem do usuário ao histórico
-        current_chat['messages'].append(('user', user_input))
+    def build_context(question, corpus, chat=None):
+        # O contexto é montado em segmentos para que a contagem de tokens de cada um fique em cache
+        # Sem chat (consulta em lote), só os trechos dos materiais fixos entram no contexto
+        # Texto dos materiais enviados, carregado só quando um prompt precisa dele
+        user_materials = chat_store.get_user_materials(chat['id']) if chat and chat['materials'] else ""
+        # Mensagens antigas chegam pelo resumo; só as ainda não resumidas entram na íntegra
+        summary = chat.get('summary', '') if chat else ""
+        recent_messages = chat_store.get_messages_after(chat['id'], chat.get('summary_upto', 0)) if chat else []
+
+        # Trechos dos materiais fixos relevantes para a pergunta, em ordem de relevância
+        # (no modo "completo" todo o corpus já está no prefixo fixo)
+        chunks = corpus.index.search(
+            question, top_k=MATERIALS_TOP_K, token_budget=MATERIALS_TOKEN_BUDGET
+        ) if corpus and not full_materials else []
+        if chunks:
+            logger.info(f"Trechos recuperados dos materiais: {len(chunks)} "
+                        f"({sum(c.tokens for c in chunks)} tokens)")
+
+        # Partes do sufixo na ordem em que aparecem no prompt; a prioridade define o que é reduzido primeiro
+        parts = [
+            ContextPart("materiais_referencia", 4, [f"{format_chunks([chunk])}\n\n" for chunk in chunks],
+                        strategy=DROP_LAST, header="MATERIAIS DE REFERÊNCIA FIXOS:\n"),
+            ContextPart("materiais_usuario", 3, [f"{user_materials}\n\n"] if user_materials else [],
+                        strategy=TRUNCATE, header="MATERIAIS ADICIONADOS PELO USUÁRIO:\n"),
+            ContextPart("resumo", 2, [f"{summary}\n\n"] if summary else [],
+                        strategy=TRUNCATE, header="RESUMO DA CONVERSA ATÉ AQUI:\n"),
+            ContextPart("historico", 1,
+                        [f"{format_messages([message])}\n" for message in recent_messages],
+                        strategy=DROP_OLDEST, header="HISTÓRICO DE CONVERSAS:\n", footer="\n"),
+        ]
+
+        # O prefixo fixo fica fora do orçamento; reserva espaço para a própria pergunta
+        budget = ContextBudget(token_counter, CONTEXT_TOKEN_BUDGET - token_counter.count(question))
+        segments, report = budget.assemble(parts)
+        logger.info(f"Contexto montado com {report.used_tokens}/{report.max_tokens} tokens")
+        if report.dropped:
+            logger.info(f"Partes reduzidas para caber no orçamento: {report.dropped}")
+        return segments, report
+
+    @st.fragment
+    def render_batch():
+        with get_run_metrics().measure("fragmento:lote"):
+            # Consulta em lote: planilha de perguntas respondidas com o mesmo contexto do chat, sem histórico
+            with st.expander("Consulta em lote (CSV/XLSX)"):
+                batch_file = st.file_uploader("Planilha com uma pergunta por linha (coluna \"pergunta\" ou a primeira)",
+                                              type=['csv', 'xlsx'], key="batch_file")
+                batch_workers = st.number_input("Perguntas simultâneas", min_value=1, max_value=32,
+                                                value=BATCH_WORKERS, key="batch_workers")
+                if st.button("Responder planilha", key="btn_batch", disabled=batch_file is None):
+                    try:
+                        questions = read_questions(batch_file.getvalue(), batch_file.name)
+                    except Exception as e:
+                        logger.error(f"Erro ao ler a planilha do lote: {e}")
+                        st.error(f"Não foi possível ler a planilha: {e}")
+                        questions = []
+                    if questions:
+                        progress = st.progress(0.0, text=f"0/{len(questions)} perguntas respondidas")
+
+                        # Corpus e prefixo resolvidos uma vez para o lote, fora das threads
+                        corpus, static_prefix = load_materials()
+
+                        def answer_question(question):
+                            segments, _ = build_context(question, corpus)
+                            return "".join(generate_response(question, segments, corpus, static_prefix,
+                                                             raise_errors=True))
+
+                        results = run_batch(
+                            questions, answer_question, max_workers=int(batch_workers),
+                            rate_per_minute=BATCH_RATE_PER_MINUTE,
+                            on_progress=lambda done, total: progress.progress(
+                                done / total, text=f"{done}/{total} perguntas respondidas"),
+                        )
+                        st.session_state.batch_results = results_to_file(results)
+                        logger.info(f"Consulta em lote concluída: {len(results)} perguntas")
+                    elif batch_file is not None:
+                        st.warning("Nenhuma pergunta encontrada na planilha.")
+                if st.session_state.get('batch_results'):
+                    data, extension, mime = st.session_state.batch_results
+                    st.download_button("Baixar respostas", data, file_name=f"respostas_consultor.{extension}",
+                                       mime=mime, key="btn_batch_download")
+
+    # Painel do chat: enviar uma mensagem reroda só este fragmento
+    @st.fragment
+    def render_chat_pane():
+        with get_run_metrics().measure("fragmento:chat"):
+            # Adicionando botões de prompt predefinidos
+            st.subheader("Prompts Rápidos")
+            for column, (label, key, template) in zip(st.columns(len(QUICK_PROMPTS)), QUICK_PROMPTS):
+                with column:
+                    if st.button(label, key=key):
+                        st.session_state.user_input = template
+
+            # Inicializar o estado da sessão para a entrada do usuário
+            if 'user_input' not in st.session_state:
+                st.session_state['user_input'] = ''
+
+            # Modificação na parte do formulário de entrada
+            st.write("")
+            with st.form(key='input_form', clear_on_submit=True):
+                user_input = st.text_input(label='Digite sua mensagem', key='user_input')
+                submit_button = st.form_submit_button(label="Enviar")
+
+            # Preparar o contexto para este chat
+            current_chat = chat_store.get_chat(st.session_state.current_chat_id)
+            if submit_button and user_input:
+                st.session_state.user_interactions += 1
+                logger.info(f"Total de interações do usuário: {st.session_state.user_interactions}")
         
-        # Atualizar o título do chat com base na nova entrada
-        if current_chat['title'] == "Novo Chat":
-            current_chat['title'] = extract_title(user_input)
+                # Montar o contexto antes de registrar a pergunta no histórico, com o corpus atual
+                # (pode ter crescido desde a última execução completa)
+                corpus, static_prefix = load_materials()
+                context_segments, budget_report = build_context(user_input, corpus, current_chat)
+
+                # Adicionar mensagem do usuário ao histórico
+                save_message(current_chat['id'], 'user', user_input)
         
-        # Salvar chats após cada mensagem
-        save_chats()
+                # Atualizar o título do chat com base na nova entrada
+                if current_chat['title'] == "Novo Chat":
+                    rename_chat(current_chat['id'], extract_title(user_input))
         
-        # Gerar resposta
-        with st.spinner("Gerando resposta..."):
-            response = generate_response(user_input, context)
+                # Gerar resposta
+                with st.spinner("Gerando resposta..."):
+                    # Exibir a resposta conforme os trechos chegam do modelo
+                    typing_container = st.empty()
+                    response, first_token_time, total_time = display_streamed_response(
+                        generate_response(user_input, context_segments, corpus, static_prefix, current_chat),
+                        typing_container
+                    )
             
-            # Exibir resposta gradualmente
-            typing_container = st.empty()
-            display_typing_response(response, typing_container)
-            
-            # Após exibir, remover a resposta da visualização direta
-            typing_container.empty()
-        
-        # Adicionar resposta ao histórico
-        current_chat['messages'].append(('agent', response))
+                    # Após exibir, remover a resposta da visualização direta
+                    typing_container.empty()
+
+                # Registrar o que foi descartado neste turno junto com a latência, para ajustar os orçamentos
+                log_budget_report(budget_report, log_dir / "consultor_orcamento.jsonl",
+                                  chat_id=current_chat['id'],
+                                  first_token_seconds=round(first_token_time, 3),
+                                  total_seconds=round(total_time, 3))
         
-        # Salvar chats após a resposta
-        save_chats()
+                # Adicionar resposta ao histórico
+                save_message(current_chat['id'], 'agent', response)
+                if llm:
+                    chat_summarizer.schedule(current_chat['id'], llm)
         
-        # Atualizar o contador de tokens e caracteres total
-        interaction_tokens = num_tokens_from_string(user_input) + num_tokens_from_string(response)
-        interaction_chars = count_characters(user_input) + count_characters(response)
-        st.session_state.total_tokens += interaction_tokens
-        st.session_state.total_characters += interaction_chars
-        logger.info(f"Tokens nesta interação: {interaction_tokens}")
-        logger.info(f"Caracteres nesta interação: {interaction_chars}")
-        logger.info(f"Total de tokens acumulados: {st.session_state.total_tokens}")
-        logger.info(f"Total de caracteres acumulados: {st.session_state.total_characters}")
-
-        # Log de informação sobre o uso do cache
-        cache_key = hashlib.md5((user_input + context[:100]).encode()).hexdigest()
-        if cache_key in st.session_state.response_cache:
-            logger.info("Esta resposta foi recuperada do cache.")
-            
-        # Recarregar a página para atualizar o histórico
-        st.rerun()
+                # Atualizar o contador de tokens e caracteres total
+                interaction_tokens = token_counter.count(user_input) + token_counter.count(response)
+                interaction_chars = count_characters(user_input) + count_characters(response)
+                st.session_state.total_tokens += interaction_tokens
+                st.session_state.total_characters += interaction_chars
+                logger.info(f"Tokens nesta interação: {interaction_tokens}")
+                logger.info(f"Caracteres nesta interação: {interaction_chars}")
+                logger.info(f"Total de tokens acumulados: {st.session_state.total_tokens}")
+                logger.info(f"Total de caracteres acumulados: {st.session_state.total_characters}")
+
+                # Recarregar o painel para atualizar o histórico; o app inteiro só quando o título
+                # mudou, para a barra lateral mostrar o novo nome
+                if current_chat['title'] == "Novo Chat":
+                    st.rerun()
+                else:
+                    rerun_fragment()
 
-        # Exibir histórico do chat atual
-    if current_chat['messages']:
-        st.subheader("Histórico da Conversa")
+            # Exibir histórico do chat atual
+            if current_chat['messages']:
+                st.subheader("Histórico da Conversa")
         
-        # Container para o histórico
-        with st.container():
-            for role, message in current_chat['messages']:
-                if role == 'user':
-                    st.info(f"**Você:** {message}")
-                else:
-                    st.success(f"**Consultor I.A.:** {message}")
-    else:
-        # Exibir mensagem de boas-vindas quando não há histórico
-        st.info("""
-        👋 **Bem-vindo ao Consultor I.A. da Sucesso em Vendas!**
+                # Container para o histórico
+                with st.container():
+                    for role, message in current_chat['messages']:
+                        if role == 'user':
+                            st.info(f"**Você:** {message}")
+                        else:
+                            st.success(f"**Consultor I.A.:** {message}")
+            else:
+                # Exibir mensagem de boas-vindas quando não há histórico
+                st.info("""
+                👋 **Bem-vindo ao Consultor I.A. da Sucesso em Vendas!**
         
-        Estou aqui para ajudar com suas dúvidas sobre vendas, treinamentos, estratégias de marketing e muito mais.
+                Estou aqui para ajudar com suas dúvidas sobre vendas, treinamentos, estratégias de marketing e muito mais.
         
-        Use os botões de prompts rápidos acima ou digite sua própria pergunta para começar.
-        """)
+                Use os botões de prompts rápidos acima ou digite sua própria pergunta para começar.
+                """)
+
+    render_batch()
+    render_chat_pane()
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -4,16 +4,9 @@ import json
 import requests
 from bs4 import BeautifulSoup
 import re
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import markdown
 from io import BytesIO
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
 from datetime import datetime
 import logging
@@ -30,6 +23,8 @@ from pathlib import Path
 # Adiciona o diretório raiz ao path para importar módulos corretamente
 sys.path.append(str(Path(__file__).parent.parent))
 
+from utils.site_scraping import page_text, scrape_site, site_text
+
 def app(config=None):
     # Verifica se a página já foi configurada pelo app principal
     if not config or not config.get("already_configured"):
@@ -112,85 +107,6 @@ def app(config=None):
     def obter_dominio(url):
         return urlparse(url).netloc
 
-    def url_valida(url):
-        analisada = urlparse(url)
-        return bool(analisada.netloc) and bool(analisada.scheme)
-
-    def obter_links_site(url):
-        dominio = obter_dominio(url)
-        urls = set()
-        try:
-            resposta = requests.get(url, timeout=10)
-            resposta.raise_for_status()
-            sopa = BeautifulSoup(resposta.content, "html.parser")
-            for tag_a in sopa.find_all("a", href=True):
-                href = tag_a['href']
-                href_completo = urljoin(url, href)
-                if url_valida(href_completo) and obter_dominio(href_completo) == dominio:
-                    urls.add(href_completo)
-            
-            if not urls:
-                urls = obter_links_com_selenium(url)
-        except Exception as e:
-            logger.error(f"Erro ao obter links de {url}: {e}")
-            urls = obter_links_com_selenium(url)
-        return urls
-
-    def obter_links_com_selenium(url):
-        urls = set()
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-
-        try:
-            service = Service(ChromeDriverManager().install())
-            with webdriver.Chrome(service=service, options=options) as driver:
-                driver.get(url)
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "a"))
-                )
-                links = driver.find_elements(By.TAG_NAME, "a")
-                dominio = obter_dominio(url)
-                for link in links:
-                    href = link.get_attribute('href')
-                    if href and url_valida(href) and obter_dominio(href) == dominio:
-                        urls.add(href)
-        except Exception as e:
-            logger.error(f"Erro ao obter links com Selenium: {url} - {e}")
-        return urls
-
-    def raspar_com_selenium(url):
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920x1080')
-
-        try:
-            logger.debug(f"Iniciando raspagem com Selenium para: {url}")
-            service = Service(ChromeDriverManager().install())
-            with webdriver.Chrome(service=service, options=options) as driver:
-                logger.debug("WebDriver Chrome iniciado com sucesso")
-                driver.get(url)
-                logger.debug(f"Página carregada: {driver.current_url}")
-                
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                logger.debug("Elemento body encontrado na página")
-                
-                time.sleep(5)
-                
-                body = driver.find_element(By.TAG_NAME, "body")
-                texto = body.text
-                logger.debug(f"Texto extraído com sucesso. Tamanho: {len(texto)} caracteres")
-                return texto
-        except Exception as e:
-            logger.error(f"Erro ao raspar com Selenium: {url} - {str(e)}", exc_info=True)
-            return ""
-
     def extrair_contatos(sopa):
         contatos = {
             'telefones': set(),
@@ -224,9 +140,6 @@ def app(config=None):
         return redes_sociais
 
     def raspar_site(url, max_paginas=30):
-        visitadas = set()
-        para_visitar = {url}
-        todo_texto = ""
         estrutura_site = {}
         palavras_chave = set()
         links_externos = set()
@@ -238,77 +151,65 @@ def app(config=None):
         parceiros = set()
         noticias = []
 
-        while para_visitar and len(visitadas) < max_paginas:
-            url_atual = para_visitar.pop()
-            if url_atual not in visitadas:
-                try:
-                    logger.info(f"Raspando: {url_atual}")
-                    resposta = requests.get(url_atual, timeout=10)
-                    resposta.raise_for_status()
-                    sopa = BeautifulSoup(resposta.content, 'html.parser')
-                    
-                    texto = sopa.get_text(separator=' ', strip=True)
-                    if len(texto.split()) < 100:
-                        texto = raspar_com_selenium(url_atual)
-                    
-                    texto = re.sub(r'\s+', ' ', texto)
-                    todo_texto += texto + "\n\n"
-
-                    estrutura_site[url_atual] = [h.text for h in sopa.find_all(['h1', 'h2', 'h3'])]
-
-                    meta_keywords = sopa.find('meta', attrs={'name': 'keywords'})
-                    if meta_keywords:
-                        palavras_chave.update(meta_keywords['content'].split(','))
-
-                    for link in sopa.find_all('a', href=True):
-                        href = link['href']
-                        if href.startswith('http') and obter_dominio(href) != obter_dominio(url):
-                            links_externos.add(href)
-
-                    if 'WordPress' in texto:
-                        tecnologias_usadas.add('WordPress')
-                    if 'Shopify' in texto:
-                        tecnologias_usadas.add('Shopify')
-                    if 'woocommerce' in str(sopa).lower():
-                        tecnologias_usadas.add('WooCommerce')
-                    if 'magento' in str(sopa).lower():
-                        tecnologias_usadas.add('Magento')
-
-                    novos_contatos = extrair_contatos(sopa)
-                    for key in contatos:
-                        contatos[key].update(novos_contatos[key])
-
-                    redes_sociais.update(extrair_redes_sociais(sopa))
-
-                    produtos = sopa.find_all('div', class_=re.compile('produto|servico'))
-                    for produto in produtos:
-                        produtos_servicos.add(produto.text.strip())
-
-                    equipe_elementos = sopa.find_all('div', class_=re.compile('equipe|time|colaborador'))
-                    for membro in equipe_elementos:
-                        equipe.add(membro.text.strip())
-
-                    parceiros_elementos = sopa.find_all('div', class_=re.compile('parceiro|cliente'))
-                    for parceiro in parceiros_elementos:
-                        parceiros.add(parceiro.text.strip())
-
-                    noticias_elementos = sopa.find_all('article') or sopa.find_all('div', class_=re.compile('noticia|post'))
-                    for noticia in noticias_elementos[:5]:
-                        titulo = noticia.find('h2') or noticia.find('h3')
-                        if titulo:
-                            noticias.append(titulo.text.strip())
-
-                    visitadas.add(url_atual)
-                    novos_links = obter_links_site(url_atual)
-                    para_visitar.update(novos_links - visitadas)
-                    
-                    logger.info(f"Total de texto coletado: {len(todo_texto)} caracteres")
-                except Exception as e:
-                    logger.error(f"Erro ao raspar {url_atual}: {e}")
-                    texto = raspar_com_selenium(url_atual)
-                    if texto:
-                        todo_texto += texto + "\n\n"
-                        visitadas.add(url_atual)
+        resultado = scrape_site(url, max_paginas)
+        visitadas = [pagina.url for pagina in resultado.pages]
+        todo_texto = site_text(resultado)
+
+        for pagina in resultado.pages:
+            url_atual = pagina.url
+            try:
+                texto = page_text(pagina)
+
+                sopa = pagina.soup
+                if sopa is None:
+                    # Página obtida só pelo navegador: não há HTML original para analisar
+                    continue
+
+                estrutura_site[url_atual] = [h.text for h in sopa.find_all(['h1', 'h2', 'h3'])]
+
+                meta_keywords = sopa.find('meta', attrs={'name': 'keywords'})
+                if meta_keywords:
+                    palavras_chave.update(meta_keywords['content'].split(','))
+
+                for link in sopa.find_all('a', href=True):
+                    href = link['href']
+                    if href.startswith('http') and obter_dominio(href) != obter_dominio(url):
+                        links_externos.add(href)
+
+                if 'WordPress' in texto:
+                    tecnologias_usadas.add('WordPress')
+                if 'Shopify' in texto:
+                    tecnologias_usadas.add('Shopify')
+                if 'woocommerce' in str(sopa).lower():
+                    tecnologias_usadas.add('WooCommerce')
+                if 'magento' in str(sopa).lower():
+                    tecnologias_usadas.add('Magento')
+
+                novos_contatos = extrair_contatos(sopa)
+                for key in contatos:
+                    contatos[key].update(novos_contatos[key])
+
+                redes_sociais.update(extrair_redes_sociais(sopa))
+
+                produtos = sopa.find_all('div', class_=re.compile('produto|servico'))
+                for produto in produtos:
+                    produtos_servicos.add(produto.text.strip())
+
+                equipe_elementos = sopa.find_all('div', class_=re.compile('equipe|time|colaborador'))
+                for membro in equipe_elementos:
+                    equipe.add(membro.text.strip())
+
+                parceiros_elementos = sopa.find_all('div', class_=re.compile('parceiro|cliente'))
+                for parceiro in parceiros_elementos:
+                    parceiros.add(parceiro.text.strip())
+
+                noticias_elementos = sopa.find_all('article') or sopa.find_all('div', class_=re.compile('noticia|post'))
+                for noticia in noticias_elementos[:5]:
+                    titulo = noticia.find('h2') or noticia.find('h3')
+                    if titulo:
+                        noticias.append(titulo.text.strip())
+            except Exception as e:
+                logger.error(f"Erro ao analisar {url_atual}: {e}")
 
         logger.info(f"Total de páginas visitadas: {len(visitadas)}")
         logger.info(f"Tamanho final do texto coletado: {len(todo_texto)} caracteres")
@@ -324,7 +225,15 @@ def app(config=None):
             'produtos_servicos': list(produtos_servicos),
             'equipe': list(equipe),
             'parceiros': list(parceiros),
-            'noticias': noticias
+            'noticias': noticias,
+            # Como o site foi coletado: páginas, renderização e a classificação (estático/SPA) com as evidências
+            'coleta': {
+                'paginas': len(visitadas),
+                'paginas_renderizadas': resultado.stats['rendered'],
+                'segundos': resultado.stats['seconds'],
+                'paginas_do_cache': resultado.stats['cache_hits'] + resultado.stats['cache_revalidated'],
+                'classificacao_site': resultado.stats['classification'],
+            }
         }
 
     def gerar_dossie(dados_site, nome_empresa, url):
@@ -441,7 +350,7 @@ def app(config=None):
 
         return dossie_conteudo
 
-    def salvar_dossie_docx(conteudo, nome_arquivo):
+    def salvar_dossie_docx(conteudo, nome_arquivo, metadados=None):
         # Criar a pasta 'dossies' se ela não existir
         pasta_dossies = Path(__file__).parent.parent / 'dossies'
         pasta_dossies.mkdir(exist_ok=True)
@@ -456,6 +365,9 @@ def app(config=None):
         style_normal.font.name = 'Calibri'
         style_normal.font.size = Pt(11)
 
+        if metadados:
+            doc.core_properties.comments = json.dumps(metadados, ensure_ascii=False)
+
         html = markdown.markdown(conteudo)
         soup = BeautifulSoup(html, 'html.parser')
 
@@ -531,10 +443,13 @@ def app(config=None):
                     # Exibir o conteúdo do dossiê na tela
                     st.markdown("## Dossiê Gerado")
                     st.markdown(dossie_conteudo)
+
+                    with st.expander("Detalhes da coleta do site"):
+                        st.json(dados_site['coleta'])
                     
                     # Salvar o dossiê como DOCX
                     nome_arquivo = f"Dossie_{nome_empresa.replace(' ', '_')}.docx"
-                    caminho_dossie = salvar_dossie_docx(dossie_conteudo, nome_arquivo)
+                    caminho_dossie = salvar_dossie_docx(dossie_conteudo, nome_arquivo, dados_site['coleta'])
                     
                     # Botão para download do DOCX
                     with open(caminho_dossie, "rb") as file:
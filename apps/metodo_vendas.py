@@ -14,12 +14,9 @@ from docx.shared import Inches
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
-import requests
 from tenacity import retry, wait_fixed, retry_if_exception_type
 from google.api_core.exceptions import DeadlineExceeded
 from bs4 import BeautifulSoup
-import re
-from urllib.parse import urljoin, urlparse
 import textwrap
 import markdown
 import tempfile
@@ -28,13 +25,6 @@ from PIL import Image
 import markdown2
 from docx.shared import Pt
 from docx.enum.style import WD_STYLE_TYPE
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
 from datetime import datetime
 import smtplib
@@ -53,6 +43,8 @@ from pathlib import Path
 # Adiciona o diretório raiz ao path para importar módulos corretamente
 sys.path.append(str(Path(__file__).parent.parent))
 
+from utils.site_scraping import scrape_site, site_text
+
 def app(config=None):
     # Verifica se a página já foi configurada pelo app principal
     if not config or not config.get("already_configured"):
@@ -118,117 +110,8 @@ def app(config=None):
                 raise  # This will trigger the retry mechanism
 
     # Funções para web scraping e geração de dossiê
-    def obter_dominio(url):
-        return urlparse(url).netloc
-
-    def url_valida(url):
-        analisada = urlparse(url)
-        return bool(analisada.netloc) and bool(analisada.scheme)
-
-    def obter_links_site(url):
-        dominio = obter_dominio(url)
-        urls = set()
-        try:
-            resposta = requests.get(url, timeout=10)
-            resposta.raise_for_status()
-            sopa = BeautifulSoup(resposta.content, "html.parser")
-            for tag_a in sopa.find_all("a", href=True):
-                href = tag_a['href']
-                href_completo = urljoin(url, href)
-                if url_valida(href_completo) and obter_dominio(href_completo) == dominio:
-                    urls.add(href_completo)
-            
-            if not urls:  # Se não encontrar links, tente com Selenium
-                urls = obter_links_com_selenium(url)
-        except Exception as e:
-            logger.error(f"Erro ao obter links de {url}: {e}")
-            urls = obter_links_com_selenium(url)
-        return urls
-
-    def obter_links_com_selenium(url):
-        urls = set()
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-
-        try:
-            service = Service(ChromeDriverManager().install())
-            with webdriver.Chrome(service=service, options=options) as driver:
-                driver.get(url)
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "a"))
-                )
-                links = driver.find_elements(By.TAG_NAME, "a")
-                dominio = obter_dominio(url)
-                for link in links:
-                    href = link.get_attribute('href')
-                    if href and url_valida(href) and obter_dominio(href) == dominio:
-                        urls.add(href)
-        except Exception as e:
-            logger.error(f"Erro ao obter links com Selenium: {url} - {e}")
-        return urls
-
     def raspar_site(url, max_paginas=10):
-        visitadas = set()
-        para_visitar = {url}
-        todo_texto = ""
-
-        while para_visitar and len(visitadas) < max_paginas:
-            url_atual = para_visitar.pop()
-            if url_atual not in visitadas:
-                try:
-                    # Tentativa com BeautifulSoup
-                    resposta = requests.get(url_atual, timeout=10)
-                    resposta.raise_for_status()
-                    sopa = BeautifulSoup(resposta.content, 'html.parser')
-                    
-                    texto = sopa.get_text(separator=' ', strip=True)
-                    if len(texto.split()) < 100:  # Se o texto extraído for muito curto, tente com Selenium
-                        texto = raspar_com_selenium(url_atual)
-                    
-                    texto = re.sub(r'\s+', ' ', texto)
-                    todo_texto += texto + "\n\n"
-
-                    visitadas.add(url_atual)
-                    
-                    novos_links = obter_links_site(url_atual)
-                    para_visitar.update(novos_links - visitadas)
-                except Exception as e:
-                    logger.error(f"Erro ao raspar {url_atual}: {e}")
-                    # Se falhar com BeautifulSoup, tente com Selenium
-                    texto = raspar_com_selenium(url_atual)
-                    if texto:
-                        todo_texto += texto + "\n\n"
-                        visitadas.add(url_atual)
-
-        return todo_texto
-
-    def raspar_com_selenium(url):
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-
-        try:
-            service = Service(ChromeDriverManager().install())
-            with webdriver.Chrome(service=service, options=options) as driver:
-                driver.get(url)
-                
-                # Esperar pelo carregamento do conteúdo
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                
-                # Dar um tempo extra para carregamento de conteúdo dinâmico
-                time.sleep(5)
-                
-                # Extrair o conteúdo
-                body = driver.find_element(By.TAG_NAME, "body")
-                return body.text
-        except Exception as e:
-            logger.error(f"Erro ao raspar com Selenium: {url} - {e}")
-            return ""
+        return site_text(scrape_site(url, max_paginas))
 
     def gerar_pdf_dossie(conteudo):
         buffer = BytesIO()
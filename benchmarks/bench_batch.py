@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da consulta em lote do Consultor I.A. com o backend simulado (com espera real).
+
+Responde a mesma planilha de perguntas com diferentes níveis de concorrência e mede a
+vazão em perguntas por minuto. A vazão cresce com a concorrência até esbarrar no limite
+de chamadas por minuto do provedor (`--limite`), a partir do qual fica estável.
+
+O contexto de cada pergunta é o mesmo do chat sem histórico: trechos BM25 dos materiais
+fixos no sufixo e o prefixo fixo registrado uma vez no cache de contexto. Os caches de
+respostas ficam de fora para que toda pergunta chegue ao "modelo".
+
+Uso:
+    python benchmarks/bench_batch.py
+    python benchmarks/bench_batch.py --perguntas 40 --limite 120 --concorrencia 1 2 4 8 16
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.batch_consult import run_batch
+from utils.context_cache import ContextCache, SimulatedPrefixCacheBackend, build_static_prefix
+from utils.materials_corpus import MaterialsLoader
+from utils.retrieval import format_chunks
+from utils.tokens import TokenCounter
+
+MATERIALS_DIR = Path(__file__).parent.parent / "materiais"
+
+AGENT_CONTEXT = (
+    "Você é um agente inteligente e consultor comercial da empresa Sucesso em Vendas. "
+    "Seu papel é fornecer assistência especializada utilizando o método de vendas da Sucesso em Vendas."
+)
+
+PERGUNTAS = [
+    "Como contornar a objeção de preço do cliente?",
+    "Quais são as etapas do método de vendas?",
+    "Como motivar a equipe de vendas depois de um mês ruim?",
+    "Como o líder deve conduzir uma mudança no processo comercial?",
+    "Dicas para abordagem inicial de um cliente em loja de eletromóveis",
+    "Como fazer o pós-venda e fidelizar clientes?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perguntas", type=int, default=24)
+    parser.add_argument("--limite", type=int, default=240, help="chamadas por minuto permitidas pelo provedor")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    contador = TokenCounter()
+    loader = MaterialsLoader(MATERIALS_DIR, contador, workers=1)
+    loader.wait(len(loader.filenames))
+    corpus = loader.snapshot()
+    prefixo = build_static_prefix(AGENT_CONTEXT, (), contador)
+    perguntas = [f"{PERGUNTAS[i % len(PERGUNTAS)]} (#{i})" for i in range(args.perguntas)]
+
+    print(f"{args.perguntas} perguntas · limite do provedor {args.limite}/min\n")
+    print(f"{'concorrência':>12} {'tempo':>8} {'perguntas/min':>14} {'latência média':>15}")
+    for workers in args.concorrencia:
+        cache = ContextCache(SimulatedPrefixCacheBackend(contador, sleep=True))
+
+        def responder(pergunta):
+            sufixo = ("MATERIAIS DE REFERÊNCIA FIXOS:\n" + format_chunks(corpus.index.search(pergunta))
+                      + f"\n\nUsuário: {pergunta}\nChatbot:")
+            return "".join(cache.stream(prefixo, sufixo))
+
+        inicio = time.perf_counter()
+        resultados = run_batch(perguntas, responder, max_workers=workers, rate_per_minute=args.limite)
+        tempo = time.perf_counter() - inicio
+        assert all(r['resposta'] and not r['erro'] for r in resultados)
+        latencia = sum(r['segundos'] for r in resultados) / len(resultados)
+        print(f"{workers:>12} {tempo:>7.1f}s {len(perguntas) / tempo * 60:>14.0f} {latencia:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
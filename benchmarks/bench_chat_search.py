@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca nas conversas do Consultor I.A. (SQLite FTS5) sobre um histórico
+sintético de 100 mil mensagens, gravado em um banco temporário.
+
+Mede o tempo de indexação (incremental, pelos gatilhos de inserção) e a latência
+das buscas com ranking e trecho destacado; a meta é ficar abaixo de 50 ms.
+
+Uso:
+    python benchmarks/bench_chat_search.py
+    python benchmarks/bench_chat_search.py --mensagens 20000 --chats 500
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.chat_store import ChatStore
+
+VOCABULARIO = (
+    "cliente venda vendedor objeção preço desconto proposta negociação fechamento follow-up "
+    "pós-venda fidelização equipe meta resultado motivação líder gestão treinamento abordagem "
+    "prospecção indicação visita loja produto catálogo margem comissão estratégia campanha "
+    "mercado concorrência valor benefício garantia prazo entrega pagamento parcelamento "
+    "relacionamento confiança escuta pergunta necessidade solução apresentação demonstração"
+).split()
+
+BUSCAS = [
+    "objeção de preço",
+    "objeções",
+    "fechamento da venda",
+    "motivação da equipe",
+    "pós-venda fidelização",
+    "desconto parcelamento",
+    "líder gestão resultado",
+    "abordagem inicial na loja",
+    "concorrência",
+    "garantia prazo entrega",
+]
+
+
+def gerar_vocabulario_geral(rng, tamanho=20_000):
+    """Palavras artificiais que fazem o papel do texto comum das conversas"""
+    silabas = ["ba", "ca", "da", "fe", "ge", "li", "mo", "nu", "pa", "ra", "se", "ti", "vo", "xa", "zu", "lho", "nha"]
+    return ["".join(rng.choice(silabas) for _ in range(rng.randint(2, 4))) for _ in range(tamanho)]
+
+
+def gerar_mensagem(rng, geral):
+    # ~15% das palavras são termos de vendas; o restante é vocabulário comum
+    return " ".join(rng.choice(VOCABULARIO) if rng.random() < 0.15 else rng.choice(geral)
+                    for _ in range(rng.randint(15, 120)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mensagens", type=int, default=100_000)
+    parser.add_argument("--chats", type=int, default=2_000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    geral = gerar_vocabulario_geral(rng)
+    with tempfile.TemporaryDirectory() as pasta:
+        store = ChatStore(Path(pasta) / "bench_chats.db")
+        chat_ids = [store.create_chat(title=f"Chat {i}") for i in range(args.chats)]
+
+        inicio = time.perf_counter()
+        conn = store._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO messages (chat_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                ((rng.choice(chat_ids), "user" if i % 2 == 0 else "agent", gerar_mensagem(rng, geral), time.time())
+                 for i in range(args.mensagens)),
+            )
+        indexacao = time.perf_counter() - inicio
+        print(f"{args.mensagens} mensagens em {args.chats} chats gravadas e indexadas em {indexacao:.1f}s "
+              f"(FTS5: {'sim' if store.fts_enabled else 'não'})")
+
+        # Inserção incremental de uma mensagem com o índice já grande
+        inicio = time.perf_counter()
+        store.append_message(chat_ids[0], "user", "Como contornar a objeção de preço do cliente?")
+        print(f"Inserção de uma mensagem com atualização do índice: {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+        print(f"\n{'busca':<28} {'resultados':>10} {'mediana':>9} {'p95':>9}")
+        todas = []
+        for busca in BUSCAS:
+            tempos = []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                resultados = store.search_messages(busca, limit=20)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            todas.extend(tempos)
+            p95 = statistics.quantiles(tempos, n=20)[-1]
+            print(f"{busca:<28} {len(resultados):>10} {statistics.median(tempos):>7.2f}ms {p95:>7.2f}ms")
+
+        p95_geral = statistics.quantiles(todas, n=20)[-1]
+        print(f"\nGeral: mediana {statistics.median(todas):.2f} ms · p95 {p95_geral:.2f} ms · "
+              f"meta de 50 ms {'atendida' if p95_geral < 50 else 'NÃO atendida'}")
+        print(f"Exemplo de trecho: {store.search_messages('objeção de preço', limit=1)[0]['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
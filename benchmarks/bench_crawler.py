@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark da raspagem de sites usada no Dossiê e no Método de Vendas, contra um site local.
+
+Compara:
+  - o laço antigo: `requests.get` sequencial, uma conexão nova por chamada e cada página
+    baixada duas vezes (texto e, de novo, links);
+  - o crawler assíncrono (utils/crawler.py): conexões reaproveitadas, concorrência por host
+    limitada e cada URL baixada uma única vez.
+
+Uso:
+    python benchmarks/bench_crawler.py
+    python benchmarks/bench_crawler.py --paginas 30 --latencia 0.2 --por-host 2 4 8
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from fixture_site import FixtureSite
+from utils.crawler import crawl_site
+
+
+def laco_antigo(url, max_paginas):
+    """Reprodução do `raspar_site` anterior, sem o Selenium"""
+    dominio = urlparse(url).netloc
+
+    def obter_links_site(url_atual):
+        resposta = requests.get(url_atual, timeout=10)
+        sopa = BeautifulSoup(resposta.content, "html.parser")
+        links = {urljoin(url_atual, a['href']) for a in sopa.find_all("a", href=True)}
+        return {link for link in links if urlparse(link).netloc == dominio}
+
+    visitadas, para_visitar, todo_texto = set(), {url}, ""
+    while para_visitar and len(visitadas) < max_paginas:
+        url_atual = para_visitar.pop()
+        if url_atual in visitadas:
+            continue
+        resposta = requests.get(url_atual, timeout=10)
+        sopa = BeautifulSoup(resposta.content, 'html.parser')
+        todo_texto += re.sub(r'\s+', ' ', sopa.get_text(separator=' ', strip=True)) + "\n\n"
+        visitadas.add(url_atual)
+        para_visitar.update(obter_links_site(url_atual) - visitadas)
+    return len(visitadas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=30)
+    parser.add_argument("--latencia", type=float, default=0.15, help="latência do servidor por requisição (s)")
+    parser.add_argument("--por-host", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with FixtureSite(pages=args.paginas + 10, latency=args.latencia) as site:
+        print(f"Site local com {site.pages} páginas, latência {args.latencia * 1000:.0f} ms; "
+              f"raspando {args.paginas} páginas\n")
+        print(f"{'modo':<30} {'páginas':>8} {'requisições':>12} {'tempo':>8}")
+
+        antes = site.requests
+        inicio = time.perf_counter()
+        paginas = laco_antigo(site.url, args.paginas)
+        print(f"{'laço antigo (requests)':<30} {paginas:>8} {site.requests - antes:>12} "
+              f"{time.perf_counter() - inicio:>7.2f}s")
+
+        for por_host in args.por_host:
+            antes = site.requests
+            resultado = crawl_site(site.url, args.paginas, concurrency=max(8, por_host), per_host=por_host)
+            print(f"{f'crawler assíncrono ({por_host}/host)':<30} {len(resultado.pages):>8} "
+                  f"{site.requests - antes:>12} {resultado.stats['seconds']:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cache HTTP da raspagem (utils/http_cache.py) contra o site local.
+
+Raspa o mesmo site três vezes com um cache em diretório temporário:
+  - frio: cache vazio, todas as páginas baixadas;
+  - quente, revalidando: entradas vencidas (idade máxima 0), cada página confirmada com
+    If-None-Match e respondida com 304, sem corpo;
+  - quente, dentro da idade máxima: nenhuma requisição.
+
+Uso:
+    python benchmarks/bench_http_cache.py
+    python benchmarks/bench_http_cache.py --paginas 30 --latencia 0.3
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from fixture_site import FixtureSite
+from utils.crawler import crawl_site
+from utils.http_cache import HttpCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=30)
+    parser.add_argument("--latencia", type=float, default=0.15, help="latência do servidor por requisição (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            FixtureSite(pages=args.paginas + 10, latency=args.latencia) as site:
+        print(f"Site local com {site.pages} páginas, latência {args.latencia * 1000:.0f} ms; "
+              f"raspando {args.paginas} páginas\n")
+        print(f"{'raspagem':<28} {'páginas':>8} {'requisições':>12} {'304':>5} {'KB recebidos':>13} {'tempo':>8}")
+
+        for nome, max_age in (("fria", 3600), ("quente, revalidando", 0), ("quente, idade máxima", 3600)):
+            cache = HttpCache(cache_dir, max_age=max_age)
+            requisicoes, nao_modificadas, enviados = site.requests, site.not_modified, site.bytes_sent
+            resultado = crawl_site(site.url, args.paginas, cache=cache)
+            print(f"{nome:<28} {len(resultado.pages):>8} {site.requests - requisicoes:>12} "
+                  f"{site.not_modified - nao_modificadas:>5} {(site.bytes_sent - enviados) / 1024:>13.1f} "
+                  f"{resultado.stats['seconds']:>7.2f}s")
+
+        tamanho = sum(path.stat().st_size for path in Path(cache_dir).glob("*/*.bin"))
+        print(f"\nCache em disco: {tamanho / 1024:.1f} KB (corpos comprimidos)")
+
+
+if __name__ == "__main__":
+    main()
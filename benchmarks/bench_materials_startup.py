@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark da carga inicial dos materiais fixos do Consultor I.A. com 1, 2, 4 e 8
+processos de extração, sem cache (cada rodada usa uma pasta de cache vazia).
+
+Mede o tempo até a fração mínima de arquivos estar pronta (quando o chat passa a
+aceitar perguntas) e até o corpus completo, e confere que a versão final do corpus
+é a mesma em todas as rodadas (mesclagem em ordem determinística).
+
+Uso:
+    python benchmarks/bench_materials_startup.py
+    python benchmarks/bench_materials_startup.py --processos 1 4 --prontos 0.25
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.materials_corpus import MaterialsLoader
+from utils.tokens import TokenCounter
+
+MATERIALS_DIR = Path(__file__).parent.parent / "materiais"
+
+
+def medir(processos, prontos, contador):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        inicio = time.perf_counter()
+        loader = MaterialsLoader(MATERIALS_DIR, contador, processos, cache_dir=cache_dir)
+        loader.wait(math.ceil(prontos * len(loader.filenames)))
+        parcial = time.perf_counter() - inicio
+        corpus_parcial = loader.snapshot()
+        loader.wait(len(loader.filenames))
+        total = time.perf_counter() - inicio
+        corpus = loader.snapshot()
+    return parcial, total, len(corpus_parcial.documents), corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--prontos", type=float, default=0.5, help="Fração de arquivos para aceitar perguntas")
+    args = parser.parse_args()
+
+    contador = TokenCounter()
+    print(f"Materiais: {MATERIALS_DIR} · CPUs disponíveis: {os.cpu_count()}")
+    print(f"{'processos':>9} {'pronto p/ perguntas':>20} {'corpus completo':>16} {'arquivos parciais':>18} versão")
+    versoes = set()
+    for processos in args.processos:
+        parcial, total, arquivos, corpus = medir(processos, args.prontos, contador)
+        versoes.add(corpus.version)
+        print(f"{processos:>9} {parcial:>19.2f}s {total:>15.2f}s {arquivos:>18} {corpus.version}")
+
+    print("Versão final idêntica em todas as rodadas:", "sim" if len(versoes) == 1 else "NÃO")
+
+
+if __name__ == "__main__":
+    main()
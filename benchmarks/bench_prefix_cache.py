@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do cache de prefixo do Consultor I.A. com o backend simulado.
+
+Compara, para a mesma sequência de perguntas, o custo e a latência simulados de:
+  - prefixo completo (sistema + todo o corpus) reenviado a cada chamada, sem cache;
+  - o mesmo prefixo registrado uma única vez no cache de contexto;
+  - o modo padrão por trechos (prefixo só com o sistema, trechos BM25 no sufixo).
+
+A latência é calculada pelo modelo do backend simulado (sem dormir), com preços do
+Gemini 1.5 Pro por padrão.
+
+Uso:
+    python benchmarks/bench_prefix_cache.py
+    python benchmarks/bench_prefix_cache.py --perguntas 50
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.context_cache import ContextCache, SimulatedPrefixCacheBackend, build_static_prefix
+from utils.materials_corpus import MaterialsLoader
+from utils.retrieval import format_chunks
+from utils.tokens import TokenCounter
+
+MATERIALS_DIR = Path(__file__).parent.parent / "materiais"
+
+AGENT_CONTEXT = (
+    "Você é um agente inteligente e consultor comercial da empresa Sucesso em Vendas. "
+    "Seu papel é fornecer assistência especializada utilizando o método de vendas da Sucesso em Vendas."
+)
+
+PERGUNTAS = [
+    "Como contornar a objeção de preço do cliente?",
+    "Quais são as etapas do método de vendas?",
+    "Como motivar a equipe de vendas depois de um mês ruim?",
+    "Como o líder deve conduzir uma mudança no processo comercial?",
+    "Dicas para abordagem inicial de um cliente em loja de eletromóveis",
+    "Como fazer o pós-venda e fidelizar clientes?",
+]
+
+
+def rodar(nome, prefixo, sufixos, contador, cache_habilitado):
+    backend = SimulatedPrefixCacheBackend(contador, sleep=False, cache_enabled=cache_habilitado)
+    cache = ContextCache(backend)
+    latencias = []
+    for sufixo in sufixos:
+        antes = backend.stats()['simulated_seconds']
+        "".join(cache.stream(prefixo, sufixo))
+        latencias.append(backend.stats()['simulated_seconds'] - antes)
+    stats = backend.stats()
+    media = sum(latencias[1:]) / max(1, len(latencias) - 1)
+    print(f"{nome:<34} {prefixo.tokens:>8} {latencias[0]:>9.2f}s {media:>9.2f}s "
+          f"US$ {stats['cost']:>8.4f}  (sem cache: US$ {stats['cost_without_cache']:.4f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perguntas", type=int, default=20)
+    args = parser.parse_args()
+
+    contador = TokenCounter()
+    loader = MaterialsLoader(MATERIALS_DIR, contador, workers=1)
+    loader.wait(len(loader.filenames))
+    corpus = loader.snapshot()
+
+    perguntas = [PERGUNTAS[i % len(PERGUNTAS)] for i in range(args.perguntas)]
+    sufixos_completo = [f"\n\nUsuário: {p}\nChatbot:" for p in perguntas]
+    sufixos_trechos = [
+        "MATERIAIS DE REFERÊNCIA FIXOS:\n" + format_chunks(corpus.index.search(p, top_k=8, token_budget=6000))
+        + f"\n\nUsuário: {p}\nChatbot:"
+        for p in perguntas
+    ]
+    prefixo_completo = build_static_prefix(AGENT_CONTEXT, corpus.documents, contador)
+    prefixo_sistema = build_static_prefix(AGENT_CONTEXT, (), contador)
+
+    # O prefixo precisa ser idêntico byte a byte para ser reaproveitado
+    assert build_static_prefix(AGENT_CONTEXT, corpus.documents, contador).version == prefixo_completo.version
+
+    print(f"{args.perguntas} perguntas · corpus {corpus.version} ({len(corpus.documents)} arquivos)\n")
+    print(f"{'modo':<34} {'prefixo':>8} {'1ª chamada':>10} {'demais':>10} custo total")
+    rodar("completo, sem cache de prefixo", prefixo_completo, sufixos_completo, contador, False)
+    rodar("completo, com cache de prefixo", prefixo_completo, sufixos_completo, contador, True)
+    rodar("trechos BM25 (padrão)", prefixo_sistema, sufixos_trechos, contador, True)
+
+
+if __name__ == "__main__":
+    main()
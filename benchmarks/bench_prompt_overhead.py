@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo de CPU por chamada na montagem do prompt do Consultor I.A.:
+`ChatPromptTemplate.from_template(prompt) | llm` (forma antiga) versus mensagens
+de sistema/usuário prontas, com a de sistema criada uma vez por versão do corpus.
+
+Usa um modelo falso do LangChain que responde na hora, de modo que o tempo medido
+é só o do lado do cliente. Também confere que a forma antiga quebra com "{" e "}"
+(comuns na saída de `load_json`).
+
+Uso:
+    python benchmarks/bench_prompt_overhead.py
+    python benchmarks/bench_prompt_overhead.py --chamadas 20 --modo trechos
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.context_cache import LangChainBackend, build_static_prefix
+from utils.materials_corpus import MaterialsLoader
+from utils.retrieval import format_chunks
+from utils.tokens import TokenCounter
+
+MATERIALS_DIR = Path(__file__).parent.parent / "materiais"
+
+AGENT_CONTEXT = (
+    "Você é um agente inteligente e consultor comercial da empresa Sucesso em Vendas. "
+    "Seu papel é fornecer assistência especializada utilizando o método de vendas da Sucesso em Vendas."
+)
+
+PERGUNTA = "Como contornar a objeção de preço do cliente?"
+
+
+def medir(funcao, chamadas):
+    tempos = []
+    for _ in range(chamadas):
+        inicio = time.process_time()
+        "".join(funcao())
+        tempos.append((time.process_time() - inicio) * 1000)
+    return statistics.median(tempos), max(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chamadas", type=int, default=10)
+    parser.add_argument("--modo", choices=["completo", "trechos"], default="completo")
+    args = parser.parse_args()
+
+    contador = TokenCounter()
+    loader = MaterialsLoader(MATERIALS_DIR, contador, workers=1)
+    loader.wait(len(loader.filenames))
+    corpus = loader.snapshot()
+
+    if args.modo == "completo":
+        prefixo = build_static_prefix(AGENT_CONTEXT, corpus.documents, contador)
+        sufixo = f"\n\nUsuário: {PERGUNTA}\nChatbot:"
+    else:
+        prefixo = build_static_prefix(AGENT_CONTEXT, (), contador)
+        sufixo = ("MATERIAIS DE REFERÊNCIA FIXOS:\n" + format_chunks(corpus.index.search(PERGUNTA))
+                  + f"\n\nUsuário: {PERGUNTA}\nChatbot:")
+
+    llm = FakeListChatModel(responses=["ok"])
+    prompt = prefixo.text + sufixo
+    # O template antigo quebra com chaves no texto; para medir, escapa-as como o LangChain exige
+    prompt_escapado = prompt.replace("{", "{{").replace("}", "}}")
+
+    def antigo():
+        modelo = ChatPromptTemplate.from_template(prompt_escapado) | llm
+        return (chunk.content for chunk in modelo.stream({}))
+
+    backend = LangChainBackend(llm)
+    mensagem_sistema = backend.register(prefixo)
+
+    def novo():
+        return iter(backend.stream(mensagem_sistema, sufixo))
+
+    print(f"Modo {args.modo}: prompt com {len(prompt):,} caracteres ({prefixo.tokens} tokens no prefixo)")
+    mediana, maximo = medir(antigo, args.chamadas)
+    print(f"ChatPromptTemplate.from_template | llm : mediana {mediana:8.2f} ms de CPU (máx. {maximo:.2f})")
+    mediana_nova, maximo = medir(novo, args.chamadas)
+    print(f"Mensagens prontas (sistema + usuário)  : mediana {mediana_nova:8.2f} ms de CPU (máx. {maximo:.2f})")
+    if mediana_nova:
+        print(f"Redução: {mediana / mediana_nova:.0f}x")
+
+    # Conteúdo JSON com chaves, como sai de `load_json`
+    sufixo_json = "MATERIAIS ADICIONADOS PELO USUÁRIO:\n{'produto': 'Sofá', 'preço': 1999}\n" + sufixo
+    try:
+        "".join(c.content for c in (ChatPromptTemplate.from_template(prefixo.text + sufixo_json) | llm).stream({}))
+        print("Forma antiga com JSON no prompt: ok")
+    except Exception as e:
+        print(f"Forma antiga com JSON no prompt: ERRO ({type(e).__name__}: {e})")
+    "".join(backend.stream(mensagem_sistema, sufixo_json))
+    print("Mensagens prontas com JSON no prompt: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark da renderização de páginas em JavaScript (fallback do Selenium na raspagem).
+
+Usa as páginas SPA do site local (benchmarks/fixture_site.py), cujo conteúdo chega por fetch
+com atraso variável, e mede o tempo de renderização por página em três modos:
+  - antes: um Chrome novo para o texto e outro para os links, cada um com espera fixa de 5 s;
+  - pool + espera fixa: navegadores reaproveitados (utils/browser_pool.py), ainda com os 5 s;
+  - pool + prontidão: navegadores reaproveitados, espera por rede ociosa, DOM sem mutações e
+    texto estável, com imagens/fontes/mídia bloqueadas e carregamento "eager".
+
+Também confere se o texto renderizado foi capturado por inteiro (palavras por página).
+Requer o Google Chrome e o chromedriver (ou acesso à rede para o webdriver-manager).
+
+Uso:
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --paginas 20 --modos pool prontidao
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+import utils.browser_pool as browser_pool
+from fixture_site import FixtureSite
+from utils.browser_pool import BrowserPool, resolve_driver_path
+
+
+def renderizar_antes(url):
+    """Reprodução de raspar_com_selenium + obter_links_com_selenium anteriores"""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    service = Service(resolve_driver_path())
+    with webdriver.Chrome(service=service, options=options) as driver:
+        driver.get(url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        time.sleep(5)
+        texto = driver.find_element(By.TAG_NAME, "body").text
+    with webdriver.Chrome(service=service, options=options) as driver:
+        driver.get(url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "a")))
+        links = {a.get_attribute('href') for a in driver.find_elements(By.TAG_NAME, "a")}
+    return texto, links
+
+
+def espera_fixa(driver, *args, **kwargs):
+    time.sleep(5)
+    return True
+
+
+def medir(nome, renderizar, urls):
+    tempos, palavras = [], []
+    for url in urls:
+        inicio = time.perf_counter()
+        texto = renderizar(url)[0]
+        tempos.append(time.perf_counter() - inicio)
+        palavras.append(len(texto.split()))
+    ordenados = sorted(tempos)
+    p95 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))]
+    print(f"{nome:<22} mediana {statistics.median(tempos):6.2f}s   p95 {p95:6.2f}s   máx. {max(tempos):6.2f}s   "
+          f"total {sum(tempos):7.1f}s   palavras/página {min(palavras)}–{max(palavras)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=10)
+    parser.add_argument("--latencia", type=float, default=0.1, help="latência do servidor por requisição (s)")
+    parser.add_argument("--modos", nargs="+", default=["antes", "pool", "prontidao"],
+                        choices=["antes", "pool", "prontidao"])
+    args = parser.parse_args()
+
+    with FixtureSite(pages=args.paginas, latency=args.latencia) as site:
+        urls = [f"{site.url}spa/{indice}.html" for indice in range(args.paginas)]
+        print(f"{args.paginas} páginas SPA, conteúdo via fetch em {args.latencia:.1f}–{args.latencia + 1.6:.1f}s\n")
+
+        if "antes" in args.modos:
+            medir("antes", renderizar_antes, urls)
+
+        if "pool" in args.modos:
+            original = browser_pool.wait_until_ready
+            browser_pool.wait_until_ready = espera_fixa
+            pool = BrowserPool(size=1)
+            try:
+                medir("pool + espera fixa", pool.visit, urls)
+            finally:
+                pool.close()
+                browser_pool.wait_until_ready = original
+
+        if "prontidao" in args.modos:
+            pool = BrowserPool(size=1)
+            try:
+                medir("pool + prontidão", pool.visit, urls)
+                stats = pool.stats()
+                print(f"\n{stats['launches']} navegador(es) iniciado(s) em {stats['launch_seconds']:.1f}s; "
+                      f"{stats['capped']} página(s) atingiram o limite de espera")
+            finally:
+                pool.close()
+
+
+if __name__ == "__main__":
+    main()
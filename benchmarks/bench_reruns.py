@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de execução do script do Consultor I.A. a cada rerun.
+
+Usa o AppTest do Streamlit (sem navegador) com um banco de chats sintético e mede, para
+cada interação comum na barra lateral e no chat, o tempo do rerun completo do script.
+O AppTest sempre reexecuta o script inteiro; o custo de um rerun só do fragmento aparece
+nas métricas de execução do próprio app (escopos "fragmento:..."), listadas ao final.
+
+Rodar antes e depois de uma mudança dá a comparação. O banco sintético, o cache e os logs ficam
+em um diretório temporário (CONSULTOR_DIRETORIO_DADOS/LOGS): os dados reais não são tocados.
+
+Uso:
+    python benchmarks/bench_reruns.py
+    python benchmarks/bench_reruns.py --chats 200 --repeticoes 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+APP_FILE = Path(__file__).parent.parent / "apps" / "consultor_ia.py"
+
+
+def semear(data_dir, chats):
+    from utils.chat_store import ChatStore
+    store = ChatStore(Path(data_dir) / "consultor_chats.db")
+    for i in range(chats):
+        chat_id = store.create_chat(f"Chat {i} vendas")
+        for turno in range(4):
+            store.append_message(chat_id, 'user', f"Pergunta {turno} sobre objeção de preço no chat {i}")
+            store.append_message(chat_id, 'agent', "Resposta com técnicas de contorno de objeções. " * 20)
+
+
+def medir(at, nome, acao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        acao(at)
+        inicio = time.perf_counter()
+        at.run()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert not at.exception, [e.value for e in at.exception]
+    print(f"{nome:<32} mediana {statistics.median(tempos):8.1f} ms   máx. {max(tempos):8.1f} ms")
+
+
+def botao(at, rotulo):
+    return [b for b in at.button if b.label == rotulo][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=60)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    # Sem credenciais e com o backend simulado: nenhuma chamada de rede
+    os.environ.pop('GOOGLE_APPLICATION_CREDENTIALS', None)
+    os.environ['CONSULTOR_BACKEND'] = 'simulado'
+    base = tempfile.mkdtemp(prefix="bench_reruns_")
+    os.environ['CONSULTOR_DIRETORIO_DADOS'] = os.path.join(base, "data")
+    os.environ['CONSULTOR_DIRETORIO_LOGS'] = os.path.join(base, "logs")
+    os.chdir(base)  # .env do repositório fora do alcance do load_dotenv
+    semear(os.environ['CONSULTOR_DIRETORIO_DADOS'], args.chats)
+
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(str(APP_FILE), default_timeout=600)
+    inicio = time.perf_counter()
+    at.run()
+    print(f"{args.chats} chats sintéticos · primeira execução: {(time.perf_counter() - inicio) * 1000:.0f} ms\n")
+
+    medir(at, "rerun sem interação", lambda at: None, args.repeticoes)
+    medir(at, "abrir/fechar menu do chat", lambda at: botao(at, "⋮").click(), args.repeticoes)
+    medir(at, "próxima página de chats", lambda at: botao(at, "›").click(), 1)
+    medir(at, "página anterior", lambda at: botao(at, "‹").click(), 1)
+    medir(at, "trocar de chat", lambda at: [b for b in at.button if " vendas - " in b.label][1].click(),
+          args.repeticoes)
+
+    try:
+        from utils.run_metrics import get_run_metrics
+    except ImportError:
+        return
+    print("\nMétricas de execução do app (por escopo):")
+    for escopo, stats in sorted(get_run_metrics().stats().items()):
+        print(f"  {escopo:<28} {stats['runs']:>4} execuções · mediana {stats['p50_ms']:7.1f} ms · "
+              f"p95 {stats['p95_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Consultor I.A.: tokens de prompt e latência com o corpus inteiro
+versus apenas os trechos recuperados pelo índice BM25 sobre `materiais/`.
+
+Uso:
+    python benchmarks/bench_retrieval.py            # apenas montagem do prompt
+    python benchmarks/bench_retrieval.py --modelo   # inclui chamada real ao Gemini
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import tiktoken
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.documents import SUPPORTED_EXTENSIONS, extract_text
+from utils.retrieval import BM25Index, format_chunks
+
+MATERIALS_DIR = Path(__file__).parent.parent / "materiais"
+
+AGENT_CONTEXT = (
+    "Você é um agente inteligente e consultor comercial da empresa Sucesso em Vendas. "
+    "Seu papel é fornecer assistência especializada utilizando o método de vendas da Sucesso em Vendas."
+)
+
+PERGUNTAS = [
+    "Como contornar a objeção de preço do cliente?",
+    "Quais são as etapas do método de vendas?",
+    "Como motivar a equipe de vendas depois de um mês ruim?",
+    "Como o líder deve conduzir uma mudança no processo comercial?",
+    "Dicas para abordagem inicial de um cliente em loja de eletromóveis",
+    "Como fazer o pós-venda e fidelizar clientes?",
+]
+
+try:
+    encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+except Exception:
+    # Mesmo fallback do Consultor quando o tiktoken não consegue baixar a codificação
+    encoding = None
+
+
+def contar_tokens(texto):
+    if encoding is None:
+        return len(texto.split())
+    return len(encoding.encode(texto))
+
+
+def carregar_materiais():
+    materiais = []
+    for nome in sorted(os.listdir(MATERIALS_DIR)):
+        if nome.endswith(SUPPORTED_EXTENSIONS):
+            materiais.append((nome, extract_text(MATERIALS_DIR / nome, nome)))
+    return materiais
+
+
+def chamar_modelo(llm, prompt):
+    inicio = time.perf_counter()
+    llm.invoke(prompt)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modelo", action="store_true", help="mede a latência real do Gemini")
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--orcamento", type=int, default=6000)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    materiais = carregar_materiais()
+    print(f"Extração de {len(materiais)} materiais: {time.perf_counter() - inicio:.2f}s")
+
+    inicio = time.perf_counter()
+    indice = BM25Index.from_documents(materiais, contar_tokens)
+    print(f"Índice: {len(indice.chunks)} trechos, {len(indice.vocabulary)} termos, "
+          f"{indice.total_tokens} tokens ({time.perf_counter() - inicio:.2f}s)\n")
+
+    corpus = "\n\n".join(texto for _, texto in materiais)
+    llm = None
+    if args.modelo:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.3)
+
+    linhas = []
+    for pergunta in PERGUNTAS:
+        inicio = time.perf_counter()
+        antes = f"{AGENT_CONTEXT}\n\nMATERIAIS DE REFERÊNCIA FIXOS:\n{corpus}\n\nUsuário: {pergunta}\nChatbot:"
+        montagem_antes = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        trechos = indice.search(pergunta, top_k=args.top_k, token_budget=args.orcamento)
+        depois = (f"{AGENT_CONTEXT}\n\nMATERIAIS DE REFERÊNCIA FIXOS:\n{format_chunks(trechos)}\n\n"
+                  f"Usuário: {pergunta}\nChatbot:")
+        montagem_depois = time.perf_counter() - inicio
+
+        linha = {
+            "pergunta": pergunta,
+            "tokens_antes": contar_tokens(antes),
+            "tokens_depois": contar_tokens(depois),
+            "montagem_antes_ms": montagem_antes * 1000,
+            "montagem_depois_ms": montagem_depois * 1000,
+        }
+        if llm:
+            linha["latencia_antes_s"] = chamar_modelo(llm, antes)
+            linha["latencia_depois_s"] = chamar_modelo(llm, depois)
+        linhas.append(linha)
+
+    print(f"{'Pergunta':<62} {'Tokens antes':>12} {'depois':>8} {'Montagem ms':>12}")
+    for linha in linhas:
+        print(f"{linha['pergunta'][:60]:<62} {linha['tokens_antes']:>12} {linha['tokens_depois']:>8} "
+              f"{linha['montagem_depois_ms']:>12.2f}")
+        if llm:
+            print(f"{'':<62} latência: {linha['latencia_antes_s']:.1f}s -> {linha['latencia_depois_s']:.1f}s")
+
+    media_antes = statistics.mean(l["tokens_antes"] for l in linhas)
+    media_depois = statistics.mean(l["tokens_depois"] for l in linhas)
+    print(f"\nMédia de tokens por prompt: {media_antes:.0f} -> {media_depois:.0f} "
+          f"({media_antes / media_depois:.0f}x menor)")
+    if not llm:
+        print("Latência do modelo não medida (use --modelo com credenciais do Gemini configuradas).")
+
+
+if __name__ == "__main__":
+    main()
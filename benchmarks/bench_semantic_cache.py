@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Avaliação do cache semântico do Consultor I.A. em um conjunto de perguntas de teste.
+
+O cache é populado com uma pergunta canônica por intenção. Em seguida é consultado com:
+  - paráfrases da mesma intenção (devem acertar a pergunta canônica certa);
+  - perguntas de outras intenções, muitas com vocabulário parecido (devem errar);
+  - pares que diferem só na palavra-chave: prompts rápidos do app preenchidos com outro produto
+    ou tema e perguntas com antônimos ("cliente novo"/"cliente antigo"). A primeira pergunta de
+    cada par vai para o cache; a segunda deve errar.
+
+Taxa de acerto   = paráfrases que encontram a intenção certa / total de paráfrases
+Taxa de falso acerto = consultas que retornam uma resposta de outra intenção / total de consultas
+
+Uso:
+    python benchmarks/bench_semantic_cache.py
+    python benchmarks/bench_semantic_cache.py --embedder gemini   # requer credenciais e rede
+
+As colunas "só vetor" mostram o cache sem a exigência de mesmo assunto (palavras-chave).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.semantic_cache import HashedNgramEmbedder, SemanticCache
+
+# intenção -> (pergunta canônica, paráfrases)
+INTENCOES = {
+    "objecao_preco": ("Como contornar objeção de preço?", [
+        "objeção de preço, como responder",
+        "O cliente disse que está caro, como contornar essa objeção?",
+        "como responder a objeção de preço do cliente",
+        "Como lidar com objeções de preço",
+    ]),
+    "etapas_metodo": ("Quais são as etapas do método de vendas?", [
+        "etapas do método de vendas",
+        "quais as etapas do nosso método de venda",
+        "Me explique as etapas do método de vendas",
+    ]),
+    "motivar_equipe": ("Como motivar a equipe de vendas?", [
+        "como motivar minha equipe de vendas",
+        "dicas para motivar a equipe de vendedores",
+        "motivação da equipe de vendas, o que fazer?",
+    ]),
+    "pos_venda": ("Como fazer um bom pós-venda?", [
+        "como fazer pós-venda",
+        "dicas de pós-venda para fidelizar o cliente",
+        "o que fazer no pós-venda",
+    ]),
+    "abordagem_inicial": ("Como fazer a abordagem inicial do cliente na loja?", [
+        "abordagem inicial do cliente na loja",
+        "como abordar o cliente quando ele entra na loja",
+        "dicas de abordagem inicial na loja",
+    ]),
+    "fechamento": ("Técnicas de fechamento de vendas", [
+        "quais técnicas de fechamento de venda usar",
+        "como fazer o fechamento da venda",
+        "técnicas para fechar vendas",
+    ]),
+    "prospeccao": ("Como prospectar novos clientes?", [
+        "como fazer prospecção de novos clientes",
+        "dicas para prospectar clientes novos",
+        "prospecção de clientes, por onde começar",
+    ]),
+    "lider_mudanca": ("Como o líder deve conduzir uma mudança na equipe?", [
+        "como conduzir mudança na equipe sendo líder",
+        "o líder e a mudança: como conduzir a equipe",
+    ]),
+}
+
+# Perguntas de outras intenções (sem resposta em cache), várias com palavras em comum
+NEGATIVAS = [
+    "Como contornar objeção de prazo de entrega?",
+    "Como definir o preço de um produto novo?",
+    "Quais são as etapas de um processo seletivo de vendedores?",
+    "Como demitir um vendedor da equipe?",
+    "Como fazer um relatório de vendas mensal?",
+    "Como abordar um cliente por telefone?",
+    "Como calcular a comissão dos vendedores?",
+    "O que é margem de contribuição?",
+    "Como organizar a vitrine da loja?",
+    "Como treinar vendedores novos?",
+    "Como negociar prazo de pagamento com fornecedor?",
+    "Qual a meta de vendas ideal para o mês?",
+]
+
+# Prompts rápidos do Consultor I.A. ("Vender Produto" e "Criar Treinamento") preenchidos
+VENDER = ("Me ajude a vender uma {}, preciso de ideias práticas e ações aplicáveis para meu time vender esse "
+          "produto, preciso que enfatize suas qualidades reais e diferenciais e busque argumentos concisos que "
+          "naturalmente me ajudem com possíveis objeções.")
+TREINAMENTO = ("Me ajude a criar um treinamento de {} com ferramentas e uma lógica de apresentação. "
+               "Destrinche os tópicos com conteúdos mais práticos e aplicáveis.")
+
+# (pergunta em cache, pergunta com outro assunto)
+PARES_NEGATIVOS = [
+    (VENDER.format("geladeira"), VENDER.format("bicicleta")),
+    (VENDER.format("televisão"), VENDER.format("cama box")),
+    (TREINAMENTO.format("atendimento"), TREINAMENTO.format("negociação")),
+    (TREINAMENTO.format("prospecção"), TREINAMENTO.format("liderança")),
+    ("Como aumentar o ticket médio?", "Como diminuir o ticket médio?"),
+    ("Como atender um cliente novo?", "Como atender um cliente antigo?"),
+    ("Dicas de vendas para o varejo", "Dicas de vendas para o atacado"),
+    ("Como vender mais em uma farmácia?", "Como vender mais em uma academia?"),
+]
+
+
+def avaliar(embedder, limiar, assunto=True):
+    cache = SemanticCache(embedder, threshold=limiar, require_topic=assunto)
+    for intencao, (canonica, _) in INTENCOES.items():
+        cache.add(canonica, intencao, scope="materiais-v1")
+    for em_cache, _ in PARES_NEGATIVOS:
+        cache.add(em_cache, em_cache, scope="materiais-v1")
+
+    acertos = falsos = consultas = 0
+    parafrases = sum(len(p) for _, p in INTENCOES.values())
+    for intencao, (_, variacoes) in INTENCOES.items():
+        for pergunta in variacoes:
+            consultas += 1
+            resultado = cache.lookup(pergunta, "materiais-v1")
+            if resultado and resultado[0] == intencao:
+                acertos += 1
+            elif resultado:
+                falsos += 1
+    for pergunta in NEGATIVAS + [outra for _, outra in PARES_NEGATIVOS]:
+        consultas += 1
+        if cache.lookup(pergunta, "materiais-v1"):
+            falsos += 1
+
+    # Escopo diferente (outra versão dos materiais) nunca acerta
+    assert cache.lookup(INTENCOES["objecao_preco"][0], "materiais-v2") is None
+    return acertos / parafrases, falsos / consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embedder", choices=["ngramas", "gemini"], default="ngramas")
+    parser.add_argument("--limiares", type=float, nargs="+", default=[0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85])
+    args = parser.parse_args()
+
+    if args.embedder == "gemini":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        from utils.semantic_cache import LangChainEmbedder
+        embedder = LangChainEmbedder(GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+    else:
+        embedder = HashedNgramEmbedder()
+
+    total = sum(len(p) for _, p in INTENCOES.values())
+    print(f"Embedder {args.embedder}: {len(INTENCOES)} intenções, {total} paráfrases, "
+          f"{len(NEGATIVAS) + len(PARES_NEGATIVOS)} negativas ({len(PARES_NEGATIVOS)} só com outra palavra-chave)\n")
+    print(f"{'limiar':>6} {'acerto':>8} {'falso acerto':>13} {'acerto (só vetor)':>18} {'falso (só vetor)':>17}")
+    for limiar in args.limiares:
+        acerto, falso = avaliar(embedder, limiar)
+        acerto_vetor, falso_vetor = avaliar(embedder, limiar, assunto=False)
+        print(f"{limiar:>6.2f} {acerto:>8.0%} {falso:>13.0%} {acerto_vetor:>18.0%} {falso_vetor:>17.0%}")
+
+    # Custo da consulta com o cache cheio (2000 entradas)
+    cache = SemanticCache(embedder)
+    for i in range(2000):
+        cache.add(f"pergunta sintética número {i} sobre vendas", "r", "v")
+    inicio = time.perf_counter()
+    for _ in range(100):
+        cache.lookup("como contornar objeção de preço", "v")
+    print(f"\nConsulta com 2000 entradas: {(time.perf_counter() - inicio) * 10:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Site local para os benchmarks de raspagem: páginas HTML interligadas, servidas por um
+servidor aiohttp em uma thread, com latência artificial por requisição.
+
+    with FixtureSite(pages=40, latency=0.1) as site:
+        site.url            # página inicial
+        site.spa_url        # mesma estrutura, renderizada no navegador (JavaScript + /api)
+        site.requests       # requisições recebidas
+        site.bytes_sent     # bytes de corpo enviados
+        site.not_modified   # respostas 304 (as páginas estáticas têm ETag e Last-Modified)
+
+Nas páginas SPA o conteúdo chega de /api/{n}.json com atraso variável por página (de `latency`
+a `latency + 1,6 s`), e cada página tem uma imagem lenta que só atrasa quem a baixa.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+
+from aiohttp import web
+
+PALAVRAS = ("vendas cliente equipe produto loja atendimento consultoria processo comercial meta "
+            "resultado treinamento estratégia mercado negociação proposta valor serviço qualidade").split()
+
+LAST_MODIFIED = "Mon, 05 Oct 2026 12:00:00 GMT"
+
+
+def texto_pagina(indice, palavras=180):
+    aleatorio = random.Random(indice)
+    return " ".join(aleatorio.choice(PALAVRAS) for _ in range(palavras))
+
+
+class FixtureSite:
+    def __init__(self, pages=40, latency=0.1, links_per_page=4):
+        self.pages = pages
+        self.latency = latency
+        self.links_per_page = links_per_page
+        self.requests = 0
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def html(self, indice):
+        links = "".join(
+            f'<li><a href="/p/{(indice + salto) % self.pages}.html">Página {(indice + salto) % self.pages}</a></li>'
+            for salto in range(1, self.links_per_page + 1)
+        )
+        return (f"<html><head><title>Página {indice}</title>"
+                f'<meta name="keywords" content="vendas,consultoria"></head><body>'
+                f"<h1>Página {indice}</h1><p>{texto_pagina(indice)}</p>"
+                f'<ul>{links}<li><a href="/">Início</a></li><li><a href="#topo">Topo</a></li></ul>'
+                f"</body></html>")
+
+    async def handle(self, request):
+        with self._lock:
+            self.requests += 1
+        await asyncio.sleep(self.latency)
+        name = request.match_info.get('pagina', '0')
+        indice = int(name) if name.isdigit() else 0
+        if indice >= self.pages:
+            raise web.HTTPNotFound()
+        body = self.html(indice).encode('utf-8')
+        headers = {'ETag': f'"{hashlib.md5(body).hexdigest()}"', 'Last-Modified': LAST_MODIFIED}
+        if request.headers.get('If-None-Match') == headers['ETag']:
+            with self._lock:
+                self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        with self._lock:
+            self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers=headers)
+
+    def spa_html(self, indice):
+        return (f"<html><head><title>Página {indice}</title></head><body>"
+                f"<noscript>Ative o JavaScript para ver este site.</noscript><div id=\"root\"></div>"
+                f'<img src="/img/{indice}.png">'
+                f"<script>fetch('/api/{indice}.json').then(r => r.json()).then(d => {{"
+                f"document.getElementById('root').innerHTML = '<h1>' + d.titulo + '</h1><p>' + d.texto + '</p>'"
+                f" + d.links.map(l => '<a href=\"/spa/' + l + '.html\">Página ' + l + '</a>').join(' ');"
+                f"}});</script></body></html>")
+
+    async def handle_spa(self, request):
+        with self._lock:
+            self.requests += 1
+        await asyncio.sleep(self.latency)
+        indice = int(request.match_info['pagina'])
+        if indice >= self.pages:
+            raise web.HTTPNotFound()
+        return web.Response(text=self.spa_html(indice), content_type="text/html")
+
+    async def handle_api(self, request):
+        with self._lock:
+            self.requests += 1
+        indice = int(request.match_info['pagina'])
+        await asyncio.sleep(self.latency + (indice % 5) * 0.4)
+        links = [(indice + salto) % self.pages for salto in range(1, self.links_per_page + 1)]
+        return web.Response(text=json.dumps({'titulo': f"Página {indice}", 'texto': texto_pagina(indice),
+                                             'links': links}), content_type="application/json")
+
+    async def handle_image(self, request):
+        with self._lock:
+            self.requests += 1
+        await asyncio.sleep(3)
+        return web.Response(body=b"\x89PNG\r\n\x1a\n", content_type="image/png")
+
+    def routes(self):
+        return [web.get("/", self.handle), web.get("/p/{pagina}.html", self.handle),
+                web.get("/spa/{pagina}.html", self.handle_spa), web.get("/api/{pagina}.json", self.handle_api),
+                web.get("/img/{pagina}.png", self.handle_image)]
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        application = web.Application()
+        application.add_routes(self.routes())
+        self.runner = web.AppRunner(application, access_log=None)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.runner.cleanup())
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/"
+
+    @property
+    def spa_url(self):
+        return f"{self.url}spa/0.html"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,130 @@
+import csv
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Nomes de coluna reconhecidos como a coluna das perguntas (sem diferenciar maiúsculas)
+QUESTION_COLUMNS = ("pergunta", "perguntas", "question", "questions", "questao", "questão")
+
+
+class RateLimiter:
+    """Limita as chamadas a `rate_per_minute`, espaçadas por igual entre todas as threads"""
+
+    def __init__(self, rate_per_minute):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _unquote(line):
+    """Remove as aspas de um campo CSV citado ("texto, com vírgula")"""
+    if len(line) > 1 and line[0] == line[-1] == '"':
+        return line[1:-1].replace('""', '"')
+    return line
+
+
+def _read_csv(data):
+    # Mesmas codificações aceitas nos uploads do Método de Vendas
+    for encoding in ('utf-8-sig', 'iso-8859-1', 'windows-1252'):
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("Não foi possível decodificar o arquivo CSV")
+
+    # O separador é detectado só entre vírgula, ponto e vírgula e tabulação, nas primeiras linhas
+    lines = text.splitlines()
+    try:
+        delimiter = csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=",;\t").delimiter
+    except csv.Error:
+        delimiter = None
+    if delimiter and lines and delimiter in lines[0]:
+        try:
+            return pd.read_csv(io.StringIO(text), sep=delimiter)
+        except pd.errors.ParserError as e:
+            logger.info(f"CSV sem colunas consistentes com o separador {delimiter!r}, lido como uma coluna: {e}")
+
+    # Uma única coluna: cada linha é uma pergunta, mesmo com vírgulas no texto
+    rows = [row for row in (_unquote(line.strip()) for line in lines) if row]
+    if rows and rows[0].lower() in QUESTION_COLUMNS:
+        return pd.DataFrame({rows[0]: rows[1:]})
+    return pd.DataFrame({0: rows})
+
+
+def read_questions(data, filename):
+    """Lê as perguntas de um CSV ou XLSX (coluna "pergunta" ou, na falta dela, a primeira coluna)"""
+    if filename.lower().endswith('.xlsx'):
+        df = pd.read_excel(io.BytesIO(data), engine='openpyxl')
+    else:
+        df = _read_csv(data)
+
+    columns = {str(column).strip().lower(): column for column in df.columns}
+    column = next((columns[name] for name in QUESTION_COLUMNS if name in columns), df.columns[0])
+    questions = [str(q).strip() for q in df[column].dropna()]
+    return [q for q in questions if q]
+
+
+def run_batch(questions, answer_fn, max_workers=4, rate_per_minute=60, on_progress=None):
+    """Responde as perguntas em paralelo (pool limitado e taxa máxima), mantendo a ordem original
+
+    `on_progress(concluídas, total)` é chamado na thread que executa o lote, a cada resposta.
+    """
+    limiter = RateLimiter(rate_per_minute)
+    results = [None] * len(questions)
+
+    def answer(index, question):
+        limiter.acquire()
+        start = time.perf_counter()
+        try:
+            return index, answer_fn(question), "", time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Erro ao responder a pergunta {index + 1} do lote: {e}")
+            return index, "", str(e), time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lote-consultor") as pool:
+        futures = [pool.submit(answer, index, question) for index, question in enumerate(questions)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            index, response, error, seconds = future.result()
+            results[index] = {'pergunta': questions[index], 'resposta': response,
+                              'erro': error, 'segundos': round(seconds, 2)}
+            if on_progress:
+                on_progress(done, len(questions))
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Lote de {len(questions)} perguntas respondido em {elapsed:.1f}s "
+                f"({len(questions) / elapsed * 60 if elapsed else 0:.1f} perguntas/min, {max_workers} workers)")
+    return results
+
+
+def results_to_file(results, xlsx=True):
+    """Gera o arquivo de resultados; retorna (bytes, extensão, mime). Sem openpyxl, gera CSV"""
+    df = pd.DataFrame(results, columns=['pergunta', 'resposta', 'erro', 'segundos'])
+    if xlsx:
+        try:
+            buffer = io.BytesIO()
+            df.to_excel(buffer, index=False, engine='openpyxl')
+            return (buffer.getvalue(), "xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        except ImportError:
+            logger.warning("openpyxl indisponível, gerando os resultados em CSV")
+    # utf-8-sig para o Excel abrir os acentos corretamente
+    return df.to_csv(index=False).encode('utf-8-sig'), "csv", "text/csv"
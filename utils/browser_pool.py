@@ -0,0 +1,259 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+import streamlit as st
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+
+# Texto visível, links e HTML renderizado da página em uma única chamada ao navegador
+PAGE_SCRIPT = """
+return [document.body ? document.body.innerText : '',
+        Array.from(document.querySelectorAll('a[href]'), a => a.href),
+        document.documentElement.outerHTML];
+"""
+
+# Instalado em cada documento antes dos scripts da página: conta requisições fetch/XHR em curso
+# e registra o instante da última mutação do DOM ou atividade de rede
+READINESS_HOOK = """
+(() => {
+  const s = window.__prontidao = {pending: 0, last: performance.now()};
+  const touch = () => { s.last = performance.now(); };
+  const done = () => { s.pending = Math.max(0, s.pending - 1); touch(); };
+  new MutationObserver(touch).observe(document, {subtree: true, childList: true, characterData: true, attributes: true});
+  try { new PerformanceObserver(touch).observe({type: 'resource', buffered: true}); } catch (e) {}
+  const fetch = window.fetch;
+  if (fetch) {
+    window.fetch = function () {
+      s.pending++; touch();
+      return fetch.apply(this, arguments).finally(done);
+    };
+  }
+  const send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    s.pending++; touch();
+    this.addEventListener('loadend', done, {once: true});
+    return send.apply(this, arguments);
+  };
+})();
+"""
+
+# Requisições em curso, ms desde a última atividade, readyState e tamanho do texto visível
+READINESS_PROBE = """
+const s = window.__prontidao || {pending: 0, last: 0};
+return [s.pending, performance.now() - s.last, document.readyState,
+        document.body ? document.body.innerText.length : 0];
+"""
+
+# Recursos que não influenciam o texto: imagens, fontes, mídia e rastreadores de terceiros
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav", "*.m4a",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*connect.facebook.net*", "*hotjar.com*", "*clarity.ms*", "*analytics.tiktok.com*", "*snap.licdn.com*",
+    "*rdstation.com.br*", "*hs-scripts.com*", "*hs-analytics.net*", "*intercom.io*", "*zdassets.com*",
+]
+
+
+@lru_cache(maxsize=None)
+def resolve_driver_path(path=None):
+    """Caminho do chromedriver, resolvido uma única vez por processo
+
+    Sem caminho explícito usa o ChromeDriverManager (que pode acessar a rede); se ele falhar,
+    retorna None e o Selenium procura o driver por conta própria.
+    """
+    if path:
+        return path
+    try:
+        return ChromeDriverManager().install()
+    except Exception as e:
+        logger.warning(f"ChromeDriverManager indisponível, usando o Selenium Manager: {e}")
+        return None
+
+
+def chrome_options():
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920x1080')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    # Devolve o controle no DOMContentLoaded; a espera pelo conteúdo fica com wait_until_ready
+    options.page_load_strategy = 'eager'
+    return options
+
+
+def wait_until_ready(driver, timeout=8, quiet=0.5, interval=0.1):
+    """Espera a página assentar: sem requisições em curso, sem mutações no DOM e com o texto estável
+
+    Retorna False se o limite `timeout` (segundos) for atingido antes disso.
+    """
+    start = time.monotonic()
+    last_length, stable_since = -1, start
+    while True:
+        pending, idle_ms, state, length = driver.execute_script(READINESS_PROBE)
+        now = time.monotonic()
+        if length != last_length:
+            last_length, stable_since = length, now
+        if state != 'loading' and pending == 0 and idle_ms >= quiet * 1000 and now - stable_since >= quiet:
+            return True
+        if now - start >= timeout:
+            return False
+        time.sleep(interval)
+
+
+class _Browser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class BrowserPool:
+    """Pool limitado de navegadores Chrome headless de vida longa
+
+    Cada página empresta um navegador já aberto (`lease`) em vez de iniciar um novo. O navegador
+    é descartado e substituído depois de `max_uses` páginas, ou se travar/cair durante a visita.
+    Os navegadores só são abertos quando necessários e são fechados na saída do processo.
+    """
+
+    def __init__(self, size=2, max_uses=20, driver_path=None, page_timeout=20, ready_timeout=8, quiet=0.5):
+        self.size = size
+        self.max_uses = max_uses
+        self.page_timeout = page_timeout
+        self.ready_timeout = ready_timeout
+        self.quiet = quiet
+        self.driver_path = resolve_driver_path(driver_path)
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {'launches': 0, 'visits': 0, 'capped': 0, 'recycled': 0, 'crashed': 0, 'launch_seconds': 0.0}
+        self._render_ms = deque(maxlen=500)
+        atexit.register(self.close)
+
+    def _launch(self):
+        start = time.perf_counter()
+        service = Service(self.driver_path) if self.driver_path else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options())
+        driver.set_page_load_timeout(self.page_timeout)
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': READINESS_HOOK})
+        except WebDriverException as e:
+            # Sem CDP a prontidão se apoia só no readyState e na estabilidade do texto
+            logger.warning(f"Comandos CDP indisponíveis no navegador: {e}")
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._stats['launches'] += 1
+            self._stats['launch_seconds'] += seconds
+        logger.info(f"Navegador headless iniciado em {seconds:.1f}s")
+        return _Browser(driver)
+
+    def _discard(self, browser, reason):
+        with self._lock:
+            self._stats[reason] += 1
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar navegador: {e}")
+
+    @contextmanager
+    def lease(self):
+        """Empresta um navegador do pool (abre um novo se não houver nenhum livre)"""
+        self._slots.acquire()
+        browser = None
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Pool de navegadores fechado")
+                browser = self._idle.pop() if self._idle else None
+            if browser is None:
+                browser = self._launch()
+            try:
+                yield browser.driver
+            except TimeoutException:
+                # Página lenta: o navegador continua utilizável
+                self._release(browser)
+                browser = None
+                raise
+            except WebDriverException:
+                self._discard(browser, 'crashed')
+                browser = None
+                raise
+            self._release(browser)
+            browser = None
+        finally:
+            if browser is not None:
+                self._release(browser)
+            self._slots.release()
+
+    def _release(self, browser):
+        browser.uses += 1
+        if browser.uses >= self.max_uses:
+            self._discard(browser, 'recycled')
+            return
+        try:
+            # Interrompe scripts e requisições da página anterior; também serve de verificação de saúde
+            browser.driver.get("about:blank")
+        except Exception:
+            self._discard(browser, 'crashed')
+            return
+        with self._lock:
+            if not self._closed:
+                self._idle.append(browser)
+                return
+        self._discard(browser, 'recycled')
+
+    def visit(self, url):
+        """Renderiza a página em um navegador do pool; retorna (texto, links, html)"""
+        start = time.perf_counter()
+        with self.lease() as driver:
+            driver.get(url)
+            ready = wait_until_ready(driver, self.ready_timeout, self.quiet)
+            text, links, html = driver.execute_script(PAGE_SCRIPT)
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._stats['visits'] += 1
+            self._stats['capped'] += not ready
+            self._render_ms.append(seconds * 1000)
+        logger.debug(f"Página renderizada em {seconds:.2f}s{'' if ready else ' (limite de espera)'}: {url} "
+                     f"({len(text)} caracteres, {len(links)} links)")
+        return text, set(links), html
+
+    def stats(self):
+        """Contadores do pool e distribuição do tempo de renderização por página (ms)"""
+        with self._lock:
+            stats = dict(self._stats, idle=len(self._idle))
+            ordered = sorted(self._render_ms)
+        if ordered:
+            stats.update(p50_ms=ordered[len(ordered) // 2],
+                         p95_ms=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], max_ms=ordered[-1])
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            try:
+                browser.driver.quit()
+            except Exception as e:
+                logger.debug(f"Erro ao fechar navegador: {e}")
+
+
+@st.cache_resource(show_spinner=False)
+def open_browser_pool(size=2, max_uses=20, driver_path=None, ready_timeout=8):
+    """Retorna o pool de navegadores compartilhado pelo processo"""
+    return BrowserPool(size, max_uses, driver_path, ready_timeout=ready_timeout)
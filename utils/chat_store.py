@@ -0,0 +1,407 @@
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import streamlit as st
+
+from utils.retrieval import normalize_terms
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    user_materials TEXT NOT NULL DEFAULT '',  -- Legado: o texto agora fica em blobs
+    summary TEXT NOT NULL DEFAULT '',
+    summary_upto INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_chats_created_at ON chats (created_at);
+CREATE INDEX IF NOT EXISTS idx_chats_updated_at ON chats (updated_at);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL REFERENCES chats (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages (chat_id, id);
+
+-- Textos dos materiais enviados, armazenados uma única vez por conteúdo (zlib)
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+
+-- Referências dos chats aos materiais, na ordem em que foram enviados
+CREATE TABLE IF NOT EXISTS chat_materials (
+    chat_id TEXT NOT NULL REFERENCES chats (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES blobs (hash),
+    PRIMARY KEY (chat_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_chat_materials_hash ON chat_materials (hash);
+
+-- Mantém a última atividade do chat sem um UPDATE explícito a cada mensagem
+CREATE TRIGGER IF NOT EXISTS trg_messages_touch_chat AFTER INSERT ON messages
+BEGIN
+    UPDATE chats SET updated_at = NEW.created_at WHERE id = NEW.chat_id;
+END;
+"""
+
+# Índice de texto completo das mensagens (conteúdo externo: o texto fica só em `messages`).
+# unicode61 com remove_diacritics 2 faz "objeção" e "objecao" casarem.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages
+BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages
+BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+END;
+"""
+
+# Sufixos removidos dos termos da busca, para casar singular/plural e variações comuns
+SEARCH_SUFFIXES = ("coes", "cao", "oes", "aes", "ais", "eis", "ao", "as", "os", "es", "s")
+
+# Acima deste número de ocorrências, o ranking considera só as mensagens mais recentes
+MAX_RANKED_MATCHES = 5000
+
+# Colunas acrescentadas depois da primeira versão do esquema (bancos já existentes)
+MIGRATIONS = {
+    'chats': [
+        ("summary", "TEXT NOT NULL DEFAULT ''"),
+        ("summary_upto", "INTEGER NOT NULL DEFAULT 0"),
+    ],
+}
+
+
+def build_fts_query(text):
+    """Converte o texto digitado em uma consulta FTS5 segura: todos os termos, por radical aproximado"""
+    terms = []
+    for term in normalize_terms(text):
+        # "objeções" e "objeção" viram o mesmo prefixo "obje"
+        for suffix in SEARCH_SUFFIXES:
+            if term.endswith(suffix) and len(term) - len(suffix) >= 4:
+                term = term[:-len(suffix)]
+                break
+        terms.append(f'"{term}"*')
+    return " ".join(dict.fromkeys(terms))
+
+
+def new_chat_id():
+    return f"chat_{uuid.uuid4().hex[:12]}"
+
+
+class ChatStore:
+    """Armazenamento dos chats do Consultor em SQLite (WAL), com uma conexão por thread"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            self._migrate_inline_materials(conn)
+            self.fts_enabled = self._create_fts(conn)
+
+    def _migrate(self, conn):
+        for table, columns in MIGRATIONS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, definition in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                    logger.info(f"Coluna {table}.{name} adicionada ao banco de chats")
+
+    def _create_fts(self, conn):
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone() is not None
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            # SQLite compilado sem FTS5: a busca usa LIKE, sem ranking
+            logger.warning(f"FTS5 indisponível, busca nas conversas sem índice: {e}")
+            return False
+        if not existed:
+            # Indexa uma única vez as mensagens gravadas antes do índice existir
+            conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+            logger.info("Índice de busca das mensagens criado")
+        return True
+
+    def _migrate_inline_materials(self, conn):
+        # Move para os blobs o texto que versões anteriores gravavam direto no chat
+        rows = conn.execute("SELECT id, user_materials FROM chats WHERE user_materials != ''").fetchall()
+        for chat_id, text in rows:
+            self._replace_materials(conn, chat_id, [("materiais.txt", text)])
+            conn.execute("UPDATE chats SET user_materials = '' WHERE id = ?", (chat_id,))
+        if rows:
+            logger.info(f"Materiais de {len(rows)} chats movidos para o armazenamento por conteúdo")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        if getattr(self._local, 'in_batch', False):
+            # Dentro de batch(): a gravação entra na transação em curso
+            yield conn
+            return
+        with conn:
+            yield conn
+
+    @contextmanager
+    def batch(self):
+        """Agrupa as gravações feitas no bloco em uma única transação (tudo ou nada)"""
+        conn = self._connect()
+        self._local.in_batch = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.in_batch = False
+
+    def create_chat(self, title="Novo Chat", date=None, chat_id=None, created_at=None):
+        """Cria um chat vazio e retorna o seu identificador"""
+        chat_id = chat_id or new_chat_id()
+        created_at = created_at or time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO chats (id, title, date, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (chat_id, title, date or datetime.now().strftime("%d/%m/%Y"), created_at, created_at),
+            )
+        return chat_id
+
+    @staticmethod
+    def _like_pattern(search):
+        # O texto da busca é literal: escapa \, % e _ (a consulta usa ESCAPE '\')
+        escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+
+    def list_chats(self, limit=None, offset=0, search=""):
+        """Lista os metadados dos chats (sem as mensagens), da atividade mais recente para a mais antiga"""
+        rows = self._connect().execute(
+            "SELECT id, title, date, updated_at FROM chats WHERE title LIKE ? ESCAPE '\\' "
+            "ORDER BY updated_at DESC, rowid DESC LIMIT ? OFFSET ?",
+            (self._like_pattern(search), -1 if limit is None else limit, offset),
+        ).fetchall()
+        return [{'id': row[0], 'title': row[1], 'date': row[2], 'updated_at': row[3]} for row in rows]
+
+    def count_chats(self, search=""):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM chats WHERE title LIKE ? ESCAPE '\\'", (self._like_pattern(search),)
+        ).fetchone()[0]
+
+    def get_chat_meta(self, chat_id):
+        """Retorna título, data e última atividade do chat, sem carregar mensagens"""
+        row = self._connect().execute(
+            "SELECT id, title, date, updated_at FROM chats WHERE id = ?", (chat_id,)
+        ).fetchone()
+        return {'id': row[0], 'title': row[1], 'date': row[2], 'updated_at': row[3]} if row else None
+
+    def get_chat(self, chat_id):
+        """Retorna o chat com suas mensagens, ou None se não existir"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id, title, date, summary, summary_upto FROM chats WHERE id = ?", (chat_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'title': row[1],
+            'date': row[2],
+            'summary': row[3],
+            'summary_upto': row[4],
+            'materials': self.get_chat_materials(chat_id),
+            'messages': self.get_messages(chat_id),
+        }
+
+    def search_messages(self, query, limit=20):
+        """Busca nas mensagens de todos os chats, das mais relevantes para as menos, com trecho destacado"""
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            return []
+        conn = self._connect()
+        if self.fts_enabled:
+            # Termos muito frequentes: limita o ranking às ocorrências mais recentes para manter a latência
+            floor = conn.execute(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (fts_query, MAX_RANKED_MATCHES - 1),
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT m.chat_id, c.title, c.date, m.id, m.role, "
+                "snippet(messages_fts, 0, '**', '**', '…', 16) "
+                "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                "JOIN chats c ON c.id = m.chat_id "
+                "WHERE messages_fts MATCH ? AND messages_fts.rowid >= ? ORDER BY rank LIMIT ?",
+                (fts_query, floor[0] if floor else 0, limit),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT m.chat_id, c.title, c.date, m.id, m.role, substr(m.content, 1, 200) "
+                "FROM messages m JOIN chats c ON c.id = m.chat_id "
+                "WHERE m.content LIKE ? ORDER BY m.id DESC LIMIT ?",
+                (f"%{query.strip()}%", limit),
+            ).fetchall()
+        return [{'chat_id': row[0], 'title': row[1], 'date': row[2], 'message_id': row[3],
+                 'role': row[4], 'snippet': row[5]} for row in rows]
+
+    def get_messages(self, chat_id):
+        """Retorna as mensagens do chat como pares (papel, conteúdo)"""
+        rows = self._connect().execute(
+            "SELECT role, content FROM messages WHERE chat_id = ? ORDER BY id", (chat_id,)
+        ).fetchall()
+        return [(role, content) for role, content in rows]
+
+    def get_messages_after(self, chat_id, after_id=0):
+        """Retorna as mensagens posteriores a `after_id` como tuplas (id, papel, conteúdo)"""
+        return self._connect().execute(
+            "SELECT id, role, content FROM messages WHERE chat_id = ? AND id > ? ORDER BY id", (chat_id, after_id)
+        ).fetchall()
+
+    def get_summary(self, chat_id):
+        """Retorna o resumo acumulado do chat e o id da última mensagem incorporada a ele"""
+        row = self._connect().execute(
+            "SELECT summary, summary_upto FROM chats WHERE id = ?", (chat_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def set_summary(self, chat_id, summary, summary_upto):
+        with self._transaction() as conn:
+            # Nunca retrocede: ignora atualizações mais antigas que a já gravada
+            conn.execute(
+                "UPDATE chats SET summary = ?, summary_upto = ? WHERE id = ? AND summary_upto < ?",
+                (summary, summary_upto, chat_id, summary_upto),
+            )
+
+    def append_message(self, chat_id, role, content, created_at=None):
+        """Acrescenta uma única mensagem ao chat"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO messages (chat_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (chat_id, role, content, created_at or time.time()),
+            )
+
+    def rename_chat(self, chat_id, title):
+        with self._transaction() as conn:
+            conn.execute("UPDATE chats SET title = ? WHERE id = ?", (title, chat_id))
+
+    def set_chat_materials(self, chat_id, materials):
+        """Substitui os materiais do chat por pares (nome, texto), gravando cada texto uma única vez"""
+        with self._transaction() as conn:
+            self._replace_materials(conn, chat_id, materials)
+            self._delete_orphan_blobs(conn)
+
+    def _replace_materials(self, conn, chat_id, materials):
+        conn.execute("DELETE FROM chat_materials WHERE chat_id = ?", (chat_id,))
+        for position, (name, text) in enumerate(materials):
+            data = text.encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()
+            # Conteúdo já armazenado (ex.: o mesmo catálogo em outro chat) não é gravado de novo
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, data, size, created_at) VALUES (?, ?, ?, ?)",
+                (digest, zlib.compress(data, 6), len(data), time.time()),
+            )
+            conn.execute(
+                "INSERT INTO chat_materials (chat_id, position, name, hash) VALUES (?, ?, ?, ?)",
+                (chat_id, position, name, digest),
+            )
+
+    def _delete_orphan_blobs(self, conn):
+        conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM chat_materials)")
+
+    def get_chat_materials(self, chat_id):
+        """Lista as referências aos materiais do chat (nome, hash e tamanho), sem carregar o texto"""
+        rows = self._connect().execute(
+            "SELECT m.name, m.hash, b.size FROM chat_materials m JOIN blobs b ON b.hash = m.hash "
+            "WHERE m.chat_id = ? ORDER BY m.position", (chat_id,)
+        ).fetchall()
+        return [{'name': name, 'hash': digest, 'size': size} for name, digest, size in rows]
+
+    def get_blob(self, digest):
+        """Retorna o texto armazenado para o hash, ou None se não existir"""
+        row = self._connect().execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def get_user_materials(self, chat_id):
+        """Texto de todos os materiais do chat, carregado sob demanda para montar o prompt"""
+        texts = (self.get_blob(material['hash']) for material in self.get_chat_materials(chat_id))
+        return "\n\n".join(text for text in texts if text)
+
+    def delete_chat(self, chat_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+            self._delete_orphan_blobs(conn)
+
+    def is_empty(self):
+        return self._connect().execute("SELECT 1 FROM chats LIMIT 1").fetchone() is None
+
+    def migrate_from_pickle(self, pickle_path):
+        """Importa uma única vez os chats do antigo arquivo consultor_chats.pkl"""
+        pickle_path = Path(pickle_path)
+        if not pickle_path.exists() or not self.is_empty():
+            return 0
+
+        with open(pickle_path, 'rb') as f:
+            chats = pickle.load(f)
+
+        base_time = time.time()
+        with self._connect() as conn:
+            for position, (chat_id, chat) in enumerate(chats.items()):
+                # Preserva a ordem original dos chats no dicionário
+                created_at = base_time + position * 1e-3
+                conn.execute(
+                    "INSERT INTO chats (id, title, date, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (chat_id, chat.get('title', "Novo Chat"), chat.get('date', ""), created_at, created_at),
+                )
+                if chat.get('user_materials'):
+                    self._replace_materials(conn, chat_id, [("materiais.txt", chat['user_materials'])])
+                conn.executemany(
+                    "INSERT INTO messages (chat_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    [(chat_id, role, message, created_at) for role, message in chat.get('messages', [])],
+                )
+
+        pickle_path.rename(pickle_path.with_suffix(".pkl.migrado"))
+        logger.info(f"Migrados {len(chats)} chats de {pickle_path.name} para {self.db_path.name}")
+        return len(chats)
+
+
+@st.cache_resource
+def open_chat_store(db_path, legacy_pickle=None):
+    """Abre o armazenamento de chats compartilhado pelo processo, migrando o pickle antigo se existir"""
+    store = ChatStore(db_path)
+    if legacy_pickle:
+        try:
+            store.migrate_from_pickle(legacy_pickle)
+        except Exception as e:
+            logger.error(f"Erro ao migrar chats de {legacy_pickle}: {e}")
+    return store
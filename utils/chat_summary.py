@@ -0,0 +1,78 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Você mantém um resumo cumulativo de uma conversa entre um consultor comercial e o Consultor I.A. "
+    "da Sucesso em Vendas. Atualize o resumo atual incorporando as novas mensagens. Preserve fatos, "
+    "produtos, números, decisões e pedidos do usuário; omita cumprimentos e repetições. "
+    "Responda apenas com o resumo atualizado, em no máximo {max_words} palavras.\n\n"
+    "RESUMO ATUAL:\n{summary}\n\n"
+    "NOVAS MENSAGENS:\n{messages}\n\n"
+    "RESUMO ATUALIZADO:"
+)
+
+
+def format_messages(messages):
+    """Formata tuplas (id, papel, conteúdo) no mesmo padrão do histórico do prompt"""
+    return "\n".join(f"{'Usuário' if role == 'user' else 'Assistente'}: {content}" for _, role, content in messages)
+
+
+class ChatSummarizer:
+    """Mantém um resumo incremental por chat, atualizado em segundo plano após cada turno"""
+
+    def __init__(self, store, keep_recent_messages=6, max_words=250):
+        self.store = store
+        self.keep_recent_messages = keep_recent_messages
+        self.max_words = max_words
+        # Um único worker: atualizações do mesmo chat nunca correm em paralelo
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resumo-chat")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, chat_id, llm):
+        """Agenda a atualização do resumo do chat, ignorando pedidos repetidos ainda pendentes"""
+        with self._lock:
+            if chat_id in self._pending:
+                return None
+            self._pending.add(chat_id)
+        return self._executor.submit(self._run, chat_id, llm)
+
+    def _run(self, chat_id, llm):
+        try:
+            self.update(chat_id, llm)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar o resumo do chat {chat_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(chat_id)
+
+    def update(self, chat_id, llm):
+        """Incorpora ao resumo as mensagens que saíram da janela recente; nunca refaz do zero"""
+        summary, summary_upto = self.store.get_summary(chat_id)
+        messages = self.store.get_messages_after(chat_id, summary_upto)
+        to_fold = messages[:-self.keep_recent_messages] if self.keep_recent_messages else messages
+        if not to_fold:
+            return False
+
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.max_words,
+            summary=summary or "(vazio)",
+            messages=format_messages(to_fold),
+        )
+        response = llm.invoke(prompt)
+        new_summary = (response.content if hasattr(response, 'content') else str(response)).strip()
+        self.store.set_summary(chat_id, new_summary, to_fold[-1][0])
+        logger.info(f"Resumo do chat {chat_id} atualizado com {len(to_fold)} mensagens "
+                    f"(até a mensagem {to_fold[-1][0]})")
+        return True
+
+
+@st.cache_resource
+def get_chat_summarizer(_store, keep_recent_messages=6):
+    """Retorna o sumarizador compartilhado pelo processo"""
+    return ChatSummarizer(_store, keep_recent_messages)
@@ -0,0 +1,220 @@
+import atexit
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.chat_store import new_chat_id, open_chat_store
+
+logger = logging.getLogger(__name__)
+
+# Leituras de um chat: esperam só as gravações pendentes desse chat (primeiro argumento)
+CHAT_READS = {'get_chat_meta', 'get_chat', 'get_messages', 'get_messages_after', 'get_summary',
+              'get_chat_materials', 'get_user_materials'}
+# Leituras da lista de chats: esperam só criações, renomeações e exclusões pendentes
+LIST_READS = {'list_chats', 'count_chats', 'is_empty', 'search_messages'}
+
+
+class WriteBehindChatStore:
+    """Grava os chats em segundo plano: agrupa as alterações de cada janela em uma única transação
+
+    As leituras passam direto para o ChatStore, mas antes aguardam as gravações pendentes do
+    chat lido (ou, para a lista de chats, as criações/renomeações/exclusões pendentes), de modo
+    que quem acabou de alterar um chat sempre lê o próprio estado sem esperar pelas gravações
+    dos outros chats. Na saída do processo (atexit) tudo o que estiver pendente é gravado.
+    """
+
+    def __init__(self, store, delay=0.25, max_pending=500):
+        self.store = store
+        self.delay = delay
+        self.max_pending = max_pending
+        # chave -> (chat_id, operação, instante em que entrou na fila); chaves repetidas se fundem
+        self._pending = OrderedDict()
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._flushed = 0
+        # Última alteração enfileirada de cada chat e da lista de chats (número de `_submitted`)
+        self._chat_seq = {}
+        self._list_seq = 0
+        self._urgent = False
+        self._closed = False
+        self._stats = {'operations': 0, 'coalesced': 0, 'flushes': 0, 'failed': 0, 'max_queue_depth': 0,
+                       'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0, 'max_lag_ms': 0.0}
+        self._thread = threading.Thread(target=self._run, name="chat-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Gravações (enfileiradas)
+
+    def create_chat(self, title="Novo Chat", date=None):
+        chat_id = new_chat_id()
+        created_at = time.time()
+        self._submit(('create', chat_id), chat_id,
+                     lambda: self.store.create_chat(title, date, chat_id=chat_id, created_at=created_at), listed=True)
+        return chat_id
+
+    def append_message(self, chat_id, role, content):
+        created_at = time.time()
+        self._submit(('message', next(self._ids)), chat_id,
+                     lambda: self.store.append_message(chat_id, role, content, created_at))
+
+    def rename_chat(self, chat_id, title):
+        # Só o último título de uma sequência de renomeações chega ao banco
+        self._submit(('title', chat_id), chat_id, lambda: self.store.rename_chat(chat_id, title), listed=True)
+
+    def set_chat_materials(self, chat_id, materials):
+        self._submit(('materials', chat_id), chat_id, lambda: self.store.set_chat_materials(chat_id, materials))
+
+    def set_summary(self, chat_id, summary, summary_upto):
+        self._submit(('summary', chat_id), chat_id, lambda: self.store.set_summary(chat_id, summary, summary_upto))
+
+    def delete_chat(self, chat_id):
+        with self._cond:
+            # Alterações ainda pendentes de um chat excluído não precisam chegar ao banco
+            for key in [key for key, entry in self._pending.items() if entry[0] == chat_id]:
+                del self._pending[key]
+                self._stats['coalesced'] += 1
+        self._submit(('delete', chat_id), chat_id, lambda: self.store.delete_chat(chat_id), listed=True)
+
+    def _submit(self, key, chat_id, operation, listed=False):
+        with self._cond:
+            if self._closed:
+                # Depois do encerramento grava na hora
+                operation()
+                return
+            if key in self._pending:
+                self._stats['coalesced'] += 1
+                # Mantém a posição original na fila (ex.: depois da criação do chat)
+                self._pending[key] = (chat_id, operation, self._pending[key][2])
+            else:
+                self._pending[key] = (chat_id, operation, time.monotonic())
+            self._submitted += 1
+            self._chat_seq[chat_id] = self._submitted
+            if listed:
+                self._list_seq = self._submitted
+            self._stats['operations'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._pending))
+            if len(self._pending) >= self.max_pending:
+                self._urgent = True
+            self._cond.notify_all()
+
+    # Leituras (veem sempre as próprias gravações)
+
+    def __getattr__(self, name):
+        # Chamado só para o que não está definido aqui: as leituras do ChatStore
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self.store, name)
+        if not callable(attr):
+            return attr
+
+        def read(*args, **kwargs):
+            if name in CHAT_READS:
+                chat_id = args[0] if args else kwargs.get('chat_id')
+                with self._cond:
+                    target = self._chat_seq.get(chat_id, 0)
+                self._wait_flushed(target)
+            elif name in LIST_READS:
+                self._wait_flushed(self._list_seq)
+            else:
+                self.flush()
+            return attr(*args, **kwargs)
+        return read
+
+    # Gravação em segundo plano
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # Espera a janela para juntar as alterações seguintes, salvo se alguém precisar ler
+                deadline = time.monotonic() + self.delay
+                while not (self._urgent or self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._urgent = False
+                upto = self._submitted
+
+            self._write(batch)
+
+            with self._cond:
+                self._flushed = upto
+                # Chats sem nada pendente não precisam mais ser acompanhados
+                self._chat_seq = {chat_id: seq for chat_id, seq in self._chat_seq.items() if seq > upto}
+                self._cond.notify_all()
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        try:
+            with self.store.batch():
+                for _, operation, _ in batch:
+                    operation()
+        except Exception as e:
+            # Transação desfeita: aplica uma a uma para não perder as demais por causa de uma
+            logger.error(f"Erro ao gravar {len(batch)} alterações dos chats em lote: {e}")
+            for chat_id, operation, _ in batch:
+                try:
+                    operation()
+                except Exception as e:
+                    with self._cond:
+                        self._stats['failed'] += 1
+                    logger.error(f"Alteração do chat {chat_id} descartada: {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        lag_ms = (time.monotonic() - min(entry[2] for entry in batch)) * 1000
+        with self._cond:
+            self._stats['flushes'] += 1
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+            self._stats['total_flush_ms'] += elapsed_ms
+            self._stats['max_lag_ms'] = max(self._stats['max_lag_ms'], lag_ms)
+        logger.debug(f"{len(batch)} alterações dos chats gravadas em {elapsed_ms:.1f} ms")
+
+    def flush(self, timeout=30):
+        """Grava agora o que estiver pendente e espera terminar; retorna False se o tempo acabar"""
+        return self._wait_flushed(self._submitted, timeout)
+
+    def _wait_flushed(self, target, timeout=30):
+        # Antecipa a gravação só se a alteração `target` ainda estiver pendente
+        with self._cond:
+            if self._flushed >= target:
+                return True
+            self._urgent = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._flushed >= target, timeout)
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread de gravação"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=30)
+        if self._thread.is_alive():
+            logger.error("Gravação dos chats não terminou no encerramento")
+        else:
+            logger.info(f"Gravação dos chats encerrada ({self._stats['operations']} alterações, "
+                        f"{self._stats['flushes']} transações)")
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._pending)
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+
+@st.cache_resource
+def open_write_behind_store(db_path, legacy_pickle=None, delay=0.25):
+    """Abre o armazenamento de chats com gravação em segundo plano, compartilhado pelo processo"""
+    return WriteBehindChatStore(open_chat_store(db_path, legacy_pickle), delay)
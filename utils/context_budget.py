@@ -0,0 +1,151 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Estratégias para reduzir uma parte do contexto quando ela não cabe no orçamento
+KEEP = "manter"  # Sempre incluída por inteiro (ex.: contexto do sistema)
+DROP_OLDEST = "descartar_antigos"  # Descarta os itens mais antigos primeiro (histórico)
+DROP_LAST = "descartar_ultimos"  # Descarta os últimos itens (trechos menos relevantes)
+TRUNCATE = "truncar"  # Corta o texto do item que não couber (materiais do usuário)
+
+TRUNCATION_MARKER = "\n[... conteúdo truncado para caber no contexto ...]\n"
+
+
+@dataclass
+class ContextPart:
+    """Parte do prompt com prioridade (menor = mais importante) e estratégia de redução"""
+    name: str
+    priority: int
+    items: list
+    strategy: str = DROP_LAST
+    header: str = ""
+    footer: str = ""
+
+
+@dataclass
+class BudgetReport:
+    """Resumo do que foi incluído, truncado ou descartado em uma montagem de contexto"""
+    max_tokens: int
+    used_tokens: int = 0
+    parts: list = field(default_factory=list)
+
+    @property
+    def dropped(self):
+        return {p['name']: {'dropped_items': p['dropped_items'], 'truncated': p['truncated']}
+                for p in self.parts if p['dropped_items'] or p['truncated']}
+
+    def as_dict(self):
+        return {'max_tokens': self.max_tokens, 'used_tokens': self.used_tokens, 'parts': self.parts}
+
+
+def truncate_to_tokens(text, max_tokens, count_tokens):
+    """Corta o texto (mantendo o início) até caber em `max_tokens`"""
+    if max_tokens <= 0:
+        return ""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    # Estimativa proporcional, refinada enquanto ainda não couber
+    end = int(len(text) * max_tokens / tokens)
+    while end > 0:
+        candidate = text[:end] + TRUNCATION_MARKER
+        if count_tokens(candidate) <= max_tokens:
+            return candidate
+        end = int(end * 0.9)
+    return ""
+
+
+class ContextBudget:
+    """Monta o contexto dentro de um orçamento de tokens, reduzindo primeiro as partes menos prioritárias"""
+
+    def __init__(self, count_tokens, max_tokens):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+
+    def assemble(self, parts):
+        """Retorna os segmentos do contexto (na ordem original das partes) e o relatório do orçamento"""
+        report = BudgetReport(self.max_tokens)
+        remaining = self.max_tokens
+        selected = {}
+
+        for index in sorted(range(len(parts)), key=lambda i: parts[i].priority):
+            part = parts[index]
+            item_tokens = [self.count_tokens(item) for item in part.items]
+            overhead = self.count_tokens(part.header) + self.count_tokens(part.footer) if part.items else 0
+            requested = overhead + sum(item_tokens)
+
+            if part.strategy == KEEP or requested <= remaining:
+                items, truncated = list(part.items), False
+            else:
+                items, truncated = self._fit(part, item_tokens, remaining - overhead)
+
+            used = sum(self.count_tokens(item) for item in items) + overhead if items else 0
+            remaining -= used
+            selected[index] = items
+            report.parts.append({
+                'name': part.name,
+                'requested_tokens': requested,
+                'used_tokens': used,
+                'dropped_items': len(part.items) - len(items),
+                'truncated': truncated,
+            })
+
+        segments = []
+        for index, part in enumerate(parts):
+            items = selected[index]
+            if items:
+                segments.extend(s for s in [part.header, *items, part.footer] if s)
+        report.used_tokens = self.max_tokens - remaining
+        return segments, report
+
+    def _fit(self, part, item_tokens, available):
+        if available <= 0:
+            return [], False
+
+        if part.strategy == DROP_OLDEST:
+            # Mantém os itens mais recentes em sequência, do fim para o começo
+            kept = []
+            for item, tokens in zip(reversed(part.items), reversed(item_tokens)):
+                if tokens > available:
+                    break
+                kept.append(item)
+                available -= tokens
+            return list(reversed(kept)), False
+
+        if part.strategy == TRUNCATE:
+            kept = []
+            for item, tokens in zip(part.items, item_tokens):
+                if tokens <= available:
+                    kept.append(item)
+                    available -= tokens
+                    continue
+                truncated = truncate_to_tokens(item, available, self.count_tokens)
+                if not truncated:
+                    # Nem um pedaço do item coube: ele foi descartado, não truncado
+                    return kept, False
+                kept.append(truncated)
+                return kept, True
+            return kept, False
+
+        # DROP_LAST: percorre na ordem de relevância, pulando o que não couber
+        kept = []
+        for item, tokens in zip(part.items, item_tokens):
+            if tokens <= available:
+                kept.append(item)
+                available -= tokens
+        return kept, False
+
+
+def log_budget_report(report, log_path, **metrics):
+    """Registra o relatório do orçamento (e métricas de latência do turno) em um arquivo JSONL"""
+    entry = {'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), **report.as_dict(), **metrics}
+    try:
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"Não foi possível registrar o orçamento de contexto: {e}")
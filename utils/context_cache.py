@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+import streamlit as st
+from langchain_core.messages import HumanMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+# Backends disponíveis para o Consultor
+BACKEND_GEMINI = "gemini"
+BACKEND_SIMULATED = "simulado"
+
+
+@dataclass(frozen=True)
+class StaticPrefix:
+    """Parte fixa do prompt (contexto do sistema e materiais fixos), idêntica byte a byte entre chamadas"""
+    text: str
+    version: str
+    tokens: int
+
+
+def build_static_prefix(agent_context, documents=(), count_tokens=len):
+    """Monta o prefixo fixo em ordem determinística; a versão é o hash do texto final"""
+    sections = [agent_context.strip()]
+    if documents:
+        sections.append("MATERIAIS DE REFERÊNCIA FIXOS:\n" + "\n\n".join(
+            f"[{filename}]\n{text.strip()}" for filename, text in sorted(documents)
+        ))
+    text = "\n\n".join(sections) + "\n\n"
+    version = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    return StaticPrefix(text, version, count_tokens(text))
+
+
+@dataclass
+class StreamingCall:
+    """Resposta em andamento: itera sobre os trechos de texto; `usage` é preenchido ao final"""
+    chunks: object
+    usage: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
+class LangChainBackend:
+    """Envia prefixo e sufixo ao modelo do LangChain; o prefixo estável permite cache implícito do provedor"""
+
+    name = BACKEND_GEMINI
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def register(self, prefix):
+        # A versão do langchain-google-genai em uso não expõe o cache de contexto explícito do Gemini;
+        # a mensagem de sistema é criada uma vez por versão do prefixo (vira a system_instruction)
+        return SystemMessage(content=prefix.text)
+
+    def stream(self, handle, suffix):
+        call = StreamingCall(None)
+
+        def chunks():
+            # Mensagens prontas, sem ChatPromptTemplate: nada de parsing do prompt nem erro com "{" e "}"
+            for chunk in self.llm.stream([handle, HumanMessage(content=suffix)]):
+                usage = getattr(chunk, 'usage_metadata', None)
+                if usage:
+                    call.usage = dict(usage)
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                if text:
+                    yield text
+
+        call.chunks = chunks()
+        return call
+
+    def stats(self):
+        return {}
+
+
+class SimulatedPrefixCacheBackend:
+    """Backend local que simula preço e latência de um modelo com cache de prefixo (para testes e benchmarks)
+
+    Os valores padrão seguem a tabela do Gemini 1.5 Pro (US$ por milhão de tokens, prompts até 128k).
+    """
+
+    name = BACKEND_SIMULATED
+
+    def __init__(self, count_tokens, input_price=1.25, cached_price=0.3125, output_price=5.0,
+                 storage_price_hour=4.5, base_latency=0.25, prefill_seconds_per_1k=0.04,
+                 cached_prefill_seconds_per_1k=0.004, output_tokens_per_second=80.0,
+                 sleep=True, cache_enabled=True):
+        self.count_tokens = count_tokens
+        self.input_price = input_price
+        self.cached_price = cached_price
+        self.output_price = output_price
+        self.storage_price_hour = storage_price_hour
+        self.base_latency = base_latency
+        self.prefill_seconds_per_1k = prefill_seconds_per_1k
+        self.cached_prefill_seconds_per_1k = cached_prefill_seconds_per_1k
+        self.output_tokens_per_second = output_tokens_per_second
+        self.sleep = sleep
+        self.cache_enabled = cache_enabled
+        self._registered = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'registrations': 0, 'cached_tokens': 0, 'uncached_tokens': 0,
+                       'output_tokens': 0, 'cost': 0.0, 'cost_without_cache': 0.0, 'simulated_seconds': 0.0}
+
+    def register(self, prefix):
+        """Registra o prefixo no "servidor" simulado: processado uma vez e depois cobrado por hora armazenada"""
+        if not self.cache_enabled:
+            return prefix
+        with self._lock:
+            self._registered[prefix.version] = (time.time(), prefix.tokens)
+            self._stats['registrations'] += 1
+            self._stats['cost'] += prefix.tokens * self.input_price / 1e6
+        self._wait(prefix.tokens * self.prefill_seconds_per_1k / 1000)
+        logger.info(f"Prefixo {prefix.version} registrado no backend simulado ({prefix.tokens} tokens)")
+        return prefix
+
+    def _wait(self, seconds):
+        with self._lock:
+            self._stats['simulated_seconds'] += seconds
+        if self.sleep:
+            time.sleep(seconds)
+
+    def stream(self, handle, suffix):
+        prefix_tokens = handle.tokens
+        suffix_tokens = self.count_tokens(suffix)
+        with self._lock:
+            cached = self.cache_enabled and handle.version in self._registered
+        # Ecoa a última pergunta do sufixo para facilitar a conferência nos testes
+        questions = [line for line in suffix.splitlines() if line.startswith("Usuário:")]
+        answer = (f"Resposta simulada (prefixo {handle.version}, {prefix_tokens} tokens "
+                  f"{'em cache' if cached else 'processados'}) para: "
+                  + (questions[-1][len("Usuário:"):].strip() if questions else "")[:200])
+        output_tokens = self.count_tokens(answer)
+
+        if cached:
+            cost = prefix_tokens * self.cached_price + suffix_tokens * self.input_price
+            prefill = (prefix_tokens * self.cached_prefill_seconds_per_1k
+                       + suffix_tokens * self.prefill_seconds_per_1k) / 1000
+        else:
+            cost = (prefix_tokens + suffix_tokens) * self.input_price
+            prefill = (prefix_tokens + suffix_tokens) * self.prefill_seconds_per_1k / 1000
+        cost = (cost + output_tokens * self.output_price) / 1e6
+        cost_without_cache = ((prefix_tokens + suffix_tokens) * self.input_price
+                              + output_tokens * self.output_price) / 1e6
+
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['cached_tokens' if cached else 'uncached_tokens'] += prefix_tokens
+            self._stats['uncached_tokens'] += suffix_tokens
+            self._stats['output_tokens'] += output_tokens
+            self._stats['cost'] += cost
+            self._stats['cost_without_cache'] += cost_without_cache
+
+        call = StreamingCall(None, {'input_tokens': prefix_tokens + suffix_tokens,
+                                    'cached_tokens': prefix_tokens if cached else 0,
+                                    'output_tokens': output_tokens})
+
+        def chunks():
+            self._wait(self.base_latency + prefill)
+            words = answer.split(" ")
+            for start in range(0, len(words), 8):
+                self._wait(8 / self.output_tokens_per_second)
+                yield " ".join(words[start:start + 8]) + " "
+
+        call.chunks = chunks()
+        return call
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            # Armazenamento cobrado por milhão de tokens por hora desde o registro
+            stats['storage_cost'] = sum(
+                tokens / 1e6 * (now - registered_at) / 3600 * self.storage_price_hour
+                for registered_at, tokens in self._registered.values()
+            )
+        return stats
+
+
+class ContextCache:
+    """Registra cada versão do prefixo fixo uma única vez no backend e envia só o sufixo de cada turno"""
+
+    def __init__(self, backend, ttl_seconds=3600):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._handles = {}
+        self._lock = threading.Lock()
+        self._stats = {'registrations': 0, 'reuses': 0}
+
+    def _handle(self, prefix):
+        now = time.time()
+        with self._lock:
+            entry = self._handles.get(prefix.version)
+            if entry is not None and entry[1] > now:
+                self._stats['reuses'] += 1
+                return entry[0]
+            # Registro sob o lock: sessões simultâneas não registram o mesmo prefixo duas vezes
+            handle = self.backend.register(prefix)
+            self._handles = {v: e for v, e in self._handles.items() if e[1] > now}
+            self._handles[prefix.version] = (handle, now + self.ttl_seconds)
+            self._stats['registrations'] += 1
+            return handle
+
+    def stream(self, prefix, suffix):
+        """Inicia a geração com o prefixo registrado e o sufixo do turno"""
+        return self.backend.stream(self._handle(prefix), suffix)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['prefixes'] = len(self._handles)
+        stats['backend'] = self.backend.name
+        stats.update(self.backend.stats())
+        return stats
+
+
+@st.cache_resource
+def get_context_cache(backend_name, _llm=None, _count_tokens=len):
+    """Retorna o cache de contexto compartilhado pelo processo para o backend escolhido"""
+    if backend_name == BACKEND_SIMULATED:
+        backend = SimulatedPrefixCacheBackend(_count_tokens)
+    else:
+        backend = LangChainBackend(_llm)
+    logger.info(f"Cache de contexto criado com o backend {backend.name}")
+    return ContextCache(backend)
+
+
+@st.cache_resource(max_entries=4)
+def get_static_prefix(agent_context, materials_version="", _documents=(), _count_tokens=len):
+    """Prefixo fixo montado uma única vez por versão dos materiais"""
+    return build_static_prefix(agent_context, _documents, _count_tokens)
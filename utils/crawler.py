@@ -0,0 +1,357 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+# Contêineres onde os frameworks montam a aplicação; vazios no HTML inicial indicam renderização no cliente
+SPA_ROOT_IDS = ("root", "app", "__next", "__nuxt", "___gatsby", "svelte", "q-app")
+FRAMEWORK_MARKERS = {
+    'React': ("data-reactroot", "react-dom", "_reactRootContainer"),
+    'Next.js': ("__NEXT_DATA__", "/_next/static"),
+    'Nuxt': ("__NUXT__", "/_nuxt/"),
+    'Angular': ("ng-version", "ng-app"),
+    'Vue': ("data-v-app", "vue.runtime", "vue.global"),
+    'Gatsby': ("___gatsby",),
+    'Svelte': ("__sveltekit", "svelte-"),
+}
+
+
+class NotHtmlError(Exception):
+    """A URL não é uma página HTML (PDF, imagem...): não é raspada nem renderizada"""
+
+
+class OffSiteError(Exception):
+    """A URL redireciona para fora do site (ex.: /login -> servidor de SSO): não é raspada nem renderizada"""
+
+
+@dataclass
+class Page:
+    """Uma página visitada: texto e links saem da mesma resposta"""
+    url: str
+    text: str
+    links: set
+    soup: BeautifulSoup = None  # HTML original (None se a página só pôde ser renderizada)
+    rendered: bool = False
+    status: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class CrawlResult:
+    pages: list = field(default_factory=list)
+    stats: dict = field(default_factory=dict)
+
+
+def get_domain(url):
+    """Domínio do site, sem o prefixo "www." (exemplo.com e www.exemplo.com são o mesmo site)"""
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def is_valid_url(url):
+    parsed = urlparse(url)
+    return bool(parsed.netloc) and parsed.scheme in ("http", "https")
+
+
+def same_domain_links(soup, base_url):
+    """Links absolutos do mesmo domínio, sem fragmento (#...), para não visitar a mesma página duas vezes"""
+    domain = get_domain(base_url)
+    links = set()
+    for tag in soup.find_all("a", href=True):
+        href = urldefrag(urljoin(base_url, tag['href']))[0]
+        if is_valid_url(href) and get_domain(href) == domain:
+            links.add(href)
+    return links
+
+
+def page_signals(soup, html):
+    """Indícios de renderização no cliente no HTML baixado de uma página"""
+    words = len(soup.get_text(separator=' ', strip=True).split())
+    empty_roots = [root_id for root_id in SPA_ROOT_IDS
+                   if (tag := soup.find(id=root_id)) is not None and not tag.get_text(strip=True)]
+    frameworks = sorted(name for name, markers in FRAMEWORK_MARKERS.items()
+                        if any(marker in html for marker in markers))
+    noscript = any('javascript' in tag.get_text().lower() for tag in soup.find_all('noscript'))
+    return {'words': words, 'empty_roots': empty_roots, 'frameworks': frameworks,
+            'scripts': len(soup.find_all('script')), 'noscript_warning': noscript}
+
+
+class SiteClassifier:
+    """Decide uma única vez por site se as páginas devem ser baixadas ou renderizadas no navegador
+
+    A decisão sai do HTML da primeira página (contêiner da aplicação vazio, marcadores de
+    framework) ou, se ele não for conclusivo, do rendimento de texto das primeiras páginas
+    com e sem renderização. A decisão e as evidências ficam em `evidence`.
+    """
+
+    def __init__(self, min_words=100, sample_pages=3):
+        self.min_words = min_words
+        self.sample_pages = sample_pages
+        self.mode = None  # None (amostrando), 'static' ou 'spa'
+        self.evidence = {'mode': 'undecided', 'reason': "", 'signals': None, 'sample': []}
+
+    def _decide(self, mode, reason):
+        self.mode = mode
+        self.evidence.update(mode=mode, reason=reason)
+        logger.info(f"Site classificado como {mode}: {reason}")
+
+    def observe_signals(self, signals):
+        if self.evidence['signals'] is None:
+            self.evidence['signals'] = signals
+        if self.mode is None and signals['empty_roots'] and signals['words'] < self.min_words and (
+                signals['frameworks'] or signals['noscript_warning']):
+            marcadores = ", ".join(signals['frameworks']) or "aviso em <noscript>"
+            self._decide('spa', f"HTML inicial com #{signals['empty_roots'][0]} vazio e {marcadores}")
+
+    def observe_page(self, url, fetched_words, rendered_words=None):
+        if self.mode is not None:
+            return
+        sample = self.evidence['sample']
+        sample.append({'url': url, 'fetched_words': fetched_words, 'rendered_words': rendered_words})
+        if len(sample) < self.sample_pages:
+            return
+        # Páginas em que só o navegador trouxe o texto
+        client_side = [item for item in sample if item['rendered_words'] is not None
+                       and item['fetched_words'] < self.min_words <= item['rendered_words']]
+        if len(client_side) * 2 > len(sample):
+            self._decide('spa', f"{len(client_side)} de {len(sample)} páginas só tiveram texto após renderizar")
+        else:
+            self._decide('static', f"{len(sample) - len(client_side)} de {len(sample)} páginas com texto no HTML")
+
+
+class Crawler:
+    """Raspagem assíncrona de um site com conexões reaproveitadas (keep-alive)
+
+    Cada URL é baixada uma única vez; texto e links vêm da mesma resposta. A concorrência
+    por host é limitada pelo pool de conexões e há orçamentos de tempo por requisição e
+    para a raspagem inteira. Páginas com pouco texto (renderizadas via JavaScript) podem
+    ser entregues a `render(url) -> (texto, links[, html])`, executado em threads separadas.
+    Com `render`, o site é classificado logo no início (SiteClassifier) e as páginas seguintes
+    vão direto para o navegador ou só para o download. Com `cache` (HttpCache), as páginas
+    baixadas são reaproveitadas entre raspagens e revalidadas com requisições condicionais.
+    """
+
+    def __init__(self, max_pages=30, concurrency=8, per_host=4, request_timeout=10, total_timeout=90,
+                 min_words=100, render=None, render_concurrency=1, headers=None, sample_pages=3, cache=None):
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.request_timeout = request_timeout
+        self.total_timeout = total_timeout
+        self.min_words = min_words
+        self.render = render
+        self.render_concurrency = render_concurrency
+        self.headers = headers
+        self.sample_pages = sample_pages
+        self.cache = cache
+
+    def crawl(self, start_url):
+        """Versão síncrona de `crawl_async`, utilizável a partir do Streamlit"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.crawl_async(start_url))
+        # Já existe um loop nesta thread: roda em outra
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(value=asyncio.run(self.crawl_async(start_url))))
+        thread.start()
+        thread.join()
+        return result['value']
+
+    async def crawl_async(self, start_url):
+        state = _CrawlState(self, start_url)
+        return await state.run()
+
+
+class _CrawlState:
+    def __init__(self, crawler, start_url):
+        self.crawler = crawler
+        self.start_url = urldefrag(start_url)[0]
+        self.pages = []
+        self.seen = {self.start_url}
+        # Domínios do site: o da URL inicial e o de destino, se ela redirecionar (ex.: http -> host canônico)
+        self.domains = {get_domain(self.start_url)}
+        self.in_flight = 0
+        self.deferred = []
+        self.classifier = SiteClassifier(crawler.min_words, crawler.sample_pages)
+        self.stats = {'fetched': 0, 'rendered': 0, 'failed': 0, 'skipped': 0, 'bytes': 0, 'timed_out': False,
+                      'cache_hits': 0, 'cache_revalidated': 0}
+
+    async def run(self):
+        crawler = self.crawler
+        start = time.perf_counter()
+        # Threads próprias para a renderização: ao estourar o orçamento não esperamos por elas
+        self.render_pool = ThreadPoolExecutor(max_workers=crawler.render_concurrency,
+                                              thread_name_prefix="crawler-render")
+        self.render_slots = asyncio.Semaphore(crawler.render_concurrency)
+        connector = aiohttp.TCPConnector(limit=crawler.concurrency, limit_per_host=crawler.per_host,
+                                         ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=crawler.request_timeout)
+        self.queue = asyncio.Queue()
+        self.queue.put_nowait(self.start_url)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=crawler.headers) as session:
+            self.session = session
+            workers = [asyncio.create_task(self._worker()) for _ in range(crawler.concurrency)]
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout=crawler.total_timeout)
+            except asyncio.TimeoutError:
+                self.stats['timed_out'] = True
+                logger.warning(f"Tempo total de raspagem esgotado ({crawler.total_timeout}s) em {self.start_url}")
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        self.render_pool.shutdown(wait=False, cancel_futures=True)
+        if crawler.cache is not None:
+            crawler.cache.evict()
+
+        self.stats['pages'] = len(self.pages)
+        self.stats['classification'] = self.classifier.evidence
+        self.stats['seconds'] = round(time.perf_counter() - start, 2)
+        logger.info(f"Raspagem de {self.start_url}: {len(self.pages)} páginas em {self.stats['seconds']}s "
+                    f"({self.stats['fetched']} baixadas, {self.stats['rendered']} renderizadas, "
+                    f"{self.stats['failed']} falhas, {self.stats['bytes'] / 1024:.0f} KB, "
+                    f"{self.stats['cache_hits']} do cache, {self.stats['cache_revalidated']} revalidadas)")
+        return CrawlResult(self.pages, self.stats)
+
+    async def _worker(self):
+        while True:
+            url = await self.queue.get()
+            try:
+                if len(self.pages) + self.in_flight >= self.crawler.max_pages:
+                    # Limite reservado pelas visitas em curso; volta à fila se alguma falhar
+                    self.deferred.append(url)
+                    continue
+                self.in_flight += 1
+                try:
+                    page = await self._visit(url)
+                finally:
+                    self.in_flight -= 1
+                if page is None:
+                    if self.deferred:
+                        self.queue.put_nowait(self.deferred.pop(0))
+                    continue
+                self.pages.append(page)
+                for link in sorted(page.links):
+                    # Só links do site (baixados ou renderizados) entram na fila
+                    if link not in self.seen and get_domain(link) in self.domains:
+                        self.seen.add(link)
+                        self.queue.put_nowait(link)
+            finally:
+                self.queue.task_done()
+
+    async def _visit(self, url):
+        start = time.perf_counter()
+        classifier = self.classifier
+        if classifier.mode == 'spa' and self.crawler.render is not None:
+            # Site renderizado no cliente: o HTML baixado não traria o conteúdo
+            page = await self._render(url, None)
+        else:
+            try:
+                page = await self._fetch(url)
+            except (NotHtmlError, OffSiteError) as e:
+                logger.debug(f"Ignorando {url}: {e}")
+                self.stats['skipped'] += 1
+                return None
+            except Exception as e:
+                logger.error(f"Erro ao baixar {url}: {e}")
+                page = None
+
+            fetched_words = len(page.text.split()) if page else 0
+            if classifier.mode != 'static' and self.crawler.render is not None and (
+                    page is None or fetched_words < self.crawler.min_words or not page.links):
+                # Site ainda em amostragem (ou recém-classificado por esta página): pouco texto,
+                # nenhum link ou falha no download, tenta renderizar
+                page = await self._render(url, page)
+                classifier.observe_page(url, fetched_words, len(page.text.split()) if page else 0)
+            else:
+                classifier.observe_page(url, fetched_words)
+        if page is None:
+            self.stats['failed'] += 1
+            return None
+        page.seconds = time.perf_counter() - start
+        return page
+
+    async def _fetch(self, url):
+        cache = self.crawler.cache
+        entry = cache.get(url) if cache is not None else None
+        if entry is not None and entry['fresh']:
+            # Dentro da idade máxima: nenhuma requisição
+            self.stats['cache_hits'] += 1
+            return self._parse(url, entry['body'], entry['content_type'], entry['status'], entry['final_url'])
+
+        headers = cache.conditional_headers(entry) if entry is not None else None
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                cache.revalidated(url, entry)
+                self.stats['cache_revalidated'] += 1
+                return self._parse(url, entry['body'], entry['content_type'], entry['status'], entry['final_url'])
+            response.raise_for_status()
+            body = await response.read()
+            content_type = response.headers.get('Content-Type', '')
+            status = response.status
+            final_url = str(response.url)
+            if cache is not None and (not content_type or content_type.startswith(HTML_TYPES)) \
+                    and 'no-store' not in response.headers.get('Cache-Control', ''):
+                cache.put(url, body, status, content_type, response.headers.get('ETag'),
+                          response.headers.get('Last-Modified'), final_url)
+        self.stats['fetched'] += 1
+        self.stats['bytes'] += len(body)
+        return self._parse(url, body, content_type, status, final_url)
+
+    def _parse(self, url, body, content_type, status, final_url):
+        # Só o redirecionamento da URL inicial amplia os domínios do site; as demais páginas
+        # que saem dele são descartadas
+        if url == self.start_url:
+            self.domains.add(get_domain(final_url))
+        elif get_domain(final_url) not in self.domains:
+            raise OffSiteError(f"redirecionada para {final_url}")
+        if content_type and not content_type.startswith(HTML_TYPES):
+            raise NotHtmlError(f"conteúdo {content_type}")
+        soup = BeautifulSoup(body, 'html.parser')
+        if self.classifier.evidence['signals'] is None:
+            self.classifier.observe_signals(page_signals(soup, body.decode('utf-8', errors='ignore')))
+        text = soup.get_text(separator=' ', strip=True)
+        return Page(url, text, same_domain_links(soup, final_url), soup, status=status, bytes=len(body))
+
+    async def _render(self, url, page):
+        if self.crawler.render is None:
+            return page
+        async with self.render_slots:
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(self.render_pool, self.crawler.render, url)
+            except Exception as e:
+                logger.error(f"Erro ao renderizar {url}: {e}")
+                return page
+        self.stats['rendered'] += 1
+        text, links, html = (*result, None)[:3]
+        if not text and page is None:
+            return None
+        links = {urldefrag(link)[0] for link in links if is_valid_url(link)}
+        if page is None:
+            # Sem download: o HTML renderizado (se houver) serve para a análise da página
+            soup = BeautifulSoup(html, 'html.parser') if html else None
+            return Page(url, text, links, soup, rendered=True)
+        # Mantém o HTML original (estrutura, metadados, contatos) e usa o texto renderizado
+        page.text = text or page.text
+        page.links |= links
+        page.rendered = True
+        return page
+
+
+def crawl_site(url, max_pages=30, render=None, **options):
+    """Raspa até `max_pages` páginas do domínio de `url`; retorna um CrawlResult"""
+    return Crawler(max_pages=max_pages, render=render, **options).crawl(url)
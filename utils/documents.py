@@ -0,0 +1,77 @@
+import io
+import json
+from pathlib import Path
+
+import docx
+import PyPDF2
+
+# Extensões aceitas como material de referência
+SUPPORTED_EXTENSIONS = ('.json', '.docx', '.pdf')
+
+
+def load_json(file):
+    """Carrega um arquivo JSON a partir de um caminho ou de um upload"""
+    try:
+        if isinstance(file, (str, Path)):
+            # Se for um caminho de arquivo
+            with open(file, 'r') as f:
+                data = json.load(f)
+        else:
+            # Se for um objeto de arquivo (upload)
+            data = json.load(file)
+        return data
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Erro ao decodificar o JSON: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Erro ao carregar o arquivo JSON: {e}")
+
+
+def load_docx(file):
+    """Extrai o texto dos parágrafos de um arquivo DOCX"""
+    try:
+        if isinstance(file, (str, Path)):
+            # Se for um caminho de arquivo
+            doc = docx.Document(file)
+        else:
+            # Se for um objeto de arquivo (upload)
+            doc = docx.Document(io.BytesIO(file.read()))
+            file.seek(0)  # Resetar o ponteiro do arquivo
+
+        text = "\n".join([p.text for p in doc.paragraphs])
+        return text
+    except Exception as e:
+        raise RuntimeError(f"Erro ao carregar o arquivo DOCX: {e}")
+
+
+def load_pdf(file):
+    """Extrai o texto de todas as páginas de um arquivo PDF"""
+    try:
+        if isinstance(file, (str, Path)):
+            # Se for um caminho de arquivo
+            with open(file, 'rb') as f:
+                reader = PyPDF2.PdfReader(f)
+                text = ""
+                for page in reader.pages:
+                    text += page.extract_text() if page.extract_text() else ""
+        else:
+            # Se for um objeto de arquivo (upload)
+            reader = PyPDF2.PdfReader(file)
+            text = ""
+            for page in reader.pages:
+                text += page.extract_text() if page.extract_text() else ""
+            file.seek(0)  # Resetar o ponteiro do arquivo
+
+        return text
+    except Exception as e:
+        raise RuntimeError(f"Erro ao carregar o arquivo PDF: {e}")
+
+
+def extract_text(file, filename):
+    """Extrai o texto de um material de acordo com a extensão do nome do arquivo"""
+    if filename.endswith('.json'):
+        return str(load_json(file))
+    if filename.endswith('.docx'):
+        return load_docx(file)
+    if filename.endswith('.pdf'):
+        return load_pdf(file)
+    raise ValueError(f"Formato de arquivo não suportado: {filename}")
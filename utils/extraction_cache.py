@@ -0,0 +1,93 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from utils.documents import extract_text
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que a lógica de extração mudar, invalidando o cache antigo
+EXTRACTOR_VERSION = 1
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache_extracao"
+
+
+def content_hash(data):
+    """Retorna o hash SHA-256 do conteúdo binário de um arquivo"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _cache_path(digest, cache_dir):
+    return Path(cache_dir) / f"{digest}-v{EXTRACTOR_VERSION}.json"
+
+
+def _read_entry(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Entrada de cache inválida ignorada ({path.name}): {e}")
+        return None
+
+
+def _write_entry(path, entry):
+    # Escrita atômica: arquivo temporário no mesmo diretório + rename
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def extract_cached(data, filename, count_tokens, tokenizer=None, cache_dir=CACHE_DIR):
+    """Extrai o texto de um arquivo (em bytes), reaproveitando o cache em disco pelo hash do conteúdo"""
+    # Contadores com atributo `name` (ex.: TokenCounter) identificam o método de contagem
+    tokenizer = tokenizer or getattr(count_tokens, 'name', "gpt-3.5-turbo")
+    digest = content_hash(data)
+    path = _cache_path(digest, cache_dir)
+    entry = _read_entry(path)
+
+    if entry is not None:
+        if entry.get('tokenizer') != tokenizer:
+            # Texto continua válido; só a contagem de tokens precisa ser refeita
+            entry['tokens'] = count_tokens(entry['text'])
+            entry['tokenizer'] = tokenizer
+            _write_entry(path, entry)
+        entry['name'] = filename
+        entry['cached'] = True
+        return entry
+
+    text = extract_text(io.BytesIO(data), filename)
+    entry = {
+        'hash': digest,
+        'name': filename,
+        'text': text,
+        'tokens': count_tokens(text),
+        'chars': len(text),
+        'tokenizer': tokenizer,
+        'extractor_version': EXTRACTOR_VERSION,
+    }
+    try:
+        _write_entry(path, entry)
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar o cache de extração de {filename}: {e}")
+    entry['cached'] = False
+    return entry
+
+
+def load_material(filepath, count_tokens, tokenizer=None, cache_dir=CACHE_DIR):
+    """Carrega um material do disco usando o cache de extração"""
+    filepath = Path(filepath)
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    return extract_cached(data, filepath.name, count_tokens, tokenizer, cache_dir)
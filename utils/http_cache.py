@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache_http"
+
+# Parâmetros de rastreamento que não mudam o conteúdo da página
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid", "_hsenc", "_hsmi")
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonical_url(url):
+    """Forma canônica da URL: esquema/host em minúsculas, sem porta padrão, fragmento nem rastreadores"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith(TRACKING_PARAMS))
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class HttpCache:
+    """Cache HTTP em disco para a raspagem de sites, com revalidação condicional
+
+    Cada resposta fica em um arquivo (cabeçalho JSON + corpo comprimido com zlib), indexado
+    pela URL canônica. Dentro de `max_age` segundos a entrada é usada sem acessar a rede;
+    depois disso é revalidada com If-None-Match/If-Modified-Since (um 304 renova a entrada).
+    Acima de `max_bytes` as entradas usadas há mais tempo são removidas.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_age=21600, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    def _path(self, url):
+        digest = hashlib.sha256(canonical_url(url).encode('utf-8')).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.bin"
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get(self, url):
+        """Entrada guardada para a URL (com o corpo descomprimido) ou None"""
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                header, compressed = f.read().split(b"\n", 1)
+            entry = json.loads(header)
+            entry['body'] = zlib.decompress(compressed)
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Entrada de cache HTTP inválida ignorada ({path.name}): {e}")
+            self._count('misses')
+            return None
+        entry['fresh'] = time.time() - entry['stored_at'] < self.max_age
+        if entry['fresh']:
+            self._count('hits')
+            os.utime(path)  # última utilização, para a remoção por tamanho
+        return entry
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, body, status=200, content_type="", etag=None, last_modified=None, final_url=None):
+        entry = {'url': canonical_url(url), 'final_url': final_url or url, 'status': status,
+                 'content_type': content_type, 'etag': etag, 'last_modified': last_modified,
+                 'stored_at': time.time(), 'size': len(body)}
+        self._write(self._path(url), entry, zlib.compress(body, 6))
+        self._count('stored')
+
+    def revalidated(self, url, entry):
+        """Resposta 304: o corpo guardado continua válido por mais `max_age` segundos"""
+        header = {key: value for key, value in entry.items() if key not in ('body', 'fresh')}
+        header['stored_at'] = time.time()
+        self._write(self._path(url), header, zlib.compress(entry['body'], 6))
+        self._count('revalidated')
+
+    def _write(self, path, header, compressed):
+        # Escrita atômica: arquivo temporário no mesmo diretório + rename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b"\n" + compressed)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            os.unlink(tmp_path)
+            logger.warning(f"Não foi possível gravar o cache HTTP de {header['url']}: {e}")
+
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até o cache caber em `max_bytes`"""
+        files = []
+        for path in self.cache_dir.glob("*/*.bin"):
+            try:
+                info = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        # Desce até 90% do limite para não remover a cada gravação
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes * 0.9:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._stats['evicted'] += removed
+        logger.info(f"Cache HTTP: {removed} entradas removidas ({total / 1024 / 1024:.1f} MB restantes)")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+@st.cache_resource(show_spinner=False)
+def open_http_cache(max_age=21600, max_mb=200, cache_dir=CACHE_DIR):
+    """Retorna o cache HTTP da raspagem compartilhado pelo processo"""
+    return HttpCache(cache_dir, max_age, max_mb * 1024 * 1024)
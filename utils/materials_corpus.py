@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+
+import streamlit as st
+
+try:
+    import resource
+except ImportError:  # Indisponível no Windows
+    resource = None
+
+from utils.documents import SUPPORTED_EXTENSIONS
+from utils.extraction_cache import CACHE_DIR, load_material
+from utils.retrieval import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Contadores do processo para acompanhar o reaproveitamento do corpus entre sessões
+_stats_lock = threading.Lock()
+_stats = {'loads': 0, 'hits': 0, 'sessions': 0}
+
+
+@dataclass(frozen=True)
+class MaterialsCorpus:
+    """Corpus imutável dos materiais fixos, compartilhado por todas as sessões do processo"""
+    version: str
+    documents: tuple
+    index: BM25Index
+    total_tokens: int
+    total_chars: int
+    pending: int = 0  # Arquivos ainda em extração quando este corpus foi montado
+
+    @property
+    def resident_bytes(self):
+        """Estimativa da memória ocupada pelos textos e pelos arrays do índice"""
+        size = sum(sys.getsizeof(text) for _, text in self.documents)
+        size += sum(sys.getsizeof(chunk.text) for chunk in self.index.chunks)
+        for array in (self.index.doc_ids, self.index.term_freqs, self.index.indptr,
+                      self.index.idf, self.index.length_norm, self.index.token_counts):
+            size += array.nbytes
+        return size
+
+
+def materials_fingerprint(materials_dir):
+    """Assinatura barata da pasta (nome, tamanho e data de modificação) para detectar mudanças"""
+    materials_dir = Path(materials_dir)
+    if not materials_dir.exists():
+        return ""
+    entries = []
+    for filename in sorted(os.listdir(materials_dir)):
+        if filename.endswith(SUPPORTED_EXTENSIONS):
+            stat = (materials_dir / filename).stat()
+            entries.append(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+
+def list_materials(materials_dir):
+    """Nomes dos materiais suportados da pasta, em ordem alfabética"""
+    materials_dir = Path(materials_dir)
+    if not materials_dir.exists():
+        logger.warning(f"Pasta de materiais não encontrada: {materials_dir}")
+        return []
+    return [filename for filename in sorted(os.listdir(materials_dir)) if filename.endswith(SUPPORTED_EXTENSIONS)]
+
+
+def build_corpus(materials, count_tokens, pending=0):
+    """Monta o corpus (textos, versão e índice BM25) a partir de pares (nome, entrada) em ordem fixa"""
+    documents = tuple((filename, entry['text']) for filename, entry in materials)
+    version = hashlib.sha256(
+        "\n".join(f"{filename}:{entry['hash']}" for filename, entry in materials).encode()
+    ).hexdigest()[:12]
+    return MaterialsCorpus(
+        version=version,
+        documents=documents,
+        index=BM25Index.from_documents(documents, count_tokens),
+        total_tokens=sum(entry['tokens'] for _, entry in materials),
+        total_chars=sum(entry['chars'] for _, entry in materials),
+        pending=pending,
+    )
+
+
+class MaterialsLoader:
+    """Extrai os materiais em paralelo (um arquivo por processo) e monta o corpus conforme ficam prontos"""
+
+    def __init__(self, materials_dir, count_tokens, workers=None, cache_dir=CACHE_DIR):
+        self.materials_dir = Path(materials_dir)
+        self.count_tokens = count_tokens
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.cache_dir = cache_dir
+        self.filenames = list_materials(materials_dir)
+        self.elapsed = None
+        self._entries = {}
+        self._done = set()
+        self._condition = threading.Condition()
+        self._build_lock = threading.Lock()
+        self._snapshot = None
+        self._thread = threading.Thread(target=self._run, name="carga-materiais", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        remaining = list(self.filenames)
+        if self.workers > 1 and len(remaining) > 1:
+            try:
+                # "spawn" evita herdar as threads do servidor do Streamlit em um fork
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(remaining)), mp_context=context) as pool:
+                    futures = {
+                        pool.submit(load_material, self.materials_dir / filename, self.count_tokens,
+                                    None, self.cache_dir): filename
+                        for filename in remaining
+                    }
+                    for future in as_completed(futures):
+                        if isinstance(future.exception(), BrokenProcessPool):
+                            raise future.exception()
+                        self._finish(futures[future], future.result)
+                remaining = []
+            except Exception as e:
+                # Pool indisponível (ex.: processo filho encerrado): conclui sequencialmente
+                logger.error(f"Erro na extração paralela dos materiais, seguindo sem processos: {e}")
+                with self._condition:
+                    remaining = [f for f in remaining if f not in self._done]
+
+        for filename in remaining:
+            self._finish(filename, lambda: load_material(
+                self.materials_dir / filename, self.count_tokens, None, self.cache_dir))
+
+        self.elapsed = time.perf_counter() - start
+        with self._condition:
+            self._condition.notify_all()
+        logger.info(f"Materiais extraídos em {self.elapsed:.2f}s com {self.workers} processo(s)")
+
+    def _finish(self, filename, load):
+        try:
+            entry = load()
+            logger.info(f"Carregado material {Path(filename).suffix[1:].upper()}: {filename}"
+                        f"{' (cache)' if entry['cached'] else ''}")
+        except Exception as e:
+            entry = None
+            logger.error(f"Erro ao carregar arquivo {filename}: {e}")
+        with self._condition:
+            if entry is not None:
+                self._entries[filename] = entry
+            self._done.add(filename)
+            self._condition.notify_all()
+
+    @property
+    def complete(self):
+        with self._condition:
+            return len(self._done) >= len(self.filenames)
+
+    def progress(self):
+        """Quantidade de arquivos já processados (com ou sem erro) e total"""
+        with self._condition:
+            return len(self._done), len(self.filenames)
+
+    def wait(self, min_files, timeout=None):
+        """Bloqueia até haver `min_files` arquivos processados (ou todos), retornando se foi atendido"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self._done) >= min(min_files, len(self.filenames)), timeout
+            )
+
+    def snapshot(self):
+        """Corpus com os materiais prontos até agora, sempre na ordem alfabética dos arquivos"""
+        with self._build_lock:
+            with self._condition:
+                materials = [(f, self._entries[f]) for f in self.filenames if f in self._entries]
+                pending = len(self.filenames) - len(self._done)
+            key = (tuple(filename for filename, _ in materials), pending)
+            if self._snapshot is not None and self._snapshot[0] == key:
+                return self._snapshot[1]
+
+            corpus = build_corpus(materials, self.count_tokens, pending)
+            self._snapshot = (key, corpus)
+        with _stats_lock:
+            _stats['loads'] += 1
+        cached_files = sum(entry['cached'] for _, entry in materials)
+        logger.info(f"Materiais lidos do cache de extração: {cached_files}/{len(materials)}")
+        logger.info(f"Corpus de materiais {corpus.version} montado com {len(materials)}/{len(self.filenames)} "
+                    f"arquivos: {corpus.total_tokens} tokens, {len(corpus.index.chunks)} trechos, "
+                    f"{corpus.resident_bytes / 1e6:.1f} MB")
+        return corpus
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _get_loader(materials_dir, fingerprint, _count_tokens, workers):
+    return MaterialsLoader(materials_dir, _count_tokens, workers)
+
+
+def get_materials_corpus(materials_dir, count_tokens, min_ready=1.0, workers=None):
+    """Retorna o corpus compartilhado do processo, recarregando apenas se a pasta mudar
+
+    Espera até que a fração `min_ready` dos arquivos esteja processada; os demais entram
+    nos corpus seguintes à medida que a extração em segundo plano termina.
+    """
+    loader = _get_loader(str(materials_dir), materials_fingerprint(materials_dir), count_tokens, workers)
+    loader.wait(math.ceil(min_ready * len(loader.filenames)))
+    corpus = loader.snapshot()
+    with _stats_lock:
+        _stats['hits'] += 1
+    return corpus
+
+
+def attach_session(session_state, corpus):
+    """Associa a sessão à versão atual do corpus, guardando apenas o identificador"""
+    if session_state.get('materials_version') != corpus.version:
+        if 'materials_version' not in session_state:
+            with _stats_lock:
+                _stats['sessions'] += 1
+        session_state.materials_version = corpus.version
+        logger.info(f"Sessão associada ao corpus de materiais {corpus.version}")
+
+
+def corpus_stats(corpus):
+    """Métricas de memória e reaproveitamento do corpus compartilhado"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['version'] = corpus.version
+    stats['pending'] = corpus.pending
+    stats['resident_mb'] = corpus.resident_bytes / 1e6
+    if resource:
+        # ru_maxrss é informado em KB no Linux
+        stats['process_peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
@@ -0,0 +1,148 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+
+# Palavras muito frequentes em português que não ajudam a ranquear trechos
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e ela elas ele eles em entre era essa esse esta este eu
+foi for ha isso isto ja lhe mais mas me mesmo meu minha muito na nas nao nem no nos nossa
+nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu
+seus sua suas so tambem te tem ter um uma umas uns voce voces vai sao esta estao pra
+""".split())
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_terms(text):
+    """Converte um texto em termos minúsculos, sem acentos e sem stopwords"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [t for t in _TOKEN_RE.findall(text) if len(t) > 1 and t not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    source: str
+    position: int
+    text: str
+    tokens: int
+
+
+def split_into_chunks(text, max_words=220, overlap_words=40):
+    """Divide um texto em trechos de até `max_words` palavras, respeitando parágrafos"""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n|\n", text) if p.strip()]
+    chunks = []
+    current = []
+
+    def flush():
+        if current:
+            chunks.append(" ".join(current))
+
+    for paragraph in paragraphs:
+        words = paragraph.split()
+        # Parágrafos muito longos (comum em PDFs) são quebrados em janelas
+        while len(words) > max_words:
+            flush()
+            current = []
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words - overlap_words:]
+        if len(current) + len(words) > max_words:
+            flush()
+            current = current[-overlap_words:] if overlap_words else []
+        current.extend(words)
+    flush()
+    return chunks
+
+
+class BM25Index:
+    """Índice léxico BM25 sobre trechos, com postings em matriz esparsa (CSC) do NumPy"""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+
+        rows, cols, freqs = [], [], []
+        lengths = np.zeros(len(self.chunks), dtype=np.float32)
+        for doc_id, chunk in enumerate(self.chunks):
+            terms = normalize_terms(chunk.text)
+            lengths[doc_id] = len(terms)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+                rows.append(doc_id)
+                cols.append(term_id)
+                freqs.append(count)
+
+        # Ordena as entradas por termo para montar os postings em formato CSC
+        cols = np.asarray(cols, dtype=np.int32)
+        order = np.argsort(cols, kind='stable')
+        self.doc_ids = np.asarray(rows, dtype=np.int32)[order]
+        self.term_freqs = np.asarray(freqs, dtype=np.float32)[order]
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.vocabulary)), out=self.indptr[1:])
+
+        n_docs = max(len(self.chunks), 1)
+        doc_freq = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        self.length_norm = k1 * (1 - b + b * lengths / (avg_length or 1.0))
+        self.token_counts = np.asarray([c.tokens for c in self.chunks], dtype=np.int64)
+
+    @classmethod
+    def from_documents(cls, documents, count_tokens, max_words=220, overlap_words=40):
+        """Constrói o índice a partir de pares (nome, texto) e de uma função de contagem de tokens"""
+        chunks = []
+        for source, text in documents:
+            for position, chunk_text in enumerate(split_into_chunks(text, max_words, overlap_words)):
+                chunks.append(Chunk(source, position, chunk_text, count_tokens(chunk_text)))
+        return cls(chunks)
+
+    @property
+    def total_tokens(self):
+        return int(self.token_counts.sum())
+
+    def scores(self, query):
+        """Calcula a pontuação BM25 de todos os trechos para a consulta"""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in set(normalize_terms(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + self.length_norm[docs])
+        return scores
+
+    def search(self, query, top_k=8, token_budget=None):
+        """Retorna os trechos mais relevantes que cabem no orçamento de tokens"""
+        if not self.chunks:
+            return []
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        selected = []
+        used_tokens = 0
+        for doc_id in ranked:
+            if len(selected) >= top_k:
+                break
+            tokens = int(self.token_counts[doc_id])
+            if token_budget is not None and used_tokens + tokens > token_budget:
+                continue  # Tenta trechos menores que ainda caibam no orçamento
+            selected.append(self.chunks[doc_id])
+            used_tokens += tokens
+        return selected
+
+
+def format_chunks(chunks):
+    """Formata os trechos recuperados para inclusão no prompt, indicando a fonte"""
+    return "\n\n".join(f"[{chunk.source}]\n{chunk.text}" for chunk in chunks)
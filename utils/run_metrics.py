@@ -0,0 +1,55 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+
+class RunMetrics:
+    """Tempo de execução do script a cada rerun, separado por escopo (app inteiro ou fragmento)"""
+
+    def __init__(self, max_samples=500):
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self._runs = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, scope):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Também mede execuções interrompidas por st.rerun() ou st.stop()
+            self.record(scope, time.perf_counter() - start)
+
+    def record(self, scope, seconds):
+        with self._lock:
+            self._samples[scope].append(seconds * 1000)
+            self._runs[scope] += 1
+        logger.info(f"Execução do script ({scope}): {seconds * 1000:.1f} ms")
+
+    def stats(self):
+        """Por escopo: execuções, última, mediana e p95 em milissegundos"""
+        with self._lock:
+            samples = {scope: list(values) for scope, values in self._samples.items()}
+            runs = dict(self._runs)
+        stats = {}
+        for scope, values in samples.items():
+            ordered = sorted(values)
+            stats[scope] = {
+                'runs': runs[scope],
+                'last_ms': values[-1],
+                'p50_ms': ordered[len(ordered) // 2],
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            }
+        return stats
+
+
+@st.cache_resource(show_spinner=False)
+def get_run_metrics():
+    """Retorna as métricas de execução compartilhadas pelo processo"""
+    return RunMetrics()
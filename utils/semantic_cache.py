@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import streamlit as st
+
+from utils.retrieval import normalize_terms
+
+logger = logging.getLogger(__name__)
+
+# Embedders disponíveis: n-gramas com hash (offline) ou embeddings do Gemini (requer rede)
+EMBEDDER_NGRAMS = "ngramas"
+EMBEDDER_GEMINI = "gemini"
+
+# Verbos e expressões de pergunta que pouco dizem sobre o assunto; recebem peso reduzido
+QUESTION_TERMS = {
+    "como", "qual", "quais", "fazer", "faco", "devo", "deve", "posso", "pode", "usar", "responder",
+    "contornar", "lidar", "lido", "explique", "explicar", "dicas", "dica", "ideias", "melhor", "melhores",
+    "forma", "formas", "maneira", "maneiras", "jeito", "tecnicas", "tecnica", "sobre", "ajuda", "preciso",
+    "bom", "boa", "onde", "comecar", "sendo",
+}
+
+# Prefixo comum mínimo para considerar duas palavras do assunto variações uma da outra ("objecao"/"objecoes")
+TOPIC_PREFIX = 5
+
+
+def topic_terms(text):
+    """Palavras que definem o assunto da pergunta: sem stopwords nem os termos de QUESTION_TERMS"""
+    return frozenset(term for term in normalize_terms(text) if term not in QUESTION_TERMS)
+
+
+def _same_term(a, b):
+    size = min(len(a), len(b), TOPIC_PREFIX)
+    return a[:size] == b[:size] and (size == TOPIC_PREFIX or a.startswith(b) or b.startswith(a))
+
+
+def same_topic(a, b):
+    """Cada palavra do assunto de uma pergunta tem correspondente na outra, e vice-versa
+
+    A similaridade dos vetores sozinha não separa perguntas que diferem só na palavra-chave
+    ("cliente novo"/"cliente antigo", o mesmo prompt rápido com outro produto).
+    """
+    return all(any(_same_term(x, y) for y in b) for x in a) and all(any(_same_term(x, y) for x in a) for y in b)
+
+
+class HashedNgramEmbedder:
+    """Embedding offline: palavras normalizadas e n-gramas de caracteres projetados por hash em um vetor fixo"""
+
+    name = EMBEDDER_NGRAMS
+
+    def __init__(self, dim=4096, ngram_sizes=(3, 4, 5), word_weight=2.0, question_weight=0.2):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+        self.word_weight = word_weight
+        self.question_weight = question_weight
+
+    def _features(self, text):
+        for term in normalize_terms(text):
+            scale = self.question_weight if term in QUESTION_TERMS else 1.0
+            yield term, self.word_weight * scale
+            # Os n-gramas aproximam variações como "objeção"/"objeções" e "venda"/"vendas"
+            padded = f"<{term}>"
+            for size in self.ngram_sizes:
+                for start in range(len(padded) - size + 1):
+                    yield padded[start:start + size], scale
+
+    def embed(self, texts):
+        """Retorna uma matriz (n_textos, dim) com linhas de norma 1"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                # Um bit do hash define o sinal, reduzindo o viés das colisões
+                matrix[row, value % self.dim] += weight if value >> 63 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+class LangChainEmbedder:
+    """Adapta um modelo de embeddings do LangChain (ex.: GoogleGenerativeAIEmbeddings) à mesma interface"""
+
+    name = EMBEDDER_GEMINI
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def embed(self, texts):
+        matrix = np.asarray(self.embeddings.embed_documents(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+class SemanticCache:
+    """Cache de respostas por similaridade da pergunta, separado por escopo (versão dos materiais e do prefixo)"""
+
+    def __init__(self, embedder, threshold=0.65, max_entries_per_scope=2000, require_topic=True):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.require_topic = require_topic
+        self.max_entries_per_scope = max_entries_per_scope
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'entries': 0}
+
+    def lookup(self, question, scope):
+        """Retorna (resposta, similaridade, pergunta original) da entrada mais próxima acima do limiar
+        e com o mesmo assunto, ou None"""
+        vector = self.embedder.embed([question])[0]
+        topic = topic_terms(question)
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is None or not entry['questions']:
+                self._stats['misses'] += 1
+                return None
+            similarities = entry['matrix'][:len(entry['questions'])] @ vector
+            # Candidatas acima do limiar, da mais parecida para a menos
+            for best in np.argsort(-similarities):
+                similarity = float(similarities[best])
+                if similarity < self.threshold:
+                    break
+                if self.require_topic and not same_topic(topic, entry['topics'][best]):
+                    continue
+                self._stats['hits'] += 1
+                return entry['answers'][best], similarity, entry['questions'][best]
+            self._stats['misses'] += 1
+            return None
+
+    def add(self, question, answer, scope):
+        vector = self.embedder.embed([question])[0]
+        with self._lock:
+            entry = self._scopes.setdefault(scope, {
+                'matrix': np.zeros((16, vector.shape[0]), dtype=np.float32), 'questions': [], 'answers': [],
+                'topics': [],
+            })
+            if len(entry['questions']) >= self.max_entries_per_scope:
+                # Descarta a entrada mais antiga do escopo
+                entry['matrix'][:-1] = entry['matrix'][1:]
+                entry['questions'].pop(0)
+                entry['answers'].pop(0)
+                entry['topics'].pop(0)
+                self._stats['entries'] -= 1
+            size = len(entry['questions'])
+            if size == entry['matrix'].shape[0]:
+                # Cresce dobrando a capacidade, sem realocar a cada inserção
+                entry['matrix'] = np.vstack([entry['matrix'], np.zeros_like(entry['matrix'])])
+            entry['matrix'][size] = vector
+            entry['questions'].append(question)
+            entry['answers'].append(answer)
+            entry['topics'].append(topic_terms(question))
+            self._stats['entries'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['scopes'] = len(self._scopes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['embedder'] = self.embedder.name
+        stats['threshold'] = self.threshold
+        return stats
+
+
+@st.cache_resource
+def get_semantic_cache(embedder_name=EMBEDDER_NGRAMS, threshold=0.65):
+    """Retorna o cache semântico compartilhado pelo processo"""
+    if embedder_name == EMBEDDER_GEMINI:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        embedder = LangChainEmbedder(GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+    else:
+        embedder = HashedNgramEmbedder()
+    logger.info(f"Cache semântico criado (embedder {embedder.name}, limiar {threshold})")
+    return SemanticCache(embedder, threshold)
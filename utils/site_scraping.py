@@ -0,0 +1,42 @@
+import os
+import re
+
+from utils.browser_pool import open_browser_pool
+from utils.crawler import crawl_site
+from utils.http_cache import open_http_cache
+
+# Raspagem: conexões simultâneas por site e orçamentos de tempo (segundos) por página e no total
+CRAWLER_PER_HOST = int(os.getenv('RASPAGEM_CONEXOES_POR_HOST', '4'))
+CRAWLER_REQUEST_TIMEOUT = float(os.getenv('RASPAGEM_TEMPO_POR_PAGINA', '10'))
+CRAWLER_TOTAL_TIMEOUT = float(os.getenv('RASPAGEM_TEMPO_TOTAL', '120'))
+# Navegadores headless reaproveitados entre páginas (renderização de sites em JavaScript)
+BROWSER_POOL_SIZE = int(os.getenv('RASPAGEM_NAVEGADORES', '2'))
+BROWSER_MAX_USES = int(os.getenv('RASPAGEM_USOS_POR_NAVEGADOR', '20'))
+CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH') or None
+BROWSER_READY_TIMEOUT = float(os.getenv('RASPAGEM_ESPERA_MAXIMA', '8'))
+# Cache em disco das páginas baixadas: idade máxima sem revalidar (segundos) e tamanho máximo
+HTTP_CACHE_MAX_AGE = int(os.getenv('RASPAGEM_CACHE_IDADE_MAXIMA', '21600'))
+HTTP_CACHE_MAX_MB = int(os.getenv('RASPAGEM_CACHE_TAMANHO_MB', '200'))
+
+
+def scrape_site(url, max_pages=30):
+    """Raspa o site com a configuração RASPAGEM_* compartilhada pelo Dossiê e pelo Método de Vendas
+
+    Cada página é baixada uma única vez (texto e links da mesma resposta), várias em paralelo e
+    com cache em disco; as de sites renderizados no cliente vão para um navegador do pool.
+    """
+    browsers = open_browser_pool(BROWSER_POOL_SIZE, BROWSER_MAX_USES, CHROMEDRIVER_PATH, BROWSER_READY_TIMEOUT)
+    return crawl_site(url, max_pages, render=browsers.visit, render_concurrency=BROWSER_POOL_SIZE,
+                      per_host=CRAWLER_PER_HOST, request_timeout=CRAWLER_REQUEST_TIMEOUT,
+                      total_timeout=CRAWLER_TOTAL_TIMEOUT,
+                      cache=open_http_cache(HTTP_CACHE_MAX_AGE, HTTP_CACHE_MAX_MB))
+
+
+def page_text(page):
+    """Texto da página com os espaços normalizados"""
+    return re.sub(r'\s+', ' ', page.text)
+
+
+def site_text(result):
+    """Texto de todas as páginas raspadas, separadas por linha em branco"""
+    return "".join(page_text(page) + "\n\n" for page in result.pages)
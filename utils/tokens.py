@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Modos de contagem: codificação do tiktoken ou aproximação por caracteres calibrada para o Gemini
+MODE_TIKTOKEN = "tiktoken"
+MODE_GEMINI_APPROX = "gemini-aprox"
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model_name):
+    """Carrega a codificação do tiktoken uma única vez por modelo (None se indisponível)"""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model_name)
+    except Exception as e:
+        # Sem acesso à codificação (ex.: sem rede); não tenta novamente a cada chamada
+        logger.warning(f"Codificação do tiktoken indisponível para {model_name}, usando contagem de palavras: {e}")
+        return None
+
+
+class TokenCounter:
+    """Contador de tokens com codificador carregado uma vez e cache por hash do conteúdo"""
+
+    def __init__(self, mode=MODE_TIKTOKEN, model_name="gpt-3.5-turbo", chars_per_token=4.0, max_cached=100_000):
+        self.mode = mode
+        self.model_name = model_name
+        self.chars_per_token = chars_per_token
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'calibrations': 0}
+
+    @property
+    def name(self):
+        """Identificador do método de contagem, usado para invalidar contagens persistidas"""
+        if self.mode == MODE_GEMINI_APPROX:
+            return MODE_GEMINI_APPROX
+        return f"{MODE_TIKTOKEN}:{self.model_name}" if get_encoder(self.model_name) else "palavras"
+
+    def _encode_count(self, text):
+        encoder = get_encoder(self.model_name)
+        if encoder is None:
+            # Fallback simples se tiktoken falhar
+            return len(text.split())
+        return len(encoder.encode(text, disallowed_special=()))
+
+    def count(self, text):
+        """Conta os tokens de um texto, reaproveitando contagens anteriores do mesmo conteúdo"""
+        if not text:
+            return 0
+        if self.mode == MODE_GEMINI_APPROX:
+            # Aproximação O(1): não compensa armazenar em cache
+            return max(1, round(len(text) / self.chars_per_token))
+
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._stats['hits'] += 1
+                return cached
+
+        tokens = self._encode_count(text)
+        with self._lock:
+            self._stats['misses'] += 1
+            self._cache[key] = tokens
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def __call__(self, text):
+        return self.count(text)
+
+    def count_segments(self, segments):
+        """Tamanho de um prompt como soma das contagens (em cache) de cada segmento"""
+        return sum(self.count(segment) for segment in segments)
+
+    def observe(self, chars, actual_tokens, weight=0.2):
+        """Calibra a aproximação do Gemini com a contagem real informada pela API"""
+        if chars <= 0 or not actual_tokens:
+            return
+        observed = chars / actual_tokens
+        with self._lock:
+            self.chars_per_token = (1 - weight) * self.chars_per_token + weight * observed
+            self._stats['calibrations'] += 1
+
+    def __getstate__(self):
+        # Enviado a processos de extração sem o cache nem o lock
+        state = self.__dict__.copy()
+        del state['_cache'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = len(self._cache)
+        stats['mode'] = self.mode
+        stats['chars_per_token'] = self.chars_per_token
+        return stats
+
+
+@st.cache_resource
+def get_token_counter(mode=MODE_TIKTOKEN, model_name="gpt-3.5-turbo", chars_per_token=4.0):
+    """Retorna o contador de tokens compartilhado pelo processo"""
+    return TokenCounter(mode, model_name, chars_per_token)
@@ -0,0 +1,72 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.extraction_cache import content_hash, extract_cached
+
+logger = logging.getLogger(__name__)
+
+# Estados de uma extração de upload
+PENDING = "pendente"
+READY = "pronto"
+FAILED = "erro"
+
+
+class UploadProcessor:
+    """Extrai uploads em segundo plano, uma única vez por conteúdo (hash SHA-256)"""
+
+    def __init__(self, count_tokens, max_workers=2, max_jobs=256):
+        self.count_tokens = count_tokens
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extracao-upload")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, data, filename):
+        """Agenda a extração do arquivo (se ainda não conhecida) e retorna o hash do conteúdo"""
+        digest = content_hash(data)
+        with self._lock:
+            if digest in self._jobs:
+                return digest
+            self._jobs[digest] = {'status': PENDING, 'name': filename, 'entry': None, 'error': None}
+            self._trim()
+        self._executor.submit(self._extract, digest, data, filename)
+        return digest
+
+    def _extract(self, digest, data, filename):
+        try:
+            entry = extract_cached(data, filename, self.count_tokens)
+            update = {'status': READY, 'entry': entry}
+            logger.info(f"Upload {filename} extraído ({entry['tokens']} tokens, "
+                        f"{'cache' if entry['cached'] else 'novo'})")
+        except Exception as e:
+            update = {'status': FAILED, 'error': str(e)}
+            logger.error(f"Erro ao processar arquivo {filename}: {e}")
+        with self._lock:
+            if digest in self._jobs:
+                self._jobs[digest].update(update)
+
+    def _trim(self):
+        # Descarta os trabalhos concluídos mais antigos; o texto continua no cache em disco
+        finished = [d for d, job in self._jobs.items() if job['status'] != PENDING]
+        for digest in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[digest]
+
+    def status(self, digests):
+        """Retorna o estado atual dos trabalhos, na ordem dos hashes informados"""
+        with self._lock:
+            return [dict(self._jobs.get(d) or {'status': FAILED, 'name': d, 'entry': None,
+                                               'error': "Trabalho descartado"}) for d in digests]
+
+    def progress(self, digests):
+        """Quantidade de arquivos concluídos (prontos ou com erro) e total"""
+        jobs = self.status(digests)
+        return sum(job['status'] != PENDING for job in jobs), len(jobs)
+
+
+@st.cache_resource
+def get_upload_processor(_count_tokens, max_workers=2):
+    """Retorna o processador de uploads compartilhado pelo processo"""
+    return UploadProcessor(_count_tokens, max_workers)